@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Batch pre-labeling of capture folders (YOLO txt + Label Studio predictions).
+
+Runs a detector over every image in a folder - a raw dataNNN capture folder
+from data/usb_cap.py (flat *.jpg) or a dataset root with images/ - and writes
+
+  <labels>/<rel>.txt             YOLO labels (cls cx cy w h), ready for review_yolo.py / training
+  <labels>/.autolabel.jsonl      one record per processed image (resume state, appended per batch)
+  <out-json>                     Label Studio task list with "predictions", for JSON import
+
+Images are decoded by a thread pool a few batches ahead of the detector, and
+inference runs in batches of --batch. Images that already have a record in
+.autolabel.jsonl (and whose label file still exists) are skipped, so an
+interrupted run picks up where it stopped; --force relabels everything.
+
+Image URLs in the JSON follow the local-files pattern from
+labeling/LABEL_STUDIO_YOLO_STEP_BY_STEP.md:
+  /data/local-files/?d=<ls-prefix>/<rel>        (default prefix: upload/<folder name>)
+so copy the images to labeling/ls-data/media/upload/<folder name>/ before importing.
+
+Usage:
+  python3 autolabel_yolo.py /path/to/data007 --model ../models/toy_cars.pt
+  python3 autolabel_yolo.py data007 --model best.engine --batch 32 --conf 0.3 --from-name bb
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from review_yolo import IMG_EXTS, load_classes
+
+STATE_NAME = ".autolabel.jsonl"
+LS_JSON_NAME = "ls_predictions.json"
+
+
+def find_images(images_dir: Path) -> List[Path]:
+    out = []
+    for dirpath, dirnames, files in os.walk(images_dir):
+        dirnames[:] = [d for d in dirnames if d != "labels" and not d.startswith(".")]
+        for fn in files:
+            if os.path.splitext(fn)[1].lower() in IMG_EXTS:
+                out.append(Path(dirpath) / fn)
+    return sorted(out)
+
+
+def iter_batches(paths: List[Path], batch: int, workers: int, flags: int = cv2.IMREAD_COLOR):
+    """Yield (paths, images) per batch; a thread pool decodes a few batches ahead of the consumer."""
+    batches = [paths[i:i + batch] for i in range(0, len(paths), batch)]
+    ahead = max(2, workers // max(1, batch) + 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for b in batches[:ahead]:
+            pending.append((b, [pool.submit(cv2.imread, str(p), flags) for p in b]))
+        for bi in range(len(batches)):
+            paths_b, futures = pending.popleft()
+            if bi + ahead < len(batches):
+                nb = batches[bi + ahead]
+                pending.append((nb, [pool.submit(cv2.imread, str(p), flags) for p in nb]))
+            yield paths_b, [f.result() for f in futures]
+
+
+def load_state(path: Path) -> Dict[str, dict]:
+    records = {}
+    if path.exists():
+        for ln in path.read_text().splitlines():
+            try:
+                rec = json.loads(ln)
+            except json.JSONDecodeError:
+                continue  # partial line from an interrupted write
+            records[rec["rel"]] = rec
+    return records
+
+
+def ls_task(rec: dict, names: Dict[int, str], prefix: str, from_name: str, to_name: str,
+            model_version: str) -> dict:
+    """One Label Studio task with a prediction (coordinates in percent of the image)."""
+    W, H = rec["wh"]
+    result = []
+    for c, cx, cy, w, h, s in rec["boxes"]:
+        result.append({
+            "from_name": from_name,
+            "to_name": to_name,
+            "type": "rectanglelabels",
+            "original_width": W,
+            "original_height": H,
+            "image_rotation": 0,
+            "value": {
+                "x": (cx - w / 2) * 100.0,
+                "y": (cy - h / 2) * 100.0,
+                "width": w * 100.0,
+                "height": h * 100.0,
+                "rotation": 0,
+                "rectanglelabels": [names.get(int(c), str(int(c)))],
+            },
+            "score": s,
+        })
+    scores = [b[5] for b in rec["boxes"]]
+    return {
+        "data": {"image": f"/data/local-files/?d={prefix}/{rec['rel']}"},
+        "predictions": [{
+            "model_version": model_version,
+            "score": float(np.mean(scores)) if scores else 0.0,
+            "result": result,
+        }],
+    }
+
+
+def result_array(r) -> np.ndarray:
+    """(N, 6) float64 [cls, cx, cy, w, h, conf] from one Ultralytics result."""
+    b = r.boxes
+    if not len(b):
+        return np.zeros((0, 6))
+    return np.column_stack([b.cls.cpu().numpy(), b.xywhn.cpu().numpy(), b.conf.cpu().numpy()]).astype(np.float64)
+
+
+def load_model(model_path: str):
+    try:
+        from ultralytics import YOLO
+    except Exception as e:
+        raise RuntimeError(f"This tool needs ultralytics (pip install ultralytics).\nImport error: {e}")
+    return YOLO(model_path, task="detect")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pre-label a capture folder with a YOLO model")
+    parser.add_argument("folder", help="Capture folder (flat images) or dataset root with images/")
+    parser.add_argument("--model", required=True, help="Ultralytics model (.pt / .onnx / .engine)")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--batch", type=int, default=16, help="Images per inference call")
+    parser.add_argument("--conf", type=float, default=0.25, help="Keep predictions at or above this confidence")
+    parser.add_argument("--workers", type=int, default=8, help="Decode threads")
+    parser.add_argument("--labels", default=None, help="Label folder (default: <folder>/labels)")
+    parser.add_argument("--out-json", default=None, help=f"Label Studio JSON (default: <folder>/{LS_JSON_NAME})")
+    parser.add_argument("--ls-prefix", default=None,
+                        help="Path under the Label Studio /data root (default: upload/<folder name>)")
+    parser.add_argument("--from-name", default="bb", help="RectangleLabels name in the labeling config")
+    parser.add_argument("--to-name", default="image", help="Image name in the labeling config")
+    parser.add_argument("--force", action="store_true", help="Relabel images that were already processed")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    root = Path(args.folder).expanduser().resolve()
+    images_dir = root / "images" if (root / "images").is_dir() else root
+    if not images_dir.is_dir():
+        print(f"ERROR: folder not found: {root}", file=sys.stderr)
+        return 2
+    labels_dir = Path(args.labels).expanduser().resolve() if args.labels else root / "labels"
+    out_json = Path(args.out_json) if args.out_json else root / LS_JSON_NAME
+    prefix = (args.ls_prefix or f"upload/{root.name}").strip("/")
+    state_path = labels_dir / STATE_NAME
+
+    images = find_images(images_dir)
+    if not images:
+        print(f"ERROR: no images found under: {images_dir}", file=sys.stderr)
+        return 2
+    labels_dir.mkdir(parents=True, exist_ok=True)
+    if args.force and state_path.exists():
+        state_path.unlink()
+    records = load_state(state_path)
+
+    def label_path(rel: str) -> Path:
+        return labels_dir / Path(rel).with_suffix(".txt")
+
+    todo = [p for p in images
+            if (rel := p.relative_to(images_dir).as_posix()) not in records or not label_path(rel).exists()]
+    print(f"[autolabel_yolo] {len(images)} images, {len(images) - len(todo)} already labeled, {len(todo)} to go")
+
+    model = load_model(args.model) if todo else None
+    names = {int(k): v for k, v in model.names.items()} if model is not None else {}
+    if not names:
+        classes = load_classes(root) or []
+        names = dict(enumerate(classes))
+
+    t0 = time.perf_counter()
+    done = 0
+    with state_path.open("a") as state:
+        for paths, imgs in iter_batches(todo, args.batch, args.workers):
+            ok = [(p, im) for p, im in zip(paths, imgs) if im is not None]
+            for p, im in zip(paths, imgs):
+                if im is None:
+                    print(f"[autolabel_yolo] WARNING: could not read {p}")
+            if not ok:
+                continue
+
+            results = model.predict([im for _, im in ok], imgsz=args.imgsz, conf=args.conf,
+                                    device=args.device, verbose=False)
+            lines = []
+            for (p, im), r in zip(ok, results):
+                rel = p.relative_to(images_dir).as_posix()
+                arr = result_array(r)
+                dst = label_path(rel)
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                dst.write_text("".join(f"{int(c)} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n" for c, x, y, w, h, _ in arr))
+                rec = {"rel": rel, "wh": [im.shape[1], im.shape[0]],
+                       "boxes": [[int(c), round(x, 6), round(y, 6), round(w, 6), round(h, 6), round(s, 4)]
+                                 for c, x, y, w, h, s in arr.tolist()]}
+                records[rel] = rec
+                lines.append(json.dumps(rec) + "\n")
+            # Labels first, then the state line: a crash never records an image without its label
+            state.write("".join(lines))
+            state.flush()
+
+            done += len(ok)
+            dt = time.perf_counter() - t0
+            print(f"[autolabel_yolo] {done}/{len(todo)} | {done / max(dt, 1e-9):.1f} img/s", end="\r")
+    if todo:
+        print()
+
+    model_version = Path(args.model).stem
+    tasks = [ls_task(records[p.relative_to(images_dir).as_posix()], names, prefix,
+                     args.from_name, args.to_name, model_version)
+             for p in images if p.relative_to(images_dir).as_posix() in records]
+    out_json.write_text(json.dumps(tasks, indent=1) + "\n")
+    if names and not (root / "classes.txt").exists():
+        (root / "classes.txt").write_text("".join(f"{names[k]}\n" for k in sorted(names)))
+
+    n_boxes = sum(len(t["predictions"][0]["result"]) for t in tasks)
+    print(f"[autolabel_yolo] Labels in {labels_dir} | {len(tasks)} tasks, {n_boxes} boxes -> {out_json} "
+          f"| {time.perf_counter() - t0:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
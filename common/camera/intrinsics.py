@@ -0,0 +1,297 @@
+"""
+intrinsics.py
+
+Camera intrinsics for the runtime (cue projection, overlays, pixel <-> angle).
+
+K, distortion, calibrated image size and model are loaded once from the
+calibration output. Undistortion is point-level by default:
+
+  undistort_points / undistort_boxes   detections and box corners only
+                                       (cv2.undistortPoints, ~microseconds)
+  pixel_to_ray / project               pixel <-> camera-frame bearing
+
+Images are rectified only when asked to, through remap tables that are built
+once and cached per (resolution, ROI):
+
+  undistort_image(img)                 full frame
+  undistort_image(img, roi=(x,y,w,h))  only the ROI of the rectified image; the
+                                       ROI is snapped outward to ROI_ALIGN px so
+                                       a moving box keeps hitting the cache
+
+Rectified images keep the camera matrix K (scaled to the frame resolution),
+so undistort_points() output and rectified pixels share coordinates.
+
+Models: "pinhole" (OpenCV radial/tangential, 4-14 coefficients; also ROS
+"plumb_bob"/"rational_polynomial") and "fisheye" (OpenCV equidistant, k1..k4;
+ROS "equidistant").
+
+Calibration files:
+  .json                    {"K": 3x3, "dist": [...], "size": [w, h], "model": "pinhole"}   (save_json)
+  .yaml/.yml (OpenCV)      camera_matrix, distortion_coefficients, image_width, image_height
+  .yaml/.yml (ROS)         camera_matrix.data, distortion_coefficients.data, distortion_model
+                           (needs PyYAML)
+
+Usage:
+  intr = CameraIntrinsics.load("blackfly.yaml")
+  pts_u = intr.undistort_points(centers)            # (N, 2) px
+  boxes_u = intr.undistort_boxes(xyxy)              # (N, 4) px, enclosing corners
+  crop, roi = intr.undistort_image(frame, roi=(800, 400, 256, 256))
+
+  python3 intrinsics.py --calib blackfly.yaml --out blackfly.json   # standardize
+  python3 intrinsics.py --bench                                     # 1080p timings
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+ROI_ALIGN = 32       # px; ROI remap tables are cached on this grid
+CACHE_SIZE = 16      # remap tables kept (LRU)
+
+_MODEL_ALIASES = {"pinhole": "pinhole", "plumb_bob": "pinhole", "rational_polynomial": "pinhole",
+                  "radtan": "pinhole", "fisheye": "fisheye", "equidistant": "fisheye"}
+
+
+class CameraIntrinsics:
+    def __init__(self, K, dist=(0, 0, 0, 0, 0), size: Optional[Tuple[int, int]] = None, model: str = "pinhole"):
+        self.K = np.asarray(K, dtype=np.float64).reshape(3, 3)
+        self.model = _MODEL_ALIASES[model]
+        d = np.asarray(dist, dtype=np.float64).ravel()
+        if self.model == "fisheye":
+            self.dist = np.zeros(4)
+            self.dist[:min(len(d), 4)] = d[:4]
+        else:
+            n = 5 if len(d) <= 5 else (8 if len(d) <= 8 else (12 if len(d) <= 12 else 14))
+            self.dist = np.zeros(n)
+            self.dist[:len(d)] = d
+        self.size = tuple(int(s) for s in size) if size is not None else None   # (width, height)
+        self._maps: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    # ------------------------------------------------------------
+    # Loading / saving
+    # ------------------------------------------------------------
+
+    @classmethod
+    def load(cls, path) -> "CameraIntrinsics":
+        path = Path(path)
+        text = path.read_text()
+        if path.suffix.lower() == ".json":
+            d = json.loads(text)
+            return cls(d["K"], d.get("dist", ()), d.get("size"), d.get("model", "pinhole"))
+
+        if text.lstrip().startswith("%YAML"):
+            fs = cv2.FileStorage(str(path), cv2.FILE_STORAGE_READ)
+            K = fs.getNode("camera_matrix").mat()
+            dist = fs.getNode("distortion_coefficients").mat()
+            w, h = int(fs.getNode("image_width").real()), int(fs.getNode("image_height").real())
+            model = fs.getNode("distortion_model").string() or "pinhole"
+            fs.release()
+            if K is None:
+                raise ValueError(f"No camera_matrix in {path}")
+            return cls(K, dist if dist is not None else (), (w, h) if w and h else None, model)
+
+        try:
+            import yaml
+        except Exception as e:
+            raise RuntimeError(f"Reading ROS camera_info YAML needs PyYAML (pip install pyyaml).\nImport error: {e}")
+        d = yaml.safe_load(text)
+        size = (d["image_width"], d["image_height"]) if "image_width" in d else None
+        return cls(d["camera_matrix"]["data"], d["distortion_coefficients"]["data"], size,
+                   d.get("distortion_model", "pinhole"))
+
+    def save_json(self, path):
+        Path(path).write_text(json.dumps({
+            "K": self.K.tolist(), "dist": self.dist.tolist(),
+            "size": list(self.size) if self.size else None, "model": self.model,
+        }, indent=1) + "\n")
+
+    def scaled(self, size: Tuple[int, int]) -> "CameraIntrinsics":
+        """Intrinsics for the same sensor at another resolution (same aspect / binning)."""
+        if self.size is None or tuple(size) == self.size:
+            return self if self.size else CameraIntrinsics(self.K, self.dist, size, self.model)
+        sx, sy = size[0] / self.size[0], size[1] / self.size[1]
+        K = self.K.copy()
+        K[0] *= sx
+        K[1] *= sy
+        return CameraIntrinsics(K, self.dist, size, self.model)
+
+    # ------------------------------------------------------------
+    # Point-level
+    # ------------------------------------------------------------
+
+    def undistort_points(self, pts, normalized: bool = False) -> np.ndarray:
+        """(N, 2) distorted pixels -> undistorted pixels (same K), or normalized coordinates."""
+        pts = np.asarray(pts, dtype=np.float64).reshape(-1, 1, 2)
+        if not len(pts):
+            return np.zeros((0, 2))
+        P = None if normalized else self.K
+        if self.model == "fisheye":
+            out = cv2.fisheye.undistortPoints(pts, self.K, self.dist, P=P)
+        else:
+            out = cv2.undistortPoints(pts, self.K, self.dist, P=P)
+        return out.reshape(-1, 2)
+
+    def undistort_boxes(self, xyxy) -> np.ndarray:
+        """(N, 4) x1,y1,x2,y2 distorted -> axis-aligned box enclosing the undistorted corners."""
+        b = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+        corners = np.stack([b[:, [0, 1]], b[:, [2, 1]], b[:, [2, 3]], b[:, [0, 3]]], axis=1)
+        u = self.undistort_points(corners.reshape(-1, 2)).reshape(-1, 4, 2)
+        return np.concatenate([u.min(axis=1), u.max(axis=1)], axis=1)
+
+    def distort_normalized(self, xn) -> np.ndarray:
+        """(..., 2) normalized undistorted -> distorted pixels."""
+        xn = np.asarray(xn, dtype=np.float64)
+        shape = xn.shape
+        pts = np.concatenate([xn.reshape(-1, 2), np.ones((xn.size // 2, 1))], axis=1).reshape(-1, 1, 3)
+        if not len(pts):
+            return np.zeros(shape)
+        if self.model == "fisheye":
+            uv = cv2.fisheye.distortPoints(pts[:, :, :2], self.K, self.dist)
+        else:
+            uv, _ = cv2.projectPoints(pts, np.zeros(3), np.zeros(3), self.K, self.dist)
+        return uv.reshape(shape)
+
+    def project(self, p_c) -> Tuple[np.ndarray, np.ndarray]:
+        """(..., 3) camera-frame points (z optical) -> (uv (..., 2) distorted pixels, in_front (...))."""
+        p_c = np.asarray(p_c, dtype=np.float64)
+        z = p_c[..., 2]
+        in_front = z > 1e-9
+        xn = p_c[..., :2] / np.where(in_front, z, 1.0)[..., None]
+        return self.distort_normalized(xn), in_front
+
+    def pixel_to_ray(self, pts) -> np.ndarray:
+        """(N, 2) distorted pixels -> (N, 3) unit bearing vectors in the camera frame."""
+        xn = self.undistort_points(pts, normalized=True)
+        r = np.concatenate([xn, np.ones((len(xn), 1))], axis=1)
+        return r / np.linalg.norm(r, axis=1, keepdims=True)
+
+    # ------------------------------------------------------------
+    # Image-level (cached remap tables)
+    # ------------------------------------------------------------
+
+    def _snap_roi(self, roi, size):
+        x, y, w, h = roi
+        W, H = size
+        x0, y0 = max(0, (int(x) // ROI_ALIGN) * ROI_ALIGN), max(0, (int(y) // ROI_ALIGN) * ROI_ALIGN)
+        x1 = min(W, -(-int(x + w) // ROI_ALIGN) * ROI_ALIGN)
+        y1 = min(H, -(-int(y + h) // ROI_ALIGN) * ROI_ALIGN)
+        return x0, y0, max(1, x1 - x0), max(1, y1 - y0)
+
+    def remap_tables(self, size: Tuple[int, int], roi: Optional[Sequence[int]] = None):
+        """Cached fixed-point (map1, map2) for cv2.remap: rectified pixels (or an ROI of them) <- raw frame."""
+        key = (tuple(size), tuple(roi) if roi is not None else None)
+        maps = self._maps.get(key)
+        if maps is not None:
+            self._maps.move_to_end(key)
+            return maps
+
+        intr = self.scaled(size)
+        K_out = intr.K.copy()
+        out_size = tuple(size)
+        if roi is not None:
+            # Shifting the principal point makes OpenCV build the table for the ROI only
+            x, y, w, h = roi
+            K_out[0, 2] -= x
+            K_out[1, 2] -= y
+            out_size = (w, h)
+        if self.model == "fisheye":
+            maps = cv2.fisheye.initUndistortRectifyMap(intr.K, intr.dist, np.eye(3), K_out, out_size, cv2.CV_16SC2)
+        else:
+            maps = cv2.initUndistortRectifyMap(intr.K, intr.dist, None, K_out, out_size, cv2.CV_16SC2)
+        self._maps[key] = maps
+        if len(self._maps) > CACHE_SIZE:
+            self._maps.popitem(last=False)
+        return maps
+
+    def undistort_image(self, img: np.ndarray, roi: Optional[Sequence[int]] = None,
+                        interpolation: int = cv2.INTER_LINEAR):
+        """
+        Rectify the full frame, or only roi=(x, y, w, h) of the rectified frame.
+        Returns the image, or (crop, snapped roi) when roi is given.
+        """
+        size = (img.shape[1], img.shape[0])
+        if roi is None:
+            m1, m2 = self.remap_tables(size)
+            return cv2.remap(img, m1, m2, interpolation)
+        roi = self._snap_roi(roi, size)
+        m1, m2 = self.remap_tables(size, roi)
+        return cv2.remap(img, m1, m2, interpolation), roi
+
+
+def _bench(intr: CameraIntrinsics, size: Tuple[int, int], reps: int = 20):
+    rng = np.random.default_rng(0)
+    W, H = size
+    img = rng.integers(0, 255, (H, W, 3), dtype=np.uint8)
+    intr = intr.scaled(size)
+
+    def timed(fn):
+        fn()
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            fn()
+        return (time.perf_counter() - t0) / reps * 1e3
+
+    def uncached():
+        if intr.model == "fisheye":
+            cv2.fisheye.undistortImage(img, intr.K, intr.dist, Knew=intr.K)
+        else:
+            cv2.undistort(img, intr.K, intr.dist)
+
+    boxes = np.column_stack([rng.uniform(0, W - 100, 50), rng.uniform(0, H - 100, 50)])
+    boxes = np.column_stack([boxes, boxes + 80])
+    print(f"[intrinsics] {W}x{H} {intr.model}, mean of {reps}")
+    def build():
+        intr._maps.clear()
+        intr.remap_tables(size)
+
+    print(f"[intrinsics]   cv2.undistort (tables rebuilt) : {timed(uncached):7.2f} ms")
+    print(f"[intrinsics]   remap table build (cached once): {timed(build):7.2f} ms")
+    print(f"[intrinsics]   cached full-frame remap        : {timed(lambda: intr.undistort_image(img)):7.2f} ms")
+    print(f"[intrinsics]   cached 256x256 ROI remap       : "
+          f"{timed(lambda: intr.undistort_image(img, roi=(W // 2, H // 2, 256, 256))):7.2f} ms")
+    print(f"[intrinsics]   50 boxes (200 corners)         : {timed(lambda: intr.undistort_boxes(boxes)):7.3f} ms")
+
+    # Consistency: undistorted points land where the rectified image puts them
+    pts = np.array([[W * 0.1, H * 0.1], [W * 0.9, H * 0.8]])
+    xn = intr.undistort_points(pts, normalized=True)
+    err = np.abs(intr.distort_normalized(xn) - pts).max()
+    print(f"[intrinsics]   distort(undistort(p)) round trip: {err:.2e} px")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load, standardize and benchmark camera intrinsics")
+    parser.add_argument("--calib", default=None, help="Calibration file (.json / OpenCV or ROS .yaml)")
+    parser.add_argument("--out", default=None, help="Write standardized JSON here")
+    parser.add_argument("--bench", action="store_true", help="Time point vs image undistortion")
+    parser.add_argument("--size", type=int, nargs=2, default=None, metavar=("W", "H"),
+                        help="Benchmark resolution (default: calibrated size or 1920x1080)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.calib:
+        intr = CameraIntrinsics.load(args.calib)
+    else:
+        # Synthetic 1080p camera with moderate barrel distortion
+        intr = CameraIntrinsics([[1400, 0, 960], [0, 1400, 540], [0, 0, 1]],
+                                (-0.12, 0.05, 0.0005, -0.0003, 0.0), (1920, 1080))
+    print(f"[intrinsics] model={intr.model} size={intr.size}\nK=\n{intr.K}\ndist={intr.dist}")
+    if args.out:
+        intr.save_json(args.out)
+        print(f"[intrinsics] Wrote {args.out}")
+    if args.bench:
+        _bench(intr, tuple(args.size or intr.size or (1920, 1080)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,200 @@
+"""
+sim_thermal.py
+
+Synthetic (or recorded) 16-bit thermal frames through ThermalAGC (thermal.py).
+
+Synthetic scene, Boson-like 640x512 Y16 counts:
+  background   ~22000 counts, vertical sky/ground gradient + smooth texture
+  targets      a few warm vehicles (+1500..3500 counts) moving across
+  hot spot     an engine/glint at ~45000 counts enters halfway through
+  sensor       column fixed-pattern noise, 15-count temporal noise, ambient
+               drift of +2000 counts over the sequence
+
+Checks and reports:
+  sources      the sequence round-trips through .npy, raw .y16 and a 16-bit
+               PNG directory (iter_frames / ThermalCapture)
+  LUT          linear LUT output == float percentile stretch at the same
+               levels (+-1 LSB); levels vs np.percentile on all pixels
+  timing       ms/frame: float baseline (np.percentile + float stretch)
+               vs histogram + LUT (gray, BGR, plateau, + CLAHE)
+  stability    mean output level of the background before/after the hot spot
+               enters, and frame-to-frame flicker, with / without the EMA and
+               for a plain min/max stretch
+  detector     output dtype/shape and cv2.dnn.blobFromImage of the BGR frame
+
+Usage:
+  python3 sim_thermal.py
+  python3 sim_thermal.py --input flight.npy          # recorded frames instead
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from thermal import BOSON_SIZE, ThermalAGC, ThermalCapture, iter_frames
+
+W, H = BOSON_SIZE
+
+# ------------------------------------------------------------
+# Synthetic Y16 sequence
+# ------------------------------------------------------------
+
+def synthetic_frames(n, seed=0):
+    """(n, H, W) uint16 Boson-like counts and the (y0, y1, x0, x1) hot-spot box (enters at n // 2)."""
+    rng = np.random.default_rng(seed)
+    yy = np.linspace(0, 1, H)[:, None]
+    texture = cv2.GaussianBlur(rng.normal(0, 1, (H, W)).astype(np.float32), (0, 0), 6)
+    base = 21000 + 1200 * yy + 2500 * texture / texture.std()
+    fpn = rng.normal(0, 25, (1, W))                         # column fixed-pattern noise
+    cars = [(rng.uniform(0, W), rng.uniform(200, 450), rng.uniform(-3, 3), rng.uniform(1500, 3500))
+            for _ in range(4)]
+    hot = (H // 2 - 12, H // 2 + 12, W // 2 - 16, W // 2 + 16)
+    out = np.empty((n, H, W), np.uint16)
+    for i in range(n):
+        f = base + fpn + 2000.0 * i / n + rng.normal(0, 15, (H, W))
+        for x, y, vx, dT in cars:
+            x = int((x + vx * i) % (W - 40))
+            f[int(y):int(y) + 20, x:x + 40] += dT
+        if i >= n // 2:
+            f[hot[0]:hot[1], hot[2]:hot[3]] = 45000
+        out[i] = np.clip(f, 0, 65535)
+    return out, hot
+
+
+def float_agc(frame, lo_q=1.0, hi_q=99.0):
+    """Per-pixel float baseline: percentiles of the full frame, float stretch, BGR."""
+    lo, hi = np.percentile(frame, [lo_q, hi_q])
+    g = np.clip((frame.astype(np.float32) - lo) * (255.0 / max(hi - lo, 1)), 0, 255).astype(np.uint8)
+    return cv2.cvtColor(g, cv2.COLOR_GRAY2BGR)
+
+
+def time_per_frame(fn, frames, reps=1):
+    fn(frames[0])
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        for f in frames:
+            fn(f)
+    return 1e3 * (time.perf_counter() - t0) / (reps * len(frames))
+
+# ------------------------------------------------------------
+# Main
+# ------------------------------------------------------------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ThermalAGC on synthetic or recorded 16-bit frames")
+    parser.add_argument("--input", default=None, help="Recorded frames (dir, .npy or raw Y16); default synthetic")
+    parser.add_argument("--size", type=int, nargs=2, default=list(BOSON_SIZE), metavar=("W", "H"))
+    parser.add_argument("--frames", type=int, default=200)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    hot = None
+    if args.input:
+        frames = np.stack([f for _, f in zip(range(args.frames), iter_frames(args.input, tuple(args.size)))])
+        print(f"[sim_thermal] {len(frames)} recorded frames {frames.shape[2]}x{frames.shape[1]} from {args.input}")
+    else:
+        frames, hot = synthetic_frames(args.frames)
+        print(f"[sim_thermal] {len(frames)} synthetic Y16 frames {W}x{H}, "
+              f"counts {frames.min()}..{frames.max()}")
+
+        # Sources: .npy, raw .y16 and a PNG directory all read back bit-exact
+        tmp = Path(tempfile.mkdtemp(prefix="thermal_"))
+        np.save(tmp / "seq.npy", frames[:10])
+        frames[:10].astype("<u2").tofile(tmp / "seq.y16")
+        (tmp / "png").mkdir()
+        for i, f in enumerate(frames[:10]):
+            cv2.imwrite(str(tmp / "png" / f"{i:04d}.png"), f)
+        for src in ("seq.npy", "seq.y16", "png"):
+            back = np.stack(list(iter_frames(tmp / src)))
+            assert np.array_equal(back, frames[:10]), src
+        cap = ThermalCapture(tmp / "seq.y16")
+        ok, img = cap.read()
+        assert ok and img.shape == (H, W, 3) and np.array_equal(cap.raw, frames[0])
+        cap.release()
+        shutil.rmtree(tmp)
+        print("sources: .npy, raw .y16, 16-bit PNG dir and ThermalCapture read back bit-exact")
+
+    # ------------------------------------------------------------
+    # LUT == float stretch at the same levels
+    # ------------------------------------------------------------
+
+    f0 = frames[0]
+    agc = ThermalAGC(row_stride=1, ema=1.0, bgr=False)
+    g = agc(f0)
+    lo, hi = agc.levels
+    ref = np.clip((f0.astype(np.float64) - lo) * (255.0 / (hi - lo)), 0, 255)
+    d = np.abs(g.astype(np.float64) - ref)
+    p_lo, p_hi = np.percentile(f0, [1, 99])
+    assert d.max() <= 1.0, d.max()
+    print(f"\n=== LUT ===\nmax |LUT - float stretch| = {d.max():.2f} LSB; "
+          f"levels {lo:.0f}/{hi:.0f} vs np.percentile {p_lo:.0f}/{p_hi:.0f} counts")
+
+    # ------------------------------------------------------------
+    # Timing
+    # ------------------------------------------------------------
+
+    sub = frames[: min(len(frames), 100)]
+    rows = [
+        ("float baseline (np.percentile + stretch)", float_agc),
+        ("LUT linear, gray", ThermalAGC(bgr=False)),
+        ("LUT linear, BGR", ThermalAGC()),
+        ("LUT plateau, BGR", ThermalAGC(mode="plateau")),
+        ("LUT linear + CLAHE 2.0, BGR", ThermalAGC(clahe=2.0)),
+        ("LUT linear, full histogram (row_stride=1)", ThermalAGC(row_stride=1)),
+    ]
+    print(f"\n=== TIMING (ms/frame, {W}x{H}) ===")
+    base = None
+    for name, fn in rows:
+        ms = time_per_frame(fn, sub)
+        base = base or ms
+        print(f"{name:44s} {ms:7.2f}  x{base / ms:5.1f}")
+    agc = ThermalAGC()
+    hist_ms = time_per_frame(agc.update_histogram, sub)
+    lut_ms = time_per_frame(lambda f: agc.update_lut(), sub)
+    apply_ms = time_per_frame(agc.apply, sub)
+    print(f"  breakdown (linear, BGR): histogram {hist_ms:.2f}, levels+LUT {lut_ms:.2f}, apply {apply_ms:.2f}")
+
+    # ------------------------------------------------------------
+    # Stability
+    # ------------------------------------------------------------
+
+    def minmax(f):
+        lo, hi = float(f.min()), float(f.max())
+        return ((f.astype(np.float32) - lo) * (255.0 / max(hi - lo, 1))).astype(np.uint8)
+
+    print("\n=== STABILITY ===")
+    for name, agc in (("EMA 0.2", ThermalAGC(bgr=False)), ("no EMA", ThermalAGC(ema=1.0, bgr=False)),
+                      ("min/max", minmax)):
+        out = np.stack([agc(f) for f in frames])
+        mean = out.reshape(len(out), -1).mean(axis=1)
+        flicker = np.abs(np.diff(mean)).mean()
+        line = f"{name:8s} frame-to-frame mean-level change {flicker:.3f} LSB"
+        if hot is not None:
+            mask = np.ones((H, W), bool)
+            mask[hot[0]:hot[1], hot[2]:hot[3]] = False
+            k = len(frames) // 2
+            bg_before = out[k - 5:k, mask].mean()
+            bg_after = out[k + 20:k + 25, mask].mean()
+            line += f"; background level {bg_before:.1f} -> {bg_after:.1f} after the hot spot enters"
+        print(line)
+
+    # ------------------------------------------------------------
+    # Detector-ready output
+    # ------------------------------------------------------------
+
+    bgr = ThermalAGC(mode="plateau")(frames[-1])
+    blob = cv2.dnn.blobFromImage(bgr, scalefactor=1 / 255, size=(640, 640), swapRB=True)
+    assert bgr.dtype == np.uint8 and bgr.shape == frames[-1].shape + (3,)
+    print(f"\n=== DETECTOR INPUT ===\n{bgr.dtype} {bgr.shape} -> blob {blob.shape}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
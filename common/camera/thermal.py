@@ -0,0 +1,266 @@
+"""
+thermal.py
+
+16-bit thermal (Boson Y16 / radiometric) ingestion and AGC to the 8-bit BGR
+frames the detector and the rest of the pipeline expect.
+
+Per frame, without per-pixel float math:
+
+  histogram   65536-bin histogram of a rotating 1/k subset of rows
+              (rows i % k), kept as a sliding sum over the last k frames:
+              hist += new - oldest, so each frame bins only H/k rows
+  levels      lo/hi at the lo/hi percentiles of the cumulative
+              histogram, smoothed with an EMA (no flicker when hot objects
+              enter or the ambient level drifts)
+  LUT         65536-entry uint8 table:
+                "linear"   percentile stretch lo..hi -> 0..255, rebuilt only
+                           when the (rounded) levels change
+                "plateau"  plateau histogram equalization (Boson-style AGC):
+                           bins clipped at plateau * samples, cumulated
+                           between lo and hi, EMA-smoothed table; depends on
+                           the histogram, so rebuilt every frame
+  apply       np.take(lut, frame16) -> (H, W) uint8 (one gather per pixel),
+              optional CLAHE on the 8-bit result, GRAY2BGR for detectors
+
+Sources (ThermalCapture / iter_frames):
+  int                   V4L2 device, Y16 fourcc, CONVERT_RGB off (Boson USB)
+  dir/                  16-bit PNG/TIFF frames, sorted by name
+  file.npy              (N, H, W) uint16 stack (memory-mapped)
+  file.y16 / file.raw   headerless little-endian Y16, needs size=(w, h)
+
+Usage:
+  agc = ThermalAGC(mode="plateau")
+  bgr = agc(frame16)                                # (H, W, 3) uint8
+  cap = ThermalCapture(0, agc=agc)                  # drop-in for cv2.VideoCapture.read()
+  ok, bgr = cap.read(); raw = cap.raw               # raw: last uint16 frame (radiometry)
+
+  python3 thermal.py --input flight.npy --out agc_png/ --mode plateau
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+N_LEVELS = 1 << 16
+BOSON_SIZE = (640, 512)
+_IMAGE_EXT = {".png", ".tif", ".tiff"}
+
+
+class ThermalAGC:
+    def __init__(self, mode: str = "linear", lo: float = 0.01, hi: float = 0.99, row_stride: int = 4,
+                 ema: float = 0.2, plateau: float = 0.005, clahe: Optional[float] = None,
+                 clahe_tiles: int = 8, bgr: bool = True):
+        if mode not in ("linear", "plateau"):
+            raise ValueError(f"Unknown AGC mode {mode!r} (linear, plateau)")
+        self.mode = mode
+        self.lo_q, self.hi_q = lo, hi
+        self.row_stride = max(1, int(row_stride))
+        self.ema = ema
+        self.plateau = plateau
+        self.bgr = bgr
+        self._clahe = cv2.createCLAHE(clipLimit=clahe, tileGridSize=(clahe_tiles, clahe_tiles)) if clahe else None
+
+        self.hist = np.zeros(N_LEVELS, np.int64)
+        self._parts = [None] * self.row_stride      # per-phase partial histograms in the sliding sum
+        self._i = 0
+        self.levels = None                          # smoothed (lo, hi) in counts
+        self._lut_key = None
+        self._lut_f = None                          # plateau mode: smoothed float table
+        self.lut = np.zeros(N_LEVELS, np.uint8)
+
+    def reset(self):
+        self.hist[:] = 0
+        self._parts = [None] * self.row_stride
+        self._i = 0
+        self.levels = self._lut_key = self._lut_f = None
+
+    # ------------------------------------------------------------
+    # Histogram / levels / LUT
+    # ------------------------------------------------------------
+
+    def update_histogram(self, frame: np.ndarray):
+        """Bin rows (i % row_stride) of this frame into the sliding histogram."""
+        phase = self._i % self.row_stride
+        h = np.bincount(frame[phase::self.row_stride].ravel(), minlength=N_LEVELS)
+        old = self._parts[phase]
+        if old is not None:
+            self.hist -= old
+        self.hist += h
+        self._parts[phase] = h
+        self._i += 1
+
+    def _percentiles(self, cdf: np.ndarray) -> Tuple[float, float]:
+        n = cdf[-1]
+        lo = float(np.searchsorted(cdf, self.lo_q * n, side="right"))
+        hi = float(np.searchsorted(cdf, self.hi_q * n, side="left"))
+        return lo, max(hi, lo + 1.0)
+
+    def update_lut(self):
+        cdf = np.cumsum(self.hist)
+        lo, hi = self._percentiles(cdf)
+        if self.levels is None:
+            self.levels = (lo, hi)
+        else:
+            a = self.ema
+            self.levels = ((1 - a) * self.levels[0] + a * lo, (1 - a) * self.levels[1] + a * hi)
+        lo, hi = self.levels
+
+        if self.mode == "linear":
+            key = (int(round(lo)), int(round(hi)))
+            if key == self._lut_key:
+                return
+            self._lut_key = key
+            v = np.arange(N_LEVELS, dtype=np.float32)
+            np.clip((v - key[0]) * (255.0 / max(key[1] - key[0], 1)), 0, 255, out=v)
+            self.lut = (v + 0.5).astype(np.uint8)
+            return
+
+        # Plateau equalization between lo and hi
+        i0, i1 = int(lo), int(np.ceil(hi)) + 1
+        h = np.minimum(self.hist[i0:i1], max(1, int(self.plateau * cdf[-1]))).astype(np.float32)
+        c = np.cumsum(h)
+        lut = np.empty(N_LEVELS, np.float32)
+        lut[:i0] = 0.0
+        lut[i0:i1] = 255.0 * c / max(c[-1], 1.0)
+        lut[i1:] = 255.0
+        if self._lut_f is None:
+            self._lut_f = lut
+        else:
+            self._lut_f += self.ema * (lut - self._lut_f)
+        self.lut = (self._lut_f + 0.5).astype(np.uint8)
+
+    # ------------------------------------------------------------
+    # Apply
+    # ------------------------------------------------------------
+
+    def apply(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Current LUT applied to a uint16 frame -> (H, W) uint8 (or (H, W, 3) if bgr)."""
+        g = np.take(self.lut, frame, out=out)
+        if self._clahe is not None:
+            g = self._clahe.apply(g)
+        return cv2.cvtColor(g, cv2.COLOR_GRAY2BGR) if self.bgr else g
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        frame = as_y16(frame)
+        self.update_histogram(frame)
+        self.update_lut()
+        return self.apply(frame)
+
+
+def as_y16(frame: np.ndarray, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+    """uint16 (H, W) view of a Y16 frame; accepts raw uint8 buffers as returned by V4L2 with CONVERT_RGB off."""
+    if frame.dtype == np.uint16 and frame.ndim == 2:
+        return frame
+    if frame.dtype == np.uint8:
+        w, h = size or BOSON_SIZE
+        return np.ascontiguousarray(frame).reshape(-1).view("<u2").reshape(h, w)
+    raise ValueError(f"Expected a 16-bit thermal frame, got {frame.dtype} {frame.shape}")
+
+# ------------------------------------------------------------
+# Sources
+# ------------------------------------------------------------
+
+def iter_frames(source: Union[str, Path], size: Tuple[int, int] = BOSON_SIZE) -> Iterator[np.ndarray]:
+    """Yields (H, W) uint16 frames from a frame directory, .npy stack or raw Y16 file."""
+    p = Path(source)
+    if p.is_dir():
+        for f in sorted(q for q in p.iterdir() if q.suffix.lower() in _IMAGE_EXT):
+            img = cv2.imread(str(f), cv2.IMREAD_UNCHANGED)
+            if img is None or img.dtype != np.uint16:
+                raise ValueError(f"{f}: not a 16-bit single-channel image")
+            yield img
+    elif p.suffix == ".npy":
+        yield from np.load(p, mmap_mode="r")
+    else:
+        w, h = size
+        yield from np.memmap(p, dtype="<u2", mode="r").reshape(-1, h, w)
+
+
+class ThermalCapture:
+    """cv2.VideoCapture-like reader that returns AGC'd 8-bit frames; .raw keeps the last 16-bit frame."""
+
+    def __init__(self, source: Union[int, str, Path], agc: Optional[ThermalAGC] = None,
+                 size: Tuple[int, int] = BOSON_SIZE):
+        self.agc = agc if agc is not None else ThermalAGC()
+        self.size = size
+        self.raw = None
+        self._cap = None
+        self._it = None
+        if isinstance(source, int):
+            self._cap = cv2.VideoCapture(source, cv2.CAP_V4L2)
+            if not self._cap.isOpened():
+                raise RuntimeError(f"Could not open thermal camera index {source}")
+            self._cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"Y16 "))
+            self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+            self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+            self._cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        else:
+            self._it = iter_frames(source, size)
+
+    def isOpened(self) -> bool:
+        return self._cap.isOpened() if self._cap is not None else self._it is not None
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if self._cap is not None:
+            ok, frame = self._cap.read()
+            if not ok:
+                return False, None
+            frame = as_y16(frame, self.size)
+        else:
+            frame = next(self._it, None)
+            if frame is None:
+                return False, None
+        self.raw = frame
+        return True, self.agc(frame)
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+        self._it = None
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="16-bit thermal frames -> 8-bit AGC frames")
+    parser.add_argument("--input", required=True, help="Frame dir, .npy stack, raw Y16 file or V4L2 index")
+    parser.add_argument("--size", type=int, nargs=2, default=list(BOSON_SIZE), metavar=("W", "H"))
+    parser.add_argument("--mode", choices=["linear", "plateau"], default="linear")
+    parser.add_argument("--clahe", type=float, default=None, help="CLAHE clip limit on the 8-bit output")
+    parser.add_argument("--out", default=None, help="Write AGC frames as PNG into this folder")
+    parser.add_argument("--max-frames", type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    source = int(args.input) if args.input.isdigit() else args.input
+    cap = ThermalCapture(source, ThermalAGC(mode=args.mode, clahe=args.clahe), size=tuple(args.size))
+    out = Path(args.out) if args.out else None
+    if out:
+        out.mkdir(parents=True, exist_ok=True)
+    n, t = 0, 0.0
+    while not args.max_frames or n < args.max_frames:
+        t0 = time.perf_counter()
+        ok, img = cap.read()
+        t += time.perf_counter() - t0
+        if not ok:
+            break
+        if out:
+            cv2.imwrite(str(out / f"{n:06d}.png"), img)
+        n += 1
+    cap.release()
+    levels = "/".join(f"{v:.0f}" for v in cap.agc.levels) if cap.agc.levels else "-"
+    print(f"[thermal] {n} frames, {1e3 * t / max(n, 1):.2f} ms/frame (read + AGC), levels {levels} counts")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Persistent, incremental index of a YOLO dataset.
+
+Stores, per image: relative path, width/height, image mtime/size, matching label
+file and its mtime, and all boxes. The index is a single SQLite file in the
+dataset root (.dataset_index.sqlite), or in ~/.cache/embedded-vision/ when the
+root is read-only (shared or mounted datasets; dataset_file() places the other
+tools' side files the same way); boxes are stored per image as float32 blobs
+and returned as one flat (M, 5) array with per-image offsets.
+
+update() only stats the tree: images whose mtime/size changed are re-measured,
+labels whose mtime changed are re-parsed, and deleted files are dropped, so a
+re-run on an unchanged 50k-image dataset costs one directory walk.
+
+Expected dataset structure (same as review_yolo.py):
+  <dataset>/
+    images/...
+    labels/...      mirrors images/ (a flat labels/<stem>.txt is also accepted
+                    when no other image has that file name)
+    classes.txt     (optional)
+
+Usage:
+  python3 dataset_index.py /path/to/dataset          # build / refresh, print summary
+
+  from dataset_index import open_index
+  idx = open_index(dataset_root)                     # refreshes by default
+  a = idx.arrays()
+  boxes_i = a["boxes"][a["offsets"][i]:a["offsets"][i + 1]]   # [cls, cx, cy, w, h]
+
+Image sizes are read from the file header (JPEG/PNG/BMP) without decoding;
+other formats fall back to cv2.imread. Sizes are as displayed (EXIF orientation
+applied, like cv2.imread and Ultralytics), so they match the labels.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import struct
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"}
+INDEX_NAME = ".dataset_index.sqlite"
+SCHEMA_VERSION = "2"  # 2: JPEG sizes follow EXIF orientation
+
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+# ============================================================
+# File readers
+# ============================================================
+
+def _exif_orientation(app1: bytes) -> int:
+    """EXIF Orientation tag (1..8) from an APP1 segment body; 1 if absent."""
+    if app1[:6] != b"Exif\0\0":
+        return 1
+    tiff = app1[6:]
+    bo = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if bo is None:
+        return 1
+    try:
+        ifd = struct.unpack(bo + "I", tiff[4:8])[0]
+        n = struct.unpack(bo + "H", tiff[ifd:ifd + 2])[0]
+        for k in range(n):
+            e = ifd + 2 + 12 * k
+            tag, typ = struct.unpack(bo + "HH", tiff[e:e + 4])
+            if tag == 0x0112 and typ == 3:
+                return struct.unpack(bo + "H", tiff[e + 8:e + 10])[0]
+    except struct.error:
+        pass  # truncated or malformed EXIF: treat as not rotated
+    return 1
+
+
+def _jpeg_size(f) -> Optional[Tuple[int, int]]:
+    """(width, height) as displayed: w/h are swapped for EXIF orientations 5..8 (90/270 degree rotations)."""
+    f.seek(2)
+    orientation = 1
+    while True:
+        b = f.read(1)
+        while b and b != b"\xff":
+            b = f.read(1)
+        while b == b"\xff":
+            b = f.read(1)
+        if not b:
+            return None
+        marker = b[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue  # markers without a length field
+        seg = f.read(2)
+        if len(seg) < 2:
+            return None
+        seg_len = struct.unpack(">H", seg)[0]
+        if marker == 0xE1 and orientation == 1:
+            orientation = _exif_orientation(f.read(seg_len - 2))
+            continue
+        if marker in _JPEG_SOF:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            h, w = struct.unpack(">HH", data[1:5])
+            return (h, w) if 5 <= orientation <= 8 else (w, h)
+        f.seek(seg_len - 2, os.SEEK_CUR)
+
+
+def image_size(path: Path) -> Tuple[int, int]:
+    """(width, height) from the file header; falls back to decoding. (0, 0) if unreadable."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(26)
+            if head[:8] == b"\x89PNG\r\n\x1a\n":
+                return struct.unpack(">II", head[16:24])
+            if head[:2] == b"BM":
+                w, h = struct.unpack("<ii", head[18:26])
+                return w, abs(h)
+            if head[:2] == b"\xff\xd8":
+                wh = _jpeg_size(f)
+                if wh:
+                    return wh
+    except (OSError, struct.error):
+        return 0, 0
+    img = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+    return (img.shape[1], img.shape[0]) if img is not None else (0, 0)
+
+
+def parse_label_array(path: Optional[Path]) -> Tuple[np.ndarray, int]:
+    """Return ((N, 5) float32 [cls, cx, cy, w, h], number of malformed lines)."""
+    if path is None:
+        return np.zeros((0, 5), np.float32), 0
+    rows, bad = [], 0
+    for ln in path.read_text().splitlines():
+        parts = ln.split()
+        if not parts:
+            continue
+        if len(parts) < 5:
+            bad += 1
+            continue
+        try:
+            rows.append([float(v) for v in parts[:5]])
+        except ValueError:
+            bad += 1
+    if not rows:
+        return np.zeros((0, 5), np.float32), bad
+    return np.asarray(rows, dtype=np.float32), bad
+
+
+def _walk(root: Path, exts=None) -> Dict[str, Tuple[int, int]]:
+    """{relative posix path: (mtime_ns, size)} via os.scandir."""
+    out = {}
+    if not root.is_dir():
+        return out
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        with os.scandir(d) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=True):
+                    stack.append(Path(e.path))
+                elif exts is None or os.path.splitext(e.name)[1].lower() in exts:
+                    st = e.stat()
+                    out[Path(e.path).relative_to(root).as_posix()] = (st.st_mtime_ns, st.st_size)
+    return out
+
+
+# ============================================================
+# Index
+# ============================================================
+
+def dataset_file(root: Path, name: str) -> Path:
+    """
+    <root>/<name>, or <cache>/<hash(root)>-<name> when root (or that file) is not
+    writable, so tools keep their side files for read-only or shared datasets.
+    """
+    path = root / name
+    if os.access(root, os.W_OK) and (not path.exists() or os.access(path, os.W_OK)):
+        return path
+    cache = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "embedded-vision"
+    cache.mkdir(parents=True, exist_ok=True)
+    return cache / f"{hashlib.sha1(str(root).encode()).hexdigest()[:16]}-{name.lstrip('.')}"
+
+
+def default_db_path(root: Path) -> Path:
+    """<root>/.dataset_index.sqlite, or a per-root file in the user cache when root is not writable."""
+    return dataset_file(root, INDEX_NAME)
+
+
+class DatasetIndex:
+    def __init__(self, dataset_root, db_path=None):
+        self.root = Path(dataset_root).expanduser().resolve()
+        self.images_dir = self.root / "images"
+        self.labels_dir = self.root / "labels"
+        self.db_path = Path(db_path) if db_path else default_db_path(self.root)
+        self.db = sqlite3.connect(str(self.db_path))
+        self._init_schema()
+        self._arrays = None
+
+    def _init_schema(self):
+        cur = self.db.cursor()
+        cur.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = cur.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        if row is not None and row[0] != SCHEMA_VERSION:
+            cur.execute("DROP TABLE IF EXISTS images")
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            " rel TEXT PRIMARY KEY, width INTEGER, height INTEGER,"
+            " img_mtime INTEGER, img_size INTEGER,"
+            " label_rel TEXT, label_mtime INTEGER,"
+            " n_boxes INTEGER, bad_lines INTEGER, boxes BLOB)"
+        )
+        cur.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (SCHEMA_VERSION,))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def update(self, workers: int = 8, verbose: bool = True) -> dict:
+        """Bring the index in sync with the files on disk; returns change counts."""
+        t0 = time.perf_counter()
+        imgs = _walk(self.images_dir, IMG_EXTS)
+        lbls = _walk(self.labels_dir, {".txt"})
+        # Flat labels/<stem>.txt fallback, only where the stem names a single image
+        stem_count = Counter(Path(rel).stem for rel in imgs)
+        lbl_by_stem = {Path(rel).stem: rel for rel in lbls if "/" not in rel and stem_count[Path(rel).stem] == 1}
+
+        old = {
+            r[0]: r[1:]
+            for r in self.db.execute("SELECT rel, img_mtime, img_size, label_rel, label_mtime FROM images")
+        }
+
+        todo = []  # (rel, label_rel, label_mtime, need_size)
+        for rel, (mtime, size) in imgs.items():
+            label_rel = str(Path(rel).with_suffix(".txt").as_posix())
+            if label_rel not in lbls:
+                label_rel = lbl_by_stem.get(Path(rel).stem)
+            label_mtime = lbls[label_rel][0] if label_rel else None
+
+            prev = old.get(rel)
+            if prev is None or prev[0] != mtime or prev[1] != size:
+                todo.append((rel, label_rel, label_mtime, True))
+            elif prev[2] != label_rel or prev[3] != label_mtime:
+                todo.append((rel, label_rel, label_mtime, False))
+
+        removed = [rel for rel in old if rel not in imgs]
+
+        def work(job):
+            rel, label_rel, label_mtime, need_size = job
+            boxes, bad = parse_label_array(self.labels_dir / label_rel if label_rel else None)
+            if need_size:
+                w, h = image_size(self.images_dir / rel)
+            else:
+                w = h = None
+            return rel, w, h, label_rel, label_mtime, boxes, bad
+
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(work, todo))
+
+        with self.db:
+            self.db.executemany("DELETE FROM images WHERE rel=?", [(r,) for r in removed])
+            for rel, w, h, label_rel, label_mtime, boxes, bad in results:
+                mtime, size = imgs[rel]
+                if w is None:
+                    self.db.execute(
+                        "UPDATE images SET label_rel=?, label_mtime=?, n_boxes=?, bad_lines=?, boxes=?"
+                        " WHERE rel=?",
+                        (label_rel, label_mtime, len(boxes), bad, boxes.tobytes(), rel),
+                    )
+                else:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO images VALUES (?,?,?,?,?,?,?,?,?,?)",
+                        (rel, w, h, mtime, size, label_rel, label_mtime, len(boxes), bad, boxes.tobytes()),
+                    )
+
+        self._arrays = None
+        stats = {
+            "images": len(imgs),
+            "labels": len(lbls),
+            "added": sum(1 for j in todo if j[0] not in old),
+            "updated": sum(1 for j in todo if j[0] in old),
+            "removed": len(removed),
+            "seconds": time.perf_counter() - t0,
+        }
+        if verbose:
+            print(f"[dataset_index] {stats['images']} images, {stats['labels']} label files | "
+                  f"+{stats['added']} ~{stats['updated']} -{stats['removed']} | {stats['seconds']:.2f} s")
+        return stats
+
+    def arrays(self) -> dict:
+        """
+        All images sorted by relative path:
+          rel        list[str]              path relative to images/
+          label_rel  list[str | None]       path relative to labels/
+          wh         (N, 2) int32           width, height
+          mtime      (N,) int64             image mtime (ns)
+          bad_lines  (N,) int32             malformed label lines
+          offsets    (N + 1,) int64         boxes of image i are boxes[offsets[i]:offsets[i+1]]
+          boxes      (M, 5) float32         [cls, cx, cy, w, h] normalized
+        """
+        if self._arrays is not None:
+            return self._arrays
+        rows = self.db.execute(
+            "SELECT rel, label_rel, width, height, img_mtime, bad_lines, n_boxes, boxes"
+            " FROM images ORDER BY rel"
+        ).fetchall()
+        n = len(rows)
+        counts = np.fromiter((r[6] for r in rows), dtype=np.int64, count=n)
+        offsets = np.zeros(n + 1, np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        blob = b"".join(r[7] for r in rows)
+        self._arrays = {
+            "rel": [r[0] for r in rows],
+            "label_rel": [r[1] for r in rows],
+            "wh": np.array([(r[2], r[3]) for r in rows], dtype=np.int32).reshape(n, 2),
+            "mtime": np.fromiter((r[4] for r in rows), dtype=np.int64, count=n),
+            "bad_lines": np.fromiter((r[5] for r in rows), dtype=np.int32, count=n),
+            "offsets": offsets,
+            "boxes": np.frombuffer(blob, dtype=np.float32).reshape(-1, 5),
+        }
+        return self._arrays
+
+    def orphan_labels(self) -> List[str]:
+        """Label files (relative to labels/) that no indexed image refers to."""
+        used = {r for r in self.arrays()["label_rel"] if r}
+        return sorted(rel for rel in _walk(self.labels_dir, {".txt"}) if rel not in used)
+
+    def image_paths(self) -> List[Path]:
+        return [self.images_dir / rel for rel in self.arrays()["rel"]]
+
+    def boxes_per_image(self) -> List[np.ndarray]:
+        """List of (N_i, 5) views into the flat box array."""
+        a = self.arrays()
+        off = a["offsets"]
+        return [a["boxes"][off[i]:off[i + 1]] for i in range(len(off) - 1)]
+
+
+def open_index(dataset_root, refresh: bool = True, workers: int = 8, verbose: bool = True) -> DatasetIndex:
+    idx = DatasetIndex(dataset_root)
+    if refresh:
+        idx.update(workers=workers, verbose=verbose)
+    return idx
+
+
+def main() -> int:
+    dataset_root = Path(sys.argv[1]).expanduser().resolve() if len(sys.argv) > 1 else Path.cwd()
+    if not (dataset_root / "images").exists():
+        print(f"ERROR: missing images/ directory at: {dataset_root / 'images'}", file=sys.stderr)
+        return 2
+    idx = open_index(dataset_root)
+    t0 = time.perf_counter()
+    a = idx.arrays()
+    print(f"[dataset_index] {len(a['rel'])} images, {len(a['boxes'])} boxes, "
+          f"{int((np.diff(a['offsets']) == 0).sum())} without boxes, "
+          f"{int(a['bad_lines'].sum())} malformed label lines | load {time.perf_counter() - t0:.3f} s")
+    print(f"[dataset_index] {idx.db_path}")
+    idx.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
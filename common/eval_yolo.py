@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+YOLO detection-accuracy evaluator.
+
+Scores predictions against a YOLO-format dataset and reports per-class
+precision / recall / AP@0.5 / AP@0.5:0.95 without going through Ultralytics
+training validation.
+
+Expected dataset structure (same as review_yolo.py):
+  <dataset>/
+    images/...
+    labels/...
+    classes.txt   (optional; one class name per line)
+
+Predictions are YOLO txt files mirroring labels/ ("cls cx cy w h conf" per line,
+which is what Ultralytics writes with save_txt=True, save_conf=True). A missing
+prediction file means "no detections" for that image. Alternatively, --model
+runs a detector over images/ and (optionally) saves its predictions.
+
+Usage:
+  python3 eval_yolo.py /path/to/dataset --pred /path/to/pred_labels
+  python3 eval_yolo.py /path/to/dataset --model best.pt --imgsz 640 --save-pred preds/
+  python3 eval_yolo.py /path/to/dataset --pred preds/ --json metrics.json
+
+Matching follows Ultralytics: for every IoU threshold, prediction/label pairs of
+the same image and class are matched greedily by IoU, one-to-one, over all images
+at once. AP uses COCO 101-point
+interpolation. IoU is computed on normalized coordinates (it is scale-invariant).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from dataset_index import open_index
+from review_yolo import label_path_for_image, load_classes
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz
+
+
+# ============================================================
+# Label I/O
+# ============================================================
+
+def read_yolo_array(path: Path, with_conf: bool = False) -> np.ndarray:
+    """
+    Parse a YOLO txt file into a float32 array.
+
+    Returns (N, 5) [cls, cx, cy, w, h], or (N, 6) with a trailing conf column when
+    with_conf is set (lines without a conf column get conf = 1). Short lines are
+    dropped, as in review_yolo.parse_yolo_label_file.
+    """
+    ncols = 6 if with_conf else 5
+    if not path.exists():
+        return np.zeros((0, ncols), np.float32)
+    rows = []
+    for ln in path.read_text().splitlines():
+        parts = ln.split()
+        if len(parts) < 5:
+            continue
+        if with_conf:
+            rows.append(parts[:6] if len(parts) >= 6 else parts[:5] + ["1"])
+        else:
+            rows.append(parts[:5])
+    if not rows:
+        return np.zeros((0, ncols), np.float32)
+    return np.asarray(rows, dtype=np.float32)
+
+
+def xywh_to_xyxy(b: np.ndarray) -> np.ndarray:
+    half = b[:, 2:4] / 2.0
+    return np.concatenate([b[:, 0:2] - half, b[:, 0:2] + half], axis=1)
+
+
+# ============================================================
+# Vectorized matching and AP
+# ============================================================
+
+def box_iou(a: np.ndarray, b: np.ndarray, eps: float = 1e-9) -> np.ndarray:
+    """Pairwise IoU of (N,4) and (M,4) xyxy boxes -> (N,M)."""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + eps)
+
+
+def pair_iou(a: np.ndarray, b: np.ndarray, eps: float = 1e-9) -> np.ndarray:
+    """Element-wise IoU of two (K,4) xyxy arrays -> (K,)."""
+    lt = np.maximum(a[:, :2], b[:, :2])
+    rb = np.minimum(a[:, 2:], b[:, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(axis=1)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a + area_b - inter + eps)
+
+
+def candidate_pairs(pred_key: np.ndarray, gt_key: np.ndarray):
+    """
+    All (pred, gt) index pairs that share a key (image id * nc + class), built
+    without a Python loop: each prediction is repeated once per label in its group.
+    """
+    gt_order = np.argsort(gt_key, kind="stable")
+    sorted_gt_key = gt_key[gt_order]
+    start = np.searchsorted(sorted_gt_key, pred_key, side="left")
+    count = np.searchsorted(sorted_gt_key, pred_key, side="right") - start
+
+    total = int(count.sum())
+    pair_pred = np.repeat(np.arange(len(pred_key)), count)
+    offset = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+    pair_gt = gt_order[np.repeat(start, count) + offset]
+    return pair_pred, pair_gt
+
+
+def match_predictions(pair_pred: np.ndarray, pair_gt: np.ndarray, pair_iou_: np.ndarray,
+                      n_pred: int, thresholds: np.ndarray = IOU_THRESHOLDS) -> np.ndarray:
+    """
+    Return an (n_pred, T) bool array: prediction i is a true positive at threshold t.
+
+    For each threshold the candidate pairs are sorted by IoU and made one-to-one
+    (first by prediction, then by label), like Ultralytics' match_predictions.
+    Pair indices are global, so all images are matched in one pass.
+    """
+    correct = np.zeros((n_pred, len(thresholds)), dtype=bool)
+    order = np.argsort(-pair_iou_, kind="stable")
+    pair_pred, pair_gt, pair_iou_ = pair_pred[order], pair_gt[order], pair_iou_[order]
+    for i, t in enumerate(thresholds):
+        keep = pair_iou_ >= t
+        p, g = pair_pred[keep], pair_gt[keep]
+        if p.size == 0:
+            break  # thresholds are increasing
+        _, first = np.unique(p, return_index=True)
+        first.sort()
+        p, g = p[first], g[first]
+        _, first = np.unique(g, return_index=True)
+        correct[p[first], i] = True
+    return correct
+
+
+def compute_ap(recall: np.ndarray, precision: np.ndarray) -> float:
+    """COCO 101-point interpolated AP for one precision/recall curve."""
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    return float(_trapezoid(np.interp(x, mrec, mpre), x))
+
+
+def ap_per_class(tp: np.ndarray, conf: np.ndarray, pred_cls: np.ndarray, gt_cls: np.ndarray,
+                 nc: int, conf_thres: float = 0.25) -> dict:
+    """
+    tp: (N, T) true-positive flags over all predictions of all images.
+
+    Returns per-class arrays: n_gt, precision/recall at conf_thres (IoU 0.5),
+    ap (nc, T). Classes without labels get NaN.
+    """
+    order = np.argsort(-conf, kind="stable")
+    tp, conf, pred_cls = tp[order], conf[order], pred_cls[order]
+
+    n_gt = np.bincount(gt_cls, minlength=nc)[:nc]
+    ap = np.full((nc, tp.shape[1]), np.nan)
+    p = np.full(nc, np.nan)
+    r = np.full(nc, np.nan)
+
+    for c in range(nc):
+        if n_gt[c] == 0:
+            continue
+        m = pred_cls == c
+        if not m.any():
+            ap[c], p[c], r[c] = 0.0, 0.0, 0.0
+            continue
+        tpc = tp[m].cumsum(axis=0)
+        fpc = (~tp[m]).cumsum(axis=0)
+        recall = tpc / n_gt[c]
+        precision = tpc / (tpc + fpc)
+        for j in range(tp.shape[1]):
+            ap[c, j] = compute_ap(recall[:, j], precision[:, j])
+        # Predictions are sorted by conf, so the kept set is a prefix
+        k = int(np.count_nonzero(conf[m] >= conf_thres))
+        p[c] = precision[k - 1, 0] if k else 0.0
+        r[c] = recall[k - 1, 0] if k else 0.0
+
+    return {"n_gt": n_gt, "precision": p, "recall": r, "ap": ap}
+
+
+def evaluate(gts: List[np.ndarray], preds: List[np.ndarray], nc: int,
+             conf_thres: float = 0.25) -> dict:
+    """
+    gts[i]:   (N_i, 5) [cls, cx, cy, w, h] labels for image i
+    preds[i]: (M_i, 6) [cls, cx, cy, w, h, conf] predictions for image i
+    """
+    gt = np.concatenate(gts) if gts else np.zeros((0, 5), np.float32)
+    pr = np.concatenate(preds) if preds else np.zeros((0, 6), np.float32)
+    gt_img = np.repeat(np.arange(len(gts)), [len(g) for g in gts])
+    pr_img = np.repeat(np.arange(len(preds)), [len(p) for p in preds])
+
+    gt_cls = gt[:, 0].astype(np.int64)
+    pred_cls = pr[:, 0].astype(np.int64)
+    pair_pred, pair_gt = candidate_pairs(pr_img * nc + pred_cls, gt_img * nc + gt_cls)
+    ious = pair_iou(xywh_to_xyxy(pr[pair_pred, 1:5]), xywh_to_xyxy(gt[pair_gt, 1:5]))
+    tp = match_predictions(pair_pred, pair_gt, ious, len(pr))
+
+    return ap_per_class(tp, pr[:, 5], pred_cls, gt_cls, nc, conf_thres)
+
+
+def summarize(stats: dict, classes: Optional[List[str]]) -> dict:
+    """Flatten evaluate() output into a JSON-friendly dict with an 'all' row."""
+    nc = len(stats["n_gt"])
+    per_class = {}
+    for c in range(nc):
+        if stats["n_gt"][c] == 0:
+            continue
+        name = classes[c] if classes and c < len(classes) else str(c)
+        per_class[name] = {
+            "instances": int(stats["n_gt"][c]),
+            "precision": float(stats["precision"][c]),
+            "recall": float(stats["recall"][c]),
+            "ap50": float(stats["ap"][c, 0]),
+            "ap50_95": float(stats["ap"][c].mean()),
+        }
+    valid = stats["n_gt"] > 0
+    overall = {
+        "instances": int(stats["n_gt"].sum()),
+        "precision": float(np.mean(stats["precision"][valid])) if valid.any() else 0.0,
+        "recall": float(np.mean(stats["recall"][valid])) if valid.any() else 0.0,
+        "ap50": float(np.mean(stats["ap"][valid, 0])) if valid.any() else 0.0,
+        "ap50_95": float(np.mean(stats["ap"][valid])) if valid.any() else 0.0,
+    }
+    return {"all": overall, "classes": per_class}
+
+
+def print_summary(summary: dict):
+    header = f"{'class':<20}{'instances':>10}{'P':>8}{'R':>8}{'AP50':>8}{'AP50-95':>9}"
+    print("\n" + header)
+    rows = [("all", summary["all"])] + list(summary["classes"].items())
+    for name, m in rows:
+        print(f"{name:<20}{m['instances']:>10}{m['precision']:>8.3f}{m['recall']:>8.3f}"
+              f"{m['ap50']:>8.3f}{m['ap50_95']:>9.3f}")
+
+
+# ============================================================
+# Prediction sources
+# ============================================================
+
+def pred_path_for_image(img_path: Path, images_dir: Path, pred_dir: Path) -> Path:
+    """Mirror of labels/ under pred_dir, falling back to a flat <stem>.txt (Ultralytics save_txt)."""
+    p = label_path_for_image(img_path, images_dir, pred_dir)
+    return p if p.exists() else pred_dir / f"{img_path.stem}.txt"
+
+
+def predict_images(model_path: str, images: List[Path], imgsz: int, device, batch: int,
+                   save_dir: Optional[Path] = None, images_dir: Optional[Path] = None) -> List[np.ndarray]:
+    """Run an Ultralytics detector and return (M, 6) prediction arrays per image."""
+    try:
+        from ultralytics import YOLO
+    except Exception as e:
+        raise RuntimeError(
+            "--model needs ultralytics; install it or evaluate saved predictions with --pred.\n"
+            f"Import error: {e}"
+        )
+    model = YOLO(model_path, task="detect")
+    out = []
+    for i in range(0, len(images), batch):
+        chunk = images[i:i + batch]
+        results = model.predict([str(p) for p in chunk], imgsz=imgsz, conf=0.001,
+                                device=device, verbose=False)
+        for img_path, r in zip(chunk, results):
+            b = r.boxes
+            arr = np.column_stack([
+                b.cls.cpu().numpy(), b.xywhn.cpu().numpy(), b.conf.cpu().numpy()
+            ]).astype(np.float32) if len(b) else np.zeros((0, 6), np.float32)
+            out.append(arr)
+            if save_dir is not None:
+                dst = label_path_for_image(img_path, images_dir, save_dir)
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                dst.write_text("".join(
+                    f"{int(c)} {x:.6f} {y:.6f} {w:.6f} {h:.6f} {s:.5f}\n" for c, x, y, w, h, s in arr
+                ))
+        print(f"[eval_yolo] Predicted {min(i + batch, len(images))}/{len(images)}", end="\r")
+    print()
+    return out
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Per-class P/R/AP50/AP50-95 for a YOLO dataset")
+    parser.add_argument("dataset", nargs="?", default=".", help="Dataset root (images/, labels/)")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--pred", help="Folder of prediction txt files (cls cx cy w h conf)")
+    src.add_argument("--model", help="Run this Ultralytics model over images/ instead")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--save-pred", default=None, help="With --model: write predictions here")
+    parser.add_argument("--conf", type=float, default=0.25, help="Confidence for reported P/R")
+    parser.add_argument("--workers", type=int, default=8, help="Threads used to read label/prediction files")
+    parser.add_argument("--json", default=None, help="Write metrics to this JSON file")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    dataset_root = Path(args.dataset).expanduser().resolve()
+    images_dir = dataset_root / "images"
+    labels_dir = dataset_root / "labels"
+    if not images_dir.exists() or not labels_dir.exists():
+        print(f"ERROR: expected images/ and labels/ under: {dataset_root}", file=sys.stderr)
+        return 2
+
+    t0 = time.perf_counter()
+    classes = load_classes(dataset_root)
+    index = open_index(dataset_root, workers=args.workers)
+    images = index.image_paths()
+    gts = index.boxes_per_image()
+    if not images:
+        print(f"ERROR: no images found under: {images_dir}", file=sys.stderr)
+        return 2
+
+    if args.pred:
+        pred_dir = Path(args.pred).expanduser().resolve()
+        with ThreadPoolExecutor(max_workers=args.workers) as ex:
+            preds = list(ex.map(
+                lambda p: read_yolo_array(pred_path_for_image(p, images_dir, pred_dir), with_conf=True), images))
+    t_read = time.perf_counter()
+
+    if args.model:
+        save_dir = Path(args.save_pred).expanduser().resolve() if args.save_pred else None
+        preds = predict_images(args.model, images, args.imgsz, args.device, args.batch, save_dir, images_dir)
+    t_pred = time.perf_counter()
+
+    max_cls = max((int(a[:, 0].max()) for a in gts + preds if len(a)), default=-1)
+    nc = max(len(classes) if classes else 0, max_cls + 1)
+    stats = evaluate(gts, preds, nc, conf_thres=args.conf)
+    summary = summarize(stats, classes)
+    t_eval = time.perf_counter()
+
+    print_summary(summary)
+    print(f"\n[eval_yolo] {len(images)} images | read {t_read - t0:.2f} s"
+          + (f" | predict {t_pred - t_read:.2f} s" if args.model else "")
+          + f" | match+AP {t_eval - t_pred:.2f} s")
+
+    if args.json:
+        summary["images"] = len(images)
+        summary["conf"] = args.conf
+        Path(args.json).write_text(json.dumps(summary, indent=2) + "\n")
+        print(f"[eval_yolo] Wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Video -> dataset frame extractor.
+
+Each video is split into time chunks that are decoded in parallel processes
+(each worker opens its own VideoCapture and seeks to its chunk), so throughput
+scales with cores. Frames are kept either
+
+  stride   every --stride-th frame (global frame index, so the result does not
+           depend on the chunking), or
+  scene    when the mean absolute difference of a 64x36 grayscale thumbnail
+           against the last kept frame exceeds --scene-thresh (0..255), with at
+           least --min-gap seconds between kept frames. The first frame of each
+           chunk is always kept.
+
+Frames that are not kept are only grabbed, not converted (cap.grab()).
+
+Output (the images/ layout used by review_yolo.py, autolabel_yolo.py, ...):
+  <out>/images/<name>/<name>_f0001234.jpg    name = video stem, plus a short hash
+                                             of the video path when several input
+                                             videos share the stem
+  <out>/frames.csv     rel, video, frame, t_sec, score   (source/timestamp metadata)
+
+Usage:
+  python3 extract_frames.py flight01.mp4 --out data010 --stride 15
+  python3 extract_frames.py videos/*.mp4 --out data011 --mode scene --scene-thresh 10 --min-gap 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+THUMB = (64, 36)
+CHUNKS_PER_WORKER = 4  # smaller chunks balance load across videos of different lengths
+
+
+def video_info(path: str) -> Tuple[int, float]:
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return 0, 0.0
+    n = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    return n, fps
+
+
+def _thumb(img: np.ndarray) -> np.ndarray:
+    return cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), THUMB, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def extract_chunk(job) -> Tuple[List[tuple], int]:
+    """Decode frames [start, stop) of one video; returns (kept rows, frames decoded)."""
+    video, name, start, stop, fps, mode, stride, scene_thresh, min_gap, out_dir, quality = job
+    cv2.setNumThreads(1)
+    cap = cv2.VideoCapture(video)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    idx = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    # Some containers can only seek to keyframes; step forward to the exact start
+    while idx < start and cap.grab():
+        idx += 1
+
+    rows = []
+    last_thumb = None
+    last_t = -np.inf
+    decoded = 0
+    while idx < stop:
+        if mode == "stride" and idx % stride:
+            if not cap.grab():
+                break
+            idx += 1
+            decoded += 1
+            continue
+        ok, frame = cap.read()
+        if not ok:
+            break
+        decoded += 1
+        t = idx / fps
+        score = 0.0
+        keep = True
+        if mode == "scene":
+            th = _thumb(frame)
+            if last_thumb is not None:
+                score = float(np.abs(th - last_thumb).mean())
+                keep = score >= scene_thresh and (t - last_t) >= min_gap
+            if keep:
+                last_thumb = th
+        if keep:
+            rel = f"{name}/{name}_f{idx:07d}.jpg"
+            cv2.imwrite(os.path.join(out_dir, rel), frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            rows.append((rel, video, idx, round(t, 4), round(score, 2)))
+            last_t = t
+        idx += 1
+    cap.release()
+    return rows, decoded
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract dataset frames from videos in parallel")
+    parser.add_argument("videos", nargs="+", help="Video files")
+    parser.add_argument("--out", required=True, help="Output folder (images/ and frames.csv are written here)")
+    parser.add_argument("--mode", choices=("stride", "scene"), default="stride")
+    parser.add_argument("--stride", type=int, default=10, help="stride mode: keep every Nth frame")
+    parser.add_argument("--scene-thresh", type=float, default=12.0, help="scene mode: min thumbnail change (0..255)")
+    parser.add_argument("--min-gap", type=float, default=0.0, help="scene mode: min seconds between kept frames")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--quality", type=int, default=95, help="JPEG quality")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    out = Path(args.out).expanduser().resolve()
+    images_dir = out / "images"
+
+    infos = []
+    for v in dict.fromkeys(str(Path(v).resolve()) for v in args.videos):
+        n, fps = video_info(v)
+        if n <= 0:
+            print(f"[extract_frames] WARNING: cannot read {v}, skipping")
+            continue
+        infos.append((v, n, fps))
+    if not infos:
+        print("ERROR: no readable videos", file=sys.stderr)
+        return 2
+
+    # Same-named videos from different folders must not overwrite each other's frames
+    stems = Counter(Path(v).stem for v, _, _ in infos)
+    names = {}
+    for v, _, _ in infos:
+        stem = Path(v).stem
+        names[v] = stem if stems[stem] == 1 else f"{stem}_{hashlib.sha1(v.encode()).hexdigest()[:8]}"
+        (images_dir / names[v]).mkdir(parents=True, exist_ok=True)
+
+    total = sum(n for _, n, _ in infos)
+    chunk = max(1, -(-total // (args.workers * CHUNKS_PER_WORKER)))
+    jobs = [
+        (v, names[v], s, min(s + chunk, n), fps, args.mode, args.stride, args.scene_thresh, args.min_gap,
+         str(images_dir), args.quality)
+        for v, n, fps in infos
+        for s in range(0, n, chunk)
+    ]
+    print(f"[extract_frames] {len(infos)} videos, {total} frames, {len(jobs)} chunks, {args.workers} workers")
+
+    t0 = time.perf_counter()
+    rows, decoded = [], 0
+    with ProcessPoolExecutor(max_workers=args.workers) as ex:
+        for r, d in ex.map(extract_chunk, jobs):
+            rows += r
+            decoded += d
+            dt = time.perf_counter() - t0
+            print(f"[extract_frames] {decoded}/{total} frames | {decoded / max(dt, 1e-9):.0f} fps", end="\r")
+    print()
+
+    with (out / "frames.csv").open("w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["rel", "video", "frame", "t_sec", "score"])
+        w.writerows(rows)
+
+    dt = time.perf_counter() - t0
+    print(f"[extract_frames] Kept {len(rows)} of {decoded} frames -> {images_dir} in {dt:.1f} s "
+          f"({decoded / max(dt, 1e-9):.0f} decoded fps)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+YOLO dataset lint and statistics.
+
+Checks every label in a dataset (via the dataset index, which reads new or
+changed files in parallel and caches the rest) and reports:
+
+  errors
+    malformed_lines   lines with < 5 fields or non-numeric values
+    bad_class_id      non-integer class ids, or ids not in classes.txt
+    out_of_range      centre/size outside [0, 1] or box edges past the image border
+    degenerate        width/height <= 0, or smaller than --min-px pixels
+    duplicate         same class, IoU >= --dup-iou within one image
+    unreadable_image  image header could not be read
+  warnings
+    no_label_file     image without a label file
+    empty_label       label file without boxes (background image)
+    orphan_label      label file without an image
+
+plus per-class instance/image counts and a histogram of box sizes in pixels
+(sqrt(w * h)), per class.
+
+Expected dataset structure (same as review_yolo.py):
+  <dataset>/
+    images/...
+    labels/...
+    classes.txt   (optional; one class name per line)
+
+Usage:
+  python3 lint_yolo.py /path/to/dataset
+  python3 lint_yolo.py /path/to/dataset --json lint.json --strict   # exit 1 on errors
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from dataset_index import open_index
+from eval_yolo import candidate_pairs, pair_iou, xywh_to_xyxy
+from review_yolo import load_classes
+
+ERRORS = ("malformed_lines", "bad_class_id", "out_of_range", "degenerate", "duplicate", "unreadable_image")
+WARNINGS = ("no_label_file", "empty_label", "orphan_label")
+
+# Box size bins in pixels (sqrt of area)
+SIZE_BINS = (0, 8, 16, 32, 64, 128, 256, 512, 1024, np.inf)
+
+EDGE_TOL = 1e-3  # normalized slack for boxes touching the border
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Lint a YOLO dataset and print label statistics")
+    parser.add_argument("dataset", nargs="?", default=".", help="Dataset root (images/, labels/)")
+    parser.add_argument("--min-px", type=float, default=2.0, help="Boxes narrower/shorter than this are degenerate")
+    parser.add_argument("--dup-iou", type=float, default=0.9, help="IoU at which same-class boxes are duplicates")
+    parser.add_argument("--workers", type=int, default=8, help="Threads used to (re)read changed files")
+    parser.add_argument("--json", default=None, help="Write offending files and stats to this JSON file")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 if any error is found")
+    return parser.parse_args()
+
+
+def lint_boxes(a: dict, classes: Optional[List[str]], min_px: float, dup_iou: float) -> Dict[str, np.ndarray]:
+    """Vectorized box checks; returns {issue: flat box indices}."""
+    boxes = a["boxes"]
+    off = a["offsets"]
+    n_img = len(off) - 1
+    img_of_box = np.repeat(np.arange(n_img), np.diff(off))
+    wh = a["wh"][img_of_box].astype(np.float32)
+
+    cls, cx, cy, w, h = boxes.T
+    bad_cls = cls != np.floor(cls)
+    bad_cls |= cls < 0
+    if classes:
+        bad_cls |= cls >= len(classes)
+
+    x1, y1, x2, y2 = cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2
+    out_of_range = (
+        (boxes[:, 1:5] < 0).any(axis=1) | (boxes[:, 1:5] > 1).any(axis=1)
+        | (x1 < -EDGE_TOL) | (y1 < -EDGE_TOL) | (x2 > 1 + EDGE_TOL) | (y2 > 1 + EDGE_TOL)
+    )
+    known_size = (wh > 0).all(axis=1)
+    degenerate = (w <= 0) | (h <= 0) | (known_size & ((w * wh[:, 0] < min_px) | (h * wh[:, 1] < min_px)))
+
+    # Duplicates: all same-image same-class pairs, IoU computed element-wise.
+    # The key is the index of the (image, class id) pair, so negative or
+    # fractional class ids cannot collide with another image's boxes.
+    key = np.unique(np.column_stack([img_of_box, cls]), axis=0, return_inverse=True)[1].reshape(-1)
+    pi, pj = candidate_pairs(key, key)
+    upper = pi < pj
+    pi, pj = pi[upper], pj[upper]
+    dup = pair_iou(xywh_to_xyxy(boxes[pi, 1:5]), xywh_to_xyxy(boxes[pj, 1:5])) >= dup_iou
+
+    return {
+        "bad_class_id": np.nonzero(bad_cls)[0],
+        "out_of_range": np.nonzero(out_of_range)[0],
+        "degenerate": np.nonzero(degenerate)[0],
+        "duplicate": np.unique(pj[dup]),
+    }
+
+
+def class_stats(a: dict, classes: Optional[List[str]]) -> Dict[str, dict]:
+    boxes = a["boxes"]
+    off = a["offsets"]
+    img_of_box = np.repeat(np.arange(len(off) - 1), np.diff(off))
+    wh = a["wh"][img_of_box].astype(np.float32)
+    size_px = np.sqrt(boxes[:, 3] * wh[:, 0] * boxes[:, 4] * wh[:, 1])
+
+    stats = {}
+    cls_int = boxes[:, 0].astype(np.int64)
+    for c in np.unique(cls_int):
+        m = cls_int == c
+        name = classes[c] if classes and 0 <= c < len(classes) else str(int(c))
+        hist, _ = np.histogram(size_px[m], bins=SIZE_BINS)
+        stats[name] = {
+            "id": int(c),
+            "instances": int(m.sum()),
+            "images": int(np.unique(img_of_box[m]).size),
+            "size_px_median": float(np.median(size_px[m])),
+            "size_hist": hist.tolist(),
+        }
+    return stats
+
+
+def main() -> int:
+    args = parse_args()
+    dataset_root = Path(args.dataset).expanduser().resolve()
+    if not (dataset_root / "images").exists():
+        print(f"ERROR: missing images/ directory at: {dataset_root / 'images'}", file=sys.stderr)
+        return 2
+
+    t0 = time.perf_counter()
+    classes = load_classes(dataset_root)
+    index = open_index(dataset_root, workers=args.workers)
+    a = index.arrays()
+    rel, label_rel = a["rel"], a["label_rel"]
+    off = a["offsets"]
+    n_boxes = np.diff(off)
+
+    issues: Dict[str, List[dict]] = defaultdict(list)
+
+    box_issues = lint_boxes(a, classes, args.min_px, args.dup_iou)
+    img_of_box = np.repeat(np.arange(len(rel)), n_boxes)
+    for name, idx in box_issues.items():
+        for b in idx.tolist():
+            i = int(img_of_box[b])
+            issues[name].append({
+                "image": rel[i], "label": label_rel[i], "box": b - int(off[i]),
+                "values": [round(float(v), 6) for v in a["boxes"][b]],
+            })
+
+    for i in np.nonzero(a["bad_lines"])[0].tolist():
+        issues["malformed_lines"].append({"image": rel[i], "label": label_rel[i], "count": int(a["bad_lines"][i])})
+    for i in np.nonzero((a["wh"] <= 0).any(axis=1))[0].tolist():
+        issues["unreadable_image"].append({"image": rel[i]})
+    for i, lr in enumerate(label_rel):
+        if lr is None:
+            issues["no_label_file"].append({"image": rel[i]})
+        elif n_boxes[i] == 0 and a["bad_lines"][i] == 0:
+            issues["empty_label"].append({"image": rel[i], "label": lr})
+    for lr in index.orphan_labels():
+        issues["orphan_label"].append({"label": lr})
+
+    stats = class_stats(a, classes)
+    elapsed = time.perf_counter() - t0
+
+    # --- Summary ---
+    print(f"\n=== {dataset_root} ===")
+    print(f"images: {len(rel)}  boxes: {len(a['boxes'])}  classes in use: {len(stats)}"
+          + (f" / {len(classes)} in classes.txt" if classes else ""))
+    print(f"\n{'issue':<18}{'count':>8}")
+    for name in ERRORS + WARNINGS:
+        level = "E" if name in ERRORS else "W"
+        print(f"{level} {name:<16}{len(issues.get(name, [])):>8}")
+
+    edges = [f"<{int(e)}" if np.isfinite(e) else f">={int(SIZE_BINS[-2])}" for e in SIZE_BINS[1:]]
+    print(f"\n{'class':<16}{'inst':>8}{'imgs':>8}{'med px':>8}  " + "".join(f"{e:>7}" for e in edges))
+    for name, s in sorted(stats.items(), key=lambda kv: kv[1]["id"]):
+        print(f"{name:<16}{s['instances']:>8}{s['images']:>8}{s['size_px_median']:>8.1f}  "
+              + "".join(f"{n:>7}" for n in s["size_hist"]))
+
+    n_err = sum(len(issues.get(name, [])) for name in ERRORS)
+    print(f"\n[lint_yolo] {n_err} errors, "
+          f"{sum(len(issues.get(n, [])) for n in WARNINGS)} warnings in {elapsed:.2f} s")
+
+    if args.json:
+        report = {
+            "dataset": str(dataset_root),
+            "images": len(rel),
+            "boxes": int(len(a["boxes"])),
+            "size_bins_px": [float(e) if np.isfinite(e) else None for e in SIZE_BINS],
+            "classes": stats,
+            "issues": {name: issues.get(name, []) for name in ERRORS + WARNINGS},
+        }
+        Path(args.json).write_text(json.dumps(report, indent=1) + "\n")
+        print(f"[lint_yolo] Wrote {args.json}")
+
+    return 1 if (args.strict and n_err) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
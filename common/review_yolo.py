@@ -15,8 +15,18 @@ Usage:
 Keys:
   y = good (next)
   n = bad  (add to bad list, next)
+  b = back (previous image)
+  f = forward (next image, no verdict)
   q / ESC = quit
 
+Images are decoded, downscaled to the window size and drawn in background
+threads, PREFETCH images ahead of and behind the current one, so stepping is
+instant. Verdicts and the current position are saved to
+<dataset>/review_state.json after every key press; re-running the reviewer
+resumes there (delete the file to start over). The bad list is also written to
+<dataset>/bad_list.txt on exit. On a read-only dataset both files go to
+~/.cache/embedded-vision/ instead (dataset_index.dataset_file).
+
 After running program, the files can be examined in various environments
  - Linux CL Viewer: feh <filename.jpg>
  - Label Studio: Filter → Data → image → contains → <filename.jpg>
@@ -25,14 +35,26 @@ After running program, the files can be examined in various environments
 
 from __future__ import annotations
 
+import json
+import os
 import sys
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import cv2
+import numpy as np
+
+from dataset_index import dataset_file, open_index
 
 IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"}
 
+VIEW_W, VIEW_H = 1280, 720  # initial window size; images are downscaled to fit
+PREFETCH = 8                # images decoded ahead of and behind the current one
+STATE_NAME = "review_state.json"
+BAD_LIST_NAME = "bad_list.txt"
+
 
 def load_classes(dataset_root: Path) -> Optional[List[str]]:
     p = dataset_root / "classes.txt"
@@ -99,6 +121,88 @@ def draw_boxes(img, labels, classes: Optional[List[str]]):
         cv2.putText(img, text, (x1 + 3, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
 
 
+class Prefetcher:
+    """
+    LRU cache of ready-to-show review frames, filled by background threads.
+
+    Each entry is the image decoded at reduced resolution (cv2.IMREAD_REDUCED_*
+    when the full image is much larger than the view), resized to fit the view
+    and with its boxes drawn.
+    """
+
+    _REDUCED = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+    def __init__(self, images: List[Path], labels: List[list], image_wh: np.ndarray,
+                 classes: Optional[List[str]], view_wh: Tuple[int, int], ahead: int = PREFETCH,
+                 workers: int = 2):
+        self.images = images
+        self.labels = labels
+        self.image_wh = image_wh
+        self.classes = classes
+        self.view_w, self.view_h = view_wh
+        self.ahead = ahead
+        self.capacity = 2 * ahead + 3
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.entries: "OrderedDict[int, Future]" = OrderedDict()
+
+    def _load(self, i: int):
+        W, H = (int(v) for v in self.image_wh[i])
+        flag = cv2.IMREAD_COLOR
+        for f, reduced in self._REDUCED:
+            if W and H and W // f >= self.view_w and H // f >= self.view_h:
+                flag = reduced
+                break
+        img = cv2.imread(str(self.images[i]), flag)
+        if img is None:
+            return None
+        h, w = img.shape[:2]
+        scale = min(self.view_w / w, self.view_h / h, 1.0)
+        if scale < 1.0:
+            img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        draw_boxes(img, self.labels[i], self.classes)
+        return img
+
+    def _submit(self, i: int):
+        if i not in self.entries:
+            self.entries[i] = self.pool.submit(self._load, i)
+
+    def get(self, i: int):
+        """Frame for image i (blocks only if it was not prefetched), then prefetch around i."""
+        self._submit(i)
+        self.entries.move_to_end(i)
+        vis = self.entries[i].result()
+        self.prefetch(i)
+        return vis
+
+    def prefetch(self, i: int):
+        for d in range(1, self.ahead + 1):
+            for j in (i + d, i - d):
+                if 0 <= j < len(self.images):
+                    self._submit(j)
+        keep = set(range(i - self.ahead, i + self.ahead + 1))
+        while len(self.entries) > self.capacity:
+            victim = next((k for k in self.entries if k not in keep), None)
+            if victim is None:
+                break
+            self.entries.pop(victim).cancel()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def load_state(path: Path) -> Tuple[int, Dict[str, str]]:
+    if not path.exists():
+        return 0, {}
+    state = json.loads(path.read_text())
+    return int(state.get("position", 0)), dict(state.get("verdicts", {}))
+
+
+def save_state(path: Path, position: int, verdicts: Dict[str, str]):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"position": position, "verdicts": verdicts}, indent=1))
+    os.replace(tmp, path)
+
+
 def main() -> int:
     dataset_root = Path(sys.argv[1]).expanduser().resolve() if len(sys.argv) > 1 else Path.cwd()
 
@@ -113,33 +217,42 @@ def main() -> int:
         return 2
 
     classes = load_classes(dataset_root)
-    images = gather_images(images_dir)
+    index = open_index(dataset_root)
+    images = index.image_paths()
     if not images:
         print(f"ERROR: no images found under: {images_dir}", file=sys.stderr)
         return 2
-
-    bad: List[str] = []
-
-    win = "YOLO Review (y=good, n=bad, q=quit)"
+    labels = [
+        [(int(c), cx, cy, w, h) for c, cx, cy, w, h in arr.tolist()]
+        for arr in index.boxes_per_image()
+    ]
+    rels = index.arrays()["rel"]
+
+    state_path = dataset_file(dataset_root, STATE_NAME)
+    i, verdicts = load_state(state_path)
+    i = min(max(i, 0), len(images) - 1)
+    if verdicts:
+        print(f"Resuming at {i + 1}/{len(images)} with {len(verdicts)} verdicts from {state_path}")
+
+    win = "YOLO Review (y=good, n=bad, b=back, f=forward, q=quit)"
     cv2.namedWindow(win, cv2.WINDOW_NORMAL)
+    cv2.resizeWindow(win, VIEW_W, VIEW_H)
 
-    i = 0
-    while i < len(images):
-        img_path = images[i]
-        lbl_path = label_path_for_image(img_path, images_dir, labels_dir)
+    cache = Prefetcher(images, labels, index.arrays()["wh"], classes, (VIEW_W, VIEW_H))
 
-        img = cv2.imread(str(img_path), cv2.IMREAD_COLOR)
-        if img is None:
-            print(f"WARN: could not read image: {img_path}", file=sys.stderr)
-            i += 1
+    step = 1  # direction of the last move; unreadable images are skipped in it
+    while i < len(images):
+        rel = rels[i]
+        vis = cache.get(i)
+        if vis is None:
+            print(f"WARN: could not read image: {images[i]}", file=sys.stderr)
+            if i + step < 0:
+                step = 1  # nothing readable before it: turn around
+            i += step
             continue
 
-        labels = parse_yolo_label_file(lbl_path)
-        vis = img.copy()
-        draw_boxes(vis, labels, classes)
-
-        rel = img_path.relative_to(images_dir).as_posix()
-        title = f"[{i+1}/{len(images)}] {rel} | labels={len(labels)} | y=good n=bad q=quit"
+        mark = {"good": " [GOOD]", "bad": " [BAD]"}.get(verdicts.get(rel), "")
+        title = f"[{i+1}/{len(images)}] {rel}{mark} | labels={len(labels[i])} | y=good n=bad b=back q=quit"
         cv2.setWindowTitle(win, title)
         cv2.imshow(win, vis)
 
@@ -147,20 +260,33 @@ def main() -> int:
         if key in (ord("q"), 27):  # q or ESC
             break
         if key == ord("n"):
-            bad.append(rel)
-            i += 1
-            continue
-        if key == ord("y"):
-            i += 1
+            verdicts[rel] = "bad"
+            step = 1
+        elif key == ord("y"):
+            verdicts[rel] = "good"
+            step = 1
+        elif key == ord("f"):
+            step = 1
+        elif key == ord("b"):
+            step = -1
+        else:
+            # any other key: ignore and stay on same image
             continue
-        # any other key: ignore and stay on same image
+        i = max(0, i + step)
+        save_state(state_path, min(i, len(images) - 1), verdicts)
 
+    cache.close()
     cv2.destroyAllWindows()
 
+    bad = [r for r in rels if verdicts.get(r) == "bad"]
+    bad_path = dataset_file(dataset_root, BAD_LIST_NAME)
+    bad_path.write_text("".join(f"{p}\n" for p in bad))
+
     print("\n=== BAD LIST (relative to images/) ===")
     for p in bad:
         print(p)
-    print(f"=== TOTAL BAD: {len(bad)} / {len(images)} ===")
+    print(f"=== TOTAL BAD: {len(bad)} / {len(images)} (written to {bad_path}) ===")
+    print(f"Reviewed {len(verdicts)} / {len(images)}; state saved to {state_path}")
     return 0
 
 
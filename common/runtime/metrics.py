@@ -0,0 +1,236 @@
+"""
+metrics.py
+
+Minimal Prometheus-text metrics for the detection pipelines (no client library).
+
+Counters, gauges and fixed-bucket histograms are updated in the hot loop at the
+cost of a lock and an add; all formatting happens only when /metrics is scraped.
+Process CPU seconds and RSS are read at scrape time as well.
+
+Usage:
+  reg = Registry(prefix="ev_")
+  frames = reg.counter("frames_captured_total", "Frames read from the camera")
+  infer  = reg.histogram("stage_seconds", "Per-stage latency", labels={"stage": "inference"})
+  MetricsServer(reg, port=9108).start()       # curl localhost:9108/metrics
+
+  frames.inc()
+  infer.observe(dt_s)
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+# Seconds; covers ~1 ms .. 1 s, which spans capture, inference and display stages
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0)
+
+
+def _fmt_labels(labels: Optional[Dict[str, str]], extra: Optional[Dict[str, str]] = None) -> str:
+    items = dict(labels or {})
+    if extra:
+        items.update(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items.items()) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, labels=None):
+        self.labels = labels
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1.0):
+        with self._lock:
+            self._value += n
+
+    def samples(self, name):
+        return [f"{name}{_fmt_labels(self.labels)} {self._value}"]
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, labels=None):
+        self.labels = labels
+        self._value = 0.0
+
+    def set(self, v: float):
+        self._value = v
+
+    def samples(self, name):
+        return [f"{name}{_fmt_labels(self.labels)} {self._value}"]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, labels=None, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.labels = labels
+        self.bounds = list(buckets)
+        self._counts = [0] * (len(self.bounds) + 1)  # last slot = +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, v: float):
+        i = bisect.bisect_left(self.bounds, v)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += v
+
+    def samples(self, name):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        out = []
+        cum = 0
+        for bound, c in zip(self.bounds + [float("inf")], counts):
+            cum += c
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            out.append(f"{name}_bucket{_fmt_labels(self.labels, {'le': le})} {cum}")
+        out.append(f"{name}_sum{_fmt_labels(self.labels)} {total}")
+        out.append(f"{name}_count{_fmt_labels(self.labels)} {cum}")
+        return out
+
+
+class Registry:
+    def __init__(self, prefix: str = "ev_"):
+        self.prefix = prefix
+        self._families: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, cls, name, help_text, labels, **kw):
+        full = self.prefix + name
+        with self._lock:
+            fam = self._families.setdefault(full, {"kind": cls.kind, "help": help_text, "metrics": []})
+            m = cls(labels=labels, **kw)
+            fam["metrics"].append(m)
+        return m
+
+    def counter(self, name, help_text="", labels=None) -> Counter:
+        return self._add(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text="", labels=None) -> Gauge:
+        return self._add(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text="", labels=None, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram, name, help_text, labels, buckets=buckets)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            families = list(self._families.items())
+        for name, fam in families:
+            lines.append(f"# HELP {name} {fam['help']}")
+            lines.append(f"# TYPE {name} {fam['kind']}")
+            for m in fam["metrics"]:
+                lines.extend(m.samples(name))
+        lines.extend(process_samples(self.prefix))
+        return "\n".join(lines) + "\n"
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            # ru_maxrss is peak, in KiB on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            return None
+
+
+_START_TIME = time.time()
+
+
+def process_samples(prefix: str) -> List[str]:
+    t = os.times()
+    out = [
+        f"# HELP {prefix}process_cpu_seconds_total User + system CPU time of this process",
+        f"# TYPE {prefix}process_cpu_seconds_total counter",
+        f"{prefix}process_cpu_seconds_total {t.user + t.system}",
+        f"# HELP {prefix}process_uptime_seconds Seconds since the metrics module was loaded",
+        f"# TYPE {prefix}process_uptime_seconds gauge",
+        f"{prefix}process_uptime_seconds {time.time() - _START_TIME}",
+    ]
+    rss = _rss_bytes()
+    if rss is not None:
+        out += [
+            f"# HELP {prefix}process_resident_memory_bytes Resident set size",
+            f"# TYPE {prefix}process_resident_memory_bytes gauge",
+            f"{prefix}process_resident_memory_bytes {rss}",
+        ]
+    return out
+
+
+class MetricsServer:
+    """Serve registry.render() at http://<host>:<port>/metrics from a daemon thread."""
+
+    def __init__(self, registry: Registry, port: int = 9108, host: str = "127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # keep the console for the pipeline
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[metrics] Serving http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+
+class PipelineMetrics:
+    """The standard set of pipeline metrics, shared by all detection scripts."""
+
+    STAGES = ("capture", "inference", "track", "draw", "display", "total")
+
+    def __init__(self, registry: Optional[Registry] = None):
+        self.registry = registry or Registry()
+        r = self.registry
+        self.captured = r.counter("frames_captured_total", "Frames read from the source")
+        self.inferred = r.counter("frames_inferred_total", "Frames passed through the detector")
+        self.dropped = r.counter("frames_dropped_total", "Captured frames overwritten before inference")
+        self.detections = r.counter("detections_total", "Detections above the display threshold")
+        self.frame_gap = r.gauge("frames_per_inference",
+                                 "Frames captured since the previous inference (1 = none skipped)")
+        self.fps = r.gauge("fps", "Smoothed inference rate (frames/s)")
+        self.tracks = r.gauge("tracks_active", "Tracks reported by the multi-object tracker this frame")
+        self.stage = {
+            s: r.histogram("stage_seconds", "Per-stage latency in seconds", labels={"stage": s})
+            for s in self.STAGES
+        }
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> MetricsServer:
+        return MetricsServer(self.registry, port=port, host=host).start()
@@ -0,0 +1,170 @@
+"""
+profiler.py
+
+On-demand sampling profiler for the live detection loops.
+
+Nothing runs while the profiler is idle: toggling it (SIGUSR1 or a key press)
+starts a daemon thread that samples the Python stacks of every thread via
+sys._current_frames() at a fixed rate for N seconds, then writes
+
+    <out_dir>/profile_<timestamp>.folded   collapsed stacks (flamegraph.pl / speedscope)
+    <out_dir>/profile_<timestamp>.txt      per-function self/total sample table
+
+and prints the top of the table. Threads blocked in C code (inference, decode,
+cv2.waitKey) show up at the Python call that entered it.
+
+The sampler also records how late each of its own wake-ups was. The sampler
+needs the GIL to wake up, so large lateness means some thread is holding the
+GIL for long stretches.
+
+Usage:
+  prof = SamplingProfiler(out_dir, rate_hz=200, duration_s=10)
+  prof.install_signal()              # kill -USR1 <pid> toggles
+  ...
+  if key == ord("p"): prof.toggle()
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, out_dir, rate_hz: float = 200.0, duration_s: float = 10.0,
+                 label: str = "[profiler]"):
+        self.out_dir = Path(out_dir)
+        self.rate_hz = rate_hz
+        self.duration_s = duration_s
+        self.label = label
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def install_signal(self, signum=getattr(signal, "SIGUSR1", None)):
+        """Toggle on `signum` (default SIGUSR1). Must be called from the main thread."""
+        if signum is None:
+            return
+        signal.signal(signum, lambda *_: self.toggle())
+        print(f"{self.label} kill -{signal.Signals(signum).name[3:]} {os.getpid()} toggles profiling")
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self, duration_s: Optional[float] = None) -> bool:
+        if self.running:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(duration_s or self.duration_s,),
+            name="sampling-profiler", daemon=True,
+        )
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Ask a running capture to finish early; results are still written."""
+        self._stop.set()
+
+    # ------------------------------------------------------------
+
+    def _run(self, duration_s: float):
+        interval = 1.0 / self.rate_hz
+        me = threading.get_ident()
+        names = {}
+        stacks: Counter = Counter()
+        lateness_ms = []
+        n_samples = 0
+
+        print(f"{self.label} Sampling all threads at {self.rate_hz:.0f} Hz for {duration_s:.1f} s...")
+        t_start = time.perf_counter()
+        t_end = t_start + duration_s
+        t_next = t_start
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            if now >= t_end:
+                break
+            lateness_ms.append(max(0.0, now - t_next) * 1000.0)
+
+            frames = sys._current_frames()
+            if any(tid not in names for tid in frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in frames.items():
+                if tid == me:
+                    continue
+                parts = []
+                while frame is not None:
+                    parts.append(_frame_label(frame))
+                    frame = frame.f_back
+                parts.append(names.get(tid, f"thread-{tid}"))
+                stacks[";".join(reversed(parts))] += 1
+            n_samples += 1
+            del frames
+
+            t_next += interval
+            delay = t_next - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                t_next = time.perf_counter()
+
+        elapsed = time.perf_counter() - t_start
+        self._write(stacks, n_samples, elapsed, np.asarray(lateness_ms))
+
+    def _write(self, stacks: Counter, n_samples: int, elapsed: float, lateness_ms: np.ndarray):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        folded_path = self.out_dir / f"profile_{stamp}.folded"
+        table_path = self.out_dir / f"profile_{stamp}.txt"
+
+        folded_path.write_text("".join(f"{s} {n}\n" for s, n in stacks.most_common()))
+
+        # Self = leaf frame; total = frame anywhere in the stack (counted once per stack)
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, n in stacks.items():
+            frames = stack.split(";")
+            thread, funcs = frames[0], frames[1:]
+            if not funcs:
+                continue
+            self_counts[(thread, funcs[-1])] += n
+            for f in set(funcs):
+                total_counts[(thread, f)] += n
+
+        lines = [
+            f"samples: {n_samples} in {elapsed:.2f} s ({n_samples / max(elapsed, 1e-9):.1f} Hz)",
+            f"sampler lateness ms: mean {lateness_ms.mean() if lateness_ms.size else 0:.2f} "
+            f"p99 {np.percentile(lateness_ms, 99) if lateness_ms.size else 0:.2f} "
+            f"max {lateness_ms.max() if lateness_ms.size else 0:.2f}  (high = GIL held by another thread)",
+            "",
+            f"{'self%':>7}{'total%':>8}  {'thread':<20} function",
+        ]
+        denom = max(n_samples, 1)
+        for key, n_total in sorted(total_counts.items(), key=lambda kv: (-self_counts[kv[0]], -kv[1])):
+            thread, func = key
+            lines.append(f"{100.0 * self_counts[key] / denom:7.1f}{100.0 * n_total / denom:8.1f}  "
+                         f"{thread:<20} {func}")
+        table_path.write_text("\n".join(lines) + "\n")
+
+        print(f"{self.label} " + f"\n{self.label} ".join(lines[:2]))
+        print("\n".join(lines[3:23]))
+        print(f"{self.label} Wrote {folded_path} and {table_path}")
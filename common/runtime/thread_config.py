@@ -0,0 +1,111 @@
+"""
+thread_config.py
+
+CPU thread-count and core-affinity settings shared by the detection pipelines.
+
+The configuration is a small JSON file written by targets/nvidia/tune_threads.py:
+
+    {
+      "torch_threads": 3,        # torch intra-op threads (None = leave default)
+      "cv2_threads": 1,          # cv2.setNumThreads value (None = leave default)
+      "infer_cores": [1, 2, 3],  # cores for the main/inference/render thread
+      "capture_cores": [0]       # cores for the camera capture thread
+    }
+
+Any key may be missing or null, in which case that setting is left alone.
+Affinity is Linux-only; on other platforms pinning is silently skipped.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+import cv2
+
+try:
+    import torch
+except ImportError:  # OpenCV-DNN-only hosts
+    torch = None
+
+CONFIG_KEYS = ("torch_threads", "cv2_threads", "infer_cores", "capture_cores")
+
+
+def load_thread_config(path) -> Optional[dict]:
+    """Return the config dict stored at `path`, or None if the file does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    cfg = json.loads(path.read_text())
+    return {k: cfg.get(k) for k in CONFIG_KEYS}
+
+
+def save_thread_config(path, cfg: dict, extra: Optional[dict] = None):
+    """Write `cfg` (plus optional measurement info under "measured") to `path`."""
+    out = {k: cfg.get(k) for k in CONFIG_KEYS}
+    if extra:
+        out["measured"] = extra
+    Path(path).write_text(json.dumps(out, indent=2) + "\n")
+
+
+def _has_affinity() -> bool:
+    return hasattr(os, "sched_setaffinity")
+
+
+def set_process_affinity(cores: Optional[Iterable[int]]):
+    """
+    Pin every existing thread of this process to `cores`.
+
+    os.sched_setaffinity(0, ...) only affects the calling thread on Linux, so
+    already-running worker pools (torch intra-op, OpenCV) are pinned via their
+    task ids. Threads created afterwards inherit the mask of their creator.
+    """
+    if not cores or not _has_affinity():
+        return
+    mask = set(cores)
+    task_dir = Path("/proc/self/task")
+    tids = [int(p.name) for p in task_dir.iterdir()] if task_dir.exists() else [0]
+    for tid in tids:
+        try:
+            os.sched_setaffinity(tid, mask)
+        except OSError:
+            # Thread exited between listing and pinning
+            pass
+
+
+def pin_current_thread(cores: Optional[Iterable[int]]):
+    """Pin only the calling thread to `cores` (no-op if cores is empty/None)."""
+    if not cores or not _has_affinity():
+        return
+    os.sched_setaffinity(0, set(cores))
+
+
+def apply_thread_config(cfg: Optional[dict], label: str = "[thread_config]"):
+    """
+    Apply thread counts and pin the whole process to cfg["infer_cores"].
+
+    Call this once at startup from the main thread, before the capture thread is
+    started; the capture thread then calls pin_current_thread(cfg["capture_cores"]).
+    """
+    if not cfg:
+        print(f"{label} No thread config found, using library defaults.")
+        return
+
+    n_torch = cfg.get("torch_threads")
+    if n_torch and torch is not None:
+        torch.set_num_threads(int(n_torch))
+
+    n_cv2 = cfg.get("cv2_threads")
+    if n_cv2 is not None:
+        cv2.setNumThreads(int(n_cv2))
+
+    set_process_affinity(cfg.get("infer_cores"))
+
+    print(
+        f"{label} torch_threads={n_torch} cv2_threads={n_cv2} "
+        f"infer_cores={cfg.get('infer_cores')} capture_cores={cfg.get('capture_cores')} "
+        f"(main thread: {threading.current_thread().name})"
+    )
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Active-learning frame selector for capture folders.
+
+Streams every frame of a capture folder through the detector in batches and
+scores how informative it would be to label:
+
+  low_conf      1 - max confidence, for frames with at least one detection above
+                --low-conf (frames with nothing at all score 0 here)
+  near_thresh   number of boxes within --band of the operating threshold --conf
+  disagreement  |count(model A) - count(B)| at --conf, where B is --model2 or,
+                without it, the same model on the horizontally flipped frame
+
+  score = w_conf * low_conf + w_near * min(near_thresh, 5) / 5 + w_dis * min(disagreement, 5) / 5
+
+Only the best K * --pool-factor frames are kept (a heap), with a 64-bit pHash
+each, so memory does not grow with the folder; every frame's scores are
+streamed to scores.csv. The final pick walks the pool by score and skips
+frames within --min-hamming bits of one already picked (near-duplicate burst
+frames), until K frames or the labeling budget (--budget-min, estimated as
+--sec-per-frame + --sec-per-box * predicted boxes) is used up.
+
+Output (<out>, default <folder>/selected):
+  scores.csv      rel, score, terms, predicted boxes for every frame
+  selected.txt    chosen frames, best first
+  images/         copies of the chosen frames (with --copy), ready for autolabel_yolo.py / Label Studio
+
+Usage:
+  python3 select_frames.py /path/to/data007 --model best.pt --k 300
+  python3 select_frames.py data007 --model best.pt --model2 other.pt --budget-min 120 --copy
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import heapq
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from autolabel_yolo import find_images, iter_batches, load_model, result_array
+from dedup_yolo import hamming, phash
+
+NEAR_CAP = 5  # near-threshold / disagreement counts saturate here
+
+
+def frame_terms(a: np.ndarray, b: np.ndarray, conf: float, low_conf: float, band: float) -> Tuple[float, int, int, int]:
+    """(low_conf term, near-threshold count, count disagreement, predicted boxes) for one frame."""
+    ca, cb = a[:, 5], b[:, 5]
+    low = 1.0 - float(ca.max()) if np.any(ca >= low_conf) else 0.0
+    near = int(np.count_nonzero(np.abs(ca - conf) < band))
+    na, nb = int(np.count_nonzero(ca >= conf)), int(np.count_nonzero(cb >= conf))
+    return low, near, abs(na - nb), max(na, nb)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pick the most informative, diverse frames to label")
+    parser.add_argument("folder", help="Capture folder (flat images) or dataset root with images/")
+    parser.add_argument("--model", required=True, help="Ultralytics model")
+    parser.add_argument("--model2", default=None, help="Second model for disagreement (default: flip TTA)")
+    parser.add_argument("--k", type=int, default=300, help="Frames to select")
+    parser.add_argument("--budget-min", type=float, default=None, help="Labeling budget in minutes")
+    parser.add_argument("--sec-per-frame", type=float, default=5.0, help="Labeling cost per frame")
+    parser.add_argument("--sec-per-box", type=float, default=3.0, help="Labeling cost per predicted box")
+    parser.add_argument("--conf", type=float, default=0.25, help="Operating confidence threshold")
+    parser.add_argument("--low-conf", type=float, default=0.05, help="Prediction floor")
+    parser.add_argument("--band", type=float, default=0.1, help="Half-width of the near-threshold band")
+    parser.add_argument("--weights", type=float, nargs=3, default=(1.0, 1.0, 1.0),
+                        metavar=("CONF", "NEAR", "DIS"), help="Score weights")
+    parser.add_argument("--min-hamming", type=int, default=10, help="Min pHash distance between picked frames")
+    parser.add_argument("--pool-factor", type=int, default=5, help="Candidates kept = k * pool-factor")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8, help="Decode threads")
+    parser.add_argument("--out", default=None, help="Output folder (default: <folder>/selected)")
+    parser.add_argument("--copy", action="store_true", help="Copy the selected frames to <out>/images")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    root = Path(args.folder).expanduser().resolve()
+    images_dir = root / "images" if (root / "images").is_dir() else root
+    out = Path(args.out).expanduser().resolve() if args.out else root / "selected"
+    if not images_dir.is_dir():
+        print(f"ERROR: folder not found: {root}", file=sys.stderr)
+        return 2
+    images = [p for p in find_images(images_dir) if out not in p.parents]
+    if not images:
+        print(f"ERROR: no images found under: {images_dir}", file=sys.stderr)
+        return 2
+    out.mkdir(parents=True, exist_ok=True)
+
+    model = load_model(args.model)
+    model2 = load_model(args.model2) if args.model2 else None
+    w_conf, w_near, w_dis = args.weights
+    pool_size = args.k * args.pool_factor
+    pool: List[tuple] = []  # min-heap of (score, seq, rel, hash, boxes)
+    kw = dict(imgsz=args.imgsz, conf=args.low_conf, device=args.device, verbose=False)
+
+    t0 = time.perf_counter()
+    seen = 0
+    with (out / "scores.csv").open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rel", "score", "low_conf", "near_thresh", "disagreement", "pred_boxes"])
+        for paths, imgs in iter_batches(images, args.batch, args.workers):
+            ok = [(p, im) for p, im in zip(paths, imgs) if im is not None]
+            if not ok:
+                continue
+            frames = [im for _, im in ok]
+            res_a = model.predict(frames, **kw)
+            if model2 is not None:
+                res_b = model2.predict(frames, **kw)
+            else:
+                res_b = model.predict([cv2.flip(im, 1) for im in frames], **kw)
+
+            for (p, im), ra, rb in zip(ok, res_a, res_b):
+                rel = p.relative_to(images_dir).as_posix()
+                low, near, dis, n_boxes = frame_terms(result_array(ra), result_array(rb),
+                                                      args.conf, args.low_conf, args.band)
+                score = w_conf * low + w_near * min(near, NEAR_CAP) / NEAR_CAP + w_dis * min(dis, NEAR_CAP) / NEAR_CAP
+                writer.writerow([rel, f"{score:.4f}", f"{low:.4f}", near, dis, n_boxes])
+                seen += 1
+                if len(pool) < pool_size or score > pool[0][0]:
+                    h = phash(cv2.cvtColor(im, cv2.COLOR_BGR2GRAY))
+                    item = (score, seen, rel, h, n_boxes)
+                    if len(pool) < pool_size:
+                        heapq.heappush(pool, item)
+                    else:
+                        heapq.heapreplace(pool, item)
+
+            dt = time.perf_counter() - t0
+            print(f"[select_frames] {seen}/{len(images)} | {seen / max(dt, 1e-9):.1f} img/s", end="\r")
+    print()
+
+    # Greedy diverse pick under the budget
+    budget_s = args.budget_min * 60 if args.budget_min is not None else float("inf")
+    picked, picked_hashes, spent = [], np.zeros(0, np.uint64), 0.0
+    for score, _, rel, h, n_boxes in sorted(pool, key=lambda it: (-it[0], it[1])):
+        if len(picked) >= args.k:
+            break
+        if len(picked_hashes) and hamming(picked_hashes, np.uint64(h)).min() < args.min_hamming:
+            continue
+        cost = args.sec_per_frame + args.sec_per_box * n_boxes
+        if spent + cost > budget_s:
+            continue
+        spent += cost
+        picked.append((rel, score, n_boxes))
+        picked_hashes = np.append(picked_hashes, np.uint64(h))
+
+    (out / "selected.txt").write_text("".join(f"{rel} {score:.4f}\n" for rel, score, _ in picked))
+    if args.copy:
+        for rel, _, _ in picked:
+            dst = out / "images" / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(images_dir / rel, dst)
+
+    print(f"[select_frames] Selected {len(picked)} of {seen} frames "
+          f"(~{spent / 60:.0f} min of labeling) -> {out / 'selected.txt'} | {time.perf_counter() - t0:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+"""
+flow_assist.py
+
+Detector + optical-flow hybrid tracker: the detector runs every `every` frames
+(or sooner when the flow loses confidence); in between, every track box is
+propagated with sparse pyramidal Lucas-Kanade flow and fed to ByteTracker
+(mot.py) as a pseudo-detection, so track ids and the Kalman state carry on
+unchanged.
+
+Per track and flow frame:
+
+  window    box + margin on each side, the same window in the previous and
+            the current frame, converted to grayscale and downscaled (only
+            the window is touched, never the full frame)
+  features  Shi-Tomasi corners inside the box (previous frame)
+  flow      forward LK, backward LK; points with a forward-backward error
+            above fb_thresh are dropped
+  box       shifted by the median displacement, scaled by the median ratio
+            of point-to-centroid distances
+  conf      track score * fraction of surviving points
+
+When a propagated box falls below min_conf (or keeps fewer than min_points
+points) the detector is run on that frame instead, so the score decays with
+flow quality and a bad flow step costs one early detection, not a lost track.
+New (tentative) tracks are confirmed by ByteTracker on their second detection,
+so the frame after one appears is always a detector frame.
+
+Usage:
+  tracker = FlowAssistTracker(detect, every=5)     # detect(frame) -> (M, 6) [x1, y1, x2, y2, conf, cls]
+  for frame ...:
+      tracks = tracker.update(frame)               # (K, 7) [x1, y1, x2, y2, id, conf, cls]
+  print(tracker.stats)
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .mot import TENTATIVE, ByteTracker
+
+_MIN_ROI_PX = 24       # downscaled box side below which the window is not downscaled further
+
+
+class FlowAssistTracker:
+    def __init__(self, detect: Callable[[np.ndarray], np.ndarray], every: int = 5,
+                 min_conf: Optional[float] = None, min_points: int = 6, scale: float = 0.5,
+                 margin: float = 0.25, max_corners: int = 30, win: int = 11, levels: int = 2,
+                 fb_thresh: float = 1.0, tracker: Optional[ByteTracker] = None):
+        self.detect = detect
+        self.every = max(1, int(every))
+        self.tracker = tracker if tracker is not None else ByteTracker()
+        self.min_conf = min_conf if min_conf is not None else self.tracker.high_thresh
+        self.min_points = min_points
+        self.scale = scale
+        self.margin = margin
+        self.max_corners = max_corners
+        self.levels = levels
+        self.fb_thresh = fb_thresh
+        self._lk = dict(winSize=(win, win), maxLevel=levels,
+                        criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+        self._prev = None
+        self._tracks = np.zeros((0, 7))
+        self.since_detect = 0          # frames since the last detector run (0 = detected this frame)
+        self.stats = {"frames": 0, "detections": 0, "flow_frames": 0, "early_detections": 0,
+                      "flow_boxes": 0, "flow_failures": 0, "detect_s": 0.0, "flow_s": 0.0,
+                      "total_s": 0.0}
+
+    # ------------------------------------------------------------
+    # Flow propagation
+    # ------------------------------------------------------------
+
+    def _gray(self, img: np.ndarray, x0: int, y0: int, x1: int, y1: int, s: float) -> np.ndarray:
+        roi = img[y0:y1, x0:x1]
+        if roi.ndim == 3:
+            roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        if s != 1.0:
+            roi = cv2.resize(roi, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+        return roi
+
+    def propagate_box(self, prev: np.ndarray, frame: np.ndarray, box: np.ndarray) -> Tuple[np.ndarray, float, int]:
+        """Propagate one xyxy box from prev to frame; returns (box, fraction of points kept, points kept)."""
+        H, W = frame.shape[:2]
+        x1, y1, x2, y2 = box
+        bw, bh = x2 - x1, y2 - y1
+        if bw < 2 or bh < 2:
+            return box, 0.0, 0
+        s = min(1.0, max(self.scale, _MIN_ROI_PX / min(bw, bh)))
+        mx, my = self.margin * bw, self.margin * bh
+        x0, y0 = int(max(0, np.floor(x1 - mx))), int(max(0, np.floor(y1 - my)))
+        xe, ye = int(min(W, np.ceil(x2 + mx))), int(min(H, np.ceil(y2 + my)))
+        if xe - x0 < 8 or ye - y0 < 8:
+            return box, 0.0, 0
+        g0 = self._gray(prev, x0, y0, xe, ye, s)
+        g1 = self._gray(frame, x0, y0, xe, ye, s)
+
+        # Features inside the box only, not in the margin
+        mask = np.zeros_like(g0)
+        bx0, by0 = int(max(0, (x1 - x0) * s)), int(max(0, (y1 - y0) * s))
+        bx1, by1 = int(np.ceil((x2 - x0) * s)), int(np.ceil((y2 - y0) * s))
+        mask[by0:by1, bx0:bx1] = 255
+        p0 = cv2.goodFeaturesToTrack(g0, self.max_corners, 0.01, 3, mask=mask, blockSize=5)
+        if p0 is None or len(p0) < self.min_points:
+            return box, 0.0, 0
+
+        p1, st1, _ = cv2.calcOpticalFlowPyrLK(g0, g1, p0, None, **self._lk)
+        pb, st2, _ = cv2.calcOpticalFlowPyrLK(g1, g0, p1, None, **self._lk)
+        fb = np.linalg.norm((pb - p0).reshape(-1, 2), axis=1)
+        good = (st1.ravel() == 1) & (st2.ravel() == 1) & (fb < self.fb_thresh)
+        n = int(good.sum())
+        if n < self.min_points:
+            return box, n / len(p0), n
+
+        a, b = p0.reshape(-1, 2)[good], p1.reshape(-1, 2)[good]
+        d = np.median(b - a, axis=0) / s
+        ra = np.linalg.norm(a - a.mean(axis=0), axis=1)
+        rb = np.linalg.norm(b - b.mean(axis=0), axis=1)
+        ok = ra > 1.0
+        k = float(np.clip(np.median(rb[ok] / ra[ok]), 0.8, 1.25)) if ok.sum() >= 3 else 1.0
+        cx, cy = (x1 + x2) / 2 + d[0], (y1 + y2) / 2 + d[1]
+        hw, hh = bw * k / 2, bh * k / 2
+        return np.array([cx - hw, cy - hh, cx + hw, cy + hh]), n / len(p0), n
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+
+    def _run_detector(self, frame: np.ndarray) -> np.ndarray:
+        t0 = time.perf_counter()
+        dets = np.asarray(self.detect(frame), dtype=np.float64).reshape(-1, 6)
+        self.stats["detect_s"] += time.perf_counter() - t0
+        self.stats["detections"] += 1
+        self.since_detect = 0
+        return dets
+
+    def update(self, frame: np.ndarray) -> np.ndarray:
+        """Track one frame; returns (K, 7) [x1, y1, x2, y2, track_id, conf, cls] like ByteTracker.update."""
+        t_start = time.perf_counter()
+        self.stats["frames"] += 1
+        dets = None
+        pending = np.any(self.tracker.state == TENTATIVE)     # new tracks wait for a second detection
+        if self._prev is not None and self.since_detect + 1 < self.every and not pending:
+            t0 = time.perf_counter()
+            flow = np.zeros((len(self._tracks), 6))
+            weak = False
+            for i, trk in enumerate(self._tracks):
+                b, q, n = self.propagate_box(self._prev, frame, trk[:4])
+                flow[i] = (*b, trk[5] * q, trk[6])
+                if n < self.min_points or trk[5] * q < self.min_conf:
+                    weak = True
+                    self.stats["flow_failures"] += 1
+            self.stats["flow_s"] += time.perf_counter() - t0
+            self.stats["flow_boxes"] += len(flow)
+            if weak:
+                self.stats["early_detections"] += 1
+            else:
+                dets = flow
+                self.since_detect += 1
+                self.stats["flow_frames"] += 1
+        if dets is None:
+            dets = self._run_detector(frame)
+
+        self._tracks = self.tracker.update(dets)
+        self._prev = frame
+        self.stats["total_s"] += time.perf_counter() - t_start
+        return self._tracks
+
+    def summary(self) -> dict:
+        """Detector share, effective rates and per-call costs so far."""
+        s = self.stats
+        return {
+            "frames": s["frames"],
+            "detections": s["detections"],
+            "detect_fraction": s["detections"] / max(s["frames"], 1),
+            "early_detections": s["early_detections"],
+            "detect_ms": 1e3 * s["detect_s"] / max(s["detections"], 1),
+            "flow_ms_per_box": 1e3 * s["flow_s"] / max(s["flow_boxes"], 1),
+            "track_fps": s["frames"] / s["total_s"] if s["total_s"] > 0 else float("inf"),
+        }
@@ -0,0 +1,260 @@
+"""
+mot.py
+
+ByteTrack-style multi-object tracker with all track state in NumPy arrays.
+
+Tracks are rows of a few arrays (Kalman mean/covariance, id, class, score,
+state, frame counters) instead of per-track objects, so the per-frame cost is
+a handful of batched matrix ops regardless of the number of tracks:
+
+  predict   x = F x,  P = F P F^T + Q        for all tracks at once (batched matmul)
+  associate 1 - IoU cost matrix, linear assignment (scipy if available,
+            greedy otherwise), in the ByteTrack order:
+              1. confirmed tracks (tracked + lost) vs high-confidence detections
+              2. still-unmatched tracked tracks  vs low-confidence detections
+              3. tentative tracks               vs remaining high detections
+  update    batched Kalman gain via np.linalg.solve on the (n, 4, 4) innovations
+
+State is [cx, cy, w, h, vcx, vcy, vw, vh] in pixels; process/measurement
+noise scale with box height as in ByteTrack.
+
+Usage:
+  tracker = ByteTracker(frame_rate=30)
+  for frame ...:
+      dets = np.column_stack([xyxy, conf, cls])      # (M, 6)
+      tracks = tracker.update(dets)                  # (K, 7) [x1, y1, x2, y2, id, conf, cls]
+      draw_tracks(frame, tracks, names)
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # Jetson images without scipy fall back to greedy matching
+    linear_sum_assignment = None
+
+TENTATIVE, TRACKED, LOST = 0, 1, 2
+
+_STD_POS = 1.0 / 20
+_STD_VEL = 1.0 / 160
+
+_F = np.eye(8)
+_F[:4, 4:] = np.eye(4)
+
+
+def box_iou(a: np.ndarray, b: np.ndarray, eps: float = 1e-9) -> np.ndarray:
+    """Pairwise IoU of (N,4) and (M,4) xyxy boxes -> (N,M)."""
+    # Outer min/max per coordinate avoids the (N, M, 2) temporaries of the broadcast form
+    iw = np.minimum.outer(a[:, 2], b[:, 2]) - np.maximum.outer(a[:, 0], b[:, 0])
+    ih = np.minimum.outer(a[:, 3], b[:, 3]) - np.maximum.outer(a[:, 1], b[:, 1])
+    inter = np.maximum(iw, 0) * np.maximum(ih, 0)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + eps)
+
+
+def xyxy_to_xywh(b: np.ndarray) -> np.ndarray:
+    return np.column_stack([(b[:, 0] + b[:, 2]) / 2, (b[:, 1] + b[:, 3]) / 2, b[:, 2] - b[:, 0], b[:, 3] - b[:, 1]])
+
+
+def xywh_to_xyxy(b: np.ndarray) -> np.ndarray:
+    return np.column_stack([b[:, 0] - b[:, 2] / 2, b[:, 1] - b[:, 3] / 2, b[:, 0] + b[:, 2] / 2, b[:, 1] + b[:, 3] / 2])
+
+
+def assign(cost: np.ndarray, thresh: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Row/col indices of matched pairs with cost <= thresh."""
+    if cost.size == 0:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    if linear_sum_assignment is not None:
+        r, c = linear_sum_assignment(np.where(cost > thresh, thresh + 1e3, cost))
+        ok = cost[r, c] <= thresh
+        return r[ok], c[ok]
+    # Greedy: take pairs in order of increasing cost
+    order = np.argsort(cost, axis=None)
+    order = order[cost.flat[order] <= thresh]
+    rows, cols = np.unravel_index(order, cost.shape)
+    used_r = np.zeros(cost.shape[0], bool)
+    used_c = np.zeros(cost.shape[1], bool)
+    out_r, out_c = [], []
+    for r, c in zip(rows.tolist(), cols.tolist()):
+        if not used_r[r] and not used_c[c]:
+            used_r[r] = used_c[c] = True
+            out_r.append(r)
+            out_c.append(c)
+    return np.asarray(out_r, np.int64), np.asarray(out_c, np.int64)
+
+
+class ByteTracker:
+    def __init__(self, high_thresh: float = 0.5, low_thresh: float = 0.1, new_track_thresh: Optional[float] = None,
+                 match_thresh: float = 0.8, track_buffer: int = 30, frame_rate: float = 30.0,
+                 class_aware: bool = False):
+        self.high_thresh = high_thresh
+        self.low_thresh = low_thresh
+        self.new_track_thresh = new_track_thresh if new_track_thresh is not None else high_thresh + 0.1
+        self.match_thresh = match_thresh
+        self.max_lost = int(round(frame_rate / 30.0 * track_buffer))
+        self.class_aware = class_aware
+
+        self.mean = np.zeros((0, 8))
+        self.cov = np.zeros((0, 8, 8))
+        self.ids = np.zeros(0, np.int64)
+        self.cls = np.zeros(0, np.int64)
+        self.score = np.zeros(0)
+        self.state = np.zeros(0, np.int8)
+        self.last_frame = np.zeros(0, np.int64)
+        self.frame = 0
+        self._next_id = 1
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ------------------------------------------------------------
+    # Kalman filter (batched)
+    # ------------------------------------------------------------
+
+    def _predict(self):
+        if not len(self):
+            return
+        h = self.mean[:, 3]
+        std = np.column_stack([_STD_POS * h] * 2 + [_STD_POS * h] * 2 + [_STD_VEL * h] * 4)
+        # Lost tracks keep coasting but their size velocity is frozen, as in ByteTrack
+        lost = self.state != TRACKED
+        self.mean[lost, 6:8] = 0
+        self.mean = self.mean @ _F.T
+        Q = np.zeros_like(self.cov)
+        Q[:, np.arange(8), np.arange(8)] = std ** 2
+        self.cov = _F @ self.cov @ _F.T + Q
+
+    def _update(self, idx: np.ndarray, z: np.ndarray):
+        """Kalman update of tracks idx with measurements z (n, 4) [cx, cy, w, h]."""
+        if not len(idx):
+            return
+        x, P = self.mean[idx], self.cov[idx]
+        h = x[:, 3]
+        R = np.zeros((len(idx), 4, 4))
+        R[:, np.arange(4), np.arange(4)] = (_STD_POS * h[:, None]) ** 2
+        PHt = P[:, :, :4]                               # P H^T
+        S = P[:, :4, :4] + R                            # H P H^T + R
+        K = np.linalg.solve(S, PHt.transpose(0, 2, 1)).transpose(0, 2, 1)
+        y = z - x[:, :4]
+        self.mean[idx] = x + np.einsum("nij,nj->ni", K, y)
+        self.cov[idx] = P - np.einsum("nij,njk->nik", K, P[:, :4, :])
+
+    # ------------------------------------------------------------
+    # Track bookkeeping
+    # ------------------------------------------------------------
+
+    def _spawn(self, dets: np.ndarray, confirmed: bool):
+        n = len(dets)
+        if not n:
+            return
+        z = xyxy_to_xywh(dets[:, :4])
+        mean = np.zeros((n, 8))
+        mean[:, :4] = z
+        h = z[:, 3:4]
+        std = np.hstack([2 * _STD_POS * h] * 4 + [10 * _STD_VEL * h] * 4)
+        cov = np.zeros((n, 8, 8))
+        cov[:, np.arange(8), np.arange(8)] = std ** 2
+        self.mean = np.vstack([self.mean, mean])
+        self.cov = np.concatenate([self.cov, cov])
+        self.ids = np.concatenate([self.ids, np.arange(self._next_id, self._next_id + n)])
+        self._next_id += n
+        self.cls = np.concatenate([self.cls, dets[:, 5].astype(np.int64)])
+        self.score = np.concatenate([self.score, dets[:, 4]])
+        self.state = np.concatenate([self.state, np.full(n, TRACKED if confirmed else TENTATIVE, np.int8)])
+        self.last_frame = np.concatenate([self.last_frame, np.full(n, self.frame, np.int64)])
+
+    def _keep(self, mask: np.ndarray):
+        for name in ("mean", "cov", "ids", "cls", "score", "state", "last_frame"):
+            setattr(self, name, getattr(self, name)[mask])
+
+    def _match(self, trk_idx: np.ndarray, dets: np.ndarray, det_idx: np.ndarray, thresh: float, fuse: bool = True):
+        """Associate tracks trk_idx with dets[det_idx]; updates matched tracks, returns unmatched of both."""
+        if not len(trk_idx) or not len(det_idx):
+            return trk_idx, det_idx
+        d = dets[det_idx]
+        iou = box_iou(xywh_to_xyxy(self.mean[trk_idx, :4]), d[:, :4])
+        if self.class_aware:
+            iou[self.cls[trk_idx][:, None] != d[None, :, 5].astype(np.int64)] = 0.0
+        # Fuse detection confidence into the similarity (ByteTrack "fuse_score")
+        cost = 1.0 - (iou * d[None, :, 4] if fuse else iou)
+        r, c = assign(cost, thresh)
+        ti, di = trk_idx[r], det_idx[c]
+        self._update(ti, xyxy_to_xywh(dets[di, :4]))
+        self.score[ti] = dets[di, 4]
+        self.cls[ti] = dets[di, 5].astype(np.int64)
+        self.state[ti] = TRACKED
+        self.last_frame[ti] = self.frame
+        um_t = np.setdiff1d(trk_idx, ti, assume_unique=True)
+        um_d = np.setdiff1d(det_idx, di, assume_unique=True)
+        return um_t, um_d
+
+    # ------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------
+
+    def update(self, dets: np.ndarray) -> np.ndarray:
+        """
+        dets: (M, 6) [x1, y1, x2, y2, conf, cls] in pixels.
+        Returns (K, 7) [x1, y1, x2, y2, track_id, conf, cls] for tracks updated this frame.
+        """
+        self.frame += 1
+        dets = np.asarray(dets, dtype=np.float64).reshape(-1, 6)
+        conf = dets[:, 4]
+        high = np.nonzero(conf >= self.high_thresh)[0]
+        low = np.nonzero((conf >= self.low_thresh) & (conf < self.high_thresh))[0]
+
+        self._predict()
+        confirmed = np.nonzero(self.state != TENTATIVE)[0]
+        tentative = np.nonzero(self.state == TENTATIVE)[0]
+
+        # 1. confirmed (tracked + lost) vs high detections
+        um_trk, um_high = self._match(confirmed, dets, high, self.match_thresh)
+        # 2. tracks that were tracked last frame vs low detections (no fused score, IoU only)
+        um_rest, _ = self._match(um_trk[self.state[um_trk] == TRACKED], dets, low, 0.5, fuse=False)
+        # 3. tentative vs remaining high detections; unmatched tentative tracks die
+        um_tent, um_high = self._match(tentative, dets, um_high, 0.7)
+
+        self.state[um_rest] = LOST
+        updated = self.last_frame == self.frame
+        alive = np.ones(len(self), bool)
+        alive[um_tent] = False
+        alive &= (self.frame - self.last_frame) <= self.max_lost
+        self._keep(alive)
+        updated = updated[alive]
+
+        # New tracks from confident unmatched detections (confirmed immediately on the first frame)
+        new = um_high[conf[um_high] >= self.new_track_thresh]
+        n_before = len(self)
+        self._spawn(dets[new], confirmed=self.frame == 1)
+        updated = np.concatenate([updated, np.full(len(self) - n_before, self.frame == 1)])
+
+        out = updated & (self.state == TRACKED)
+        return np.column_stack([
+            xywh_to_xyxy(self.mean[out, :4]), self.ids[out], self.score[out], self.cls[out]
+        ]) if out.any() else np.zeros((0, 7))
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "tracked": int(np.count_nonzero(self.state == TRACKED)),
+            "lost": int(np.count_nonzero(self.state == LOST)),
+            "tentative": int(np.count_nonzero(self.state == TENTATIVE)),
+        }
+
+
+def draw_tracks(img: np.ndarray, tracks: np.ndarray, names=None) -> np.ndarray:
+    """Draw (K, 7) tracker output in place; the colour follows the track id."""
+    for x1, y1, x2, y2, tid, conf, c in tracks:
+        tid = int(tid)
+        color = tuple(int(v) for v in ((tid * 47) % 255, (tid * 97) % 255, (tid * 157) % 255))
+        p1, p2 = (int(x1), int(y1)), (int(x2), int(y2))
+        cv2.rectangle(img, p1, p2, color, 2)
+        name = names[int(c)] if names is not None else str(int(c))
+        cv2.putText(img, f"#{tid} {name} {conf:.2f}", (p1[0], max(p1[1] - 6, 12)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+    return img
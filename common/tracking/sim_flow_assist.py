@@ -0,0 +1,240 @@
+"""
+sim_flow_assist.py
+
+Effective track rate and drift of FlowAssistTracker (flow_assist.py) against
+per-frame detection.
+
+Pass 1 runs the detector on every frame and records its output and latency;
+that is the per-frame reference (and, fed to a plain ByteTracker, the
+"every=1" row). Each hybrid run then replays the recorded detections with
+the recorded latency whenever it asks for the detector, so every row pays the
+real detector cost only on the frames where it actually detects.
+
+Sources
+  synthetic (default)  textured objects moving/scaling over a panning textured
+                       background; the detector is ground truth + 1.5 px noise,
+                       5 % misses, with a modeled latency (--det-ms)
+  --video + --model    recorded video and a YOLO ONNX export run with cv2.dnn
+
+Reported per --every: detector calls per frame, early (confidence-triggered)
+detections, effective track rate (frames / tracker wall time incl. detector),
+flow cost per box, and drift against the per-frame detections: mean IoU,
+center error and recall at IoU 0.5, overall and by frames since the last
+detection.
+
+Usage:
+  python3 sim_flow_assist.py
+  python3 sim_flow_assist.py --every 3 5 10 --det-ms 120
+  python3 sim_flow_assist.py --video flight.mp4 --model ../yolov8n.onnx --frames 600
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+from tracking.flow_assist import FlowAssistTracker
+from tracking.mot import ByteTracker, assign, box_iou
+
+W, H = 960, 540
+
+# ------------------------------------------------------------
+# Frame sources
+# ------------------------------------------------------------
+
+def synthetic_frames(n, seed=0):
+    """Yields (frame, gt (K, 4) xyxy); deterministic for a given seed."""
+    rng = np.random.default_rng(seed)
+    bg = cv2.GaussianBlur(rng.integers(0, 256, (H + 200, W + 200, 3), dtype=np.uint8), (0, 0), 3)
+    bg = cv2.normalize(bg, None, 40, 200, cv2.NORM_MINMAX)
+    objs = []
+    for k in range(6):
+        size = rng.uniform(40, 120, 2)
+        patch = cv2.GaussianBlur(rng.integers(0, 256, (int(size[1]), int(size[0]), 3), dtype=np.uint8), (0, 0), 1.2)
+        objs.append({
+            "patch": patch,
+            "p": rng.uniform([100, 80], [W - 200, H - 160]),
+            "v": rng.uniform(-4, 4, 2),
+            "phase": rng.uniform(0, 2 * np.pi),
+            "start": 0 if k < 5 else n // 3,          # one object enters later
+        })
+    for i in range(n):
+        ox = int(100 + 60 * np.sin(2 * np.pi * i / 240))
+        oy = int(100 + 30 * np.sin(2 * np.pi * i / 180))
+        frame = bg[oy:oy + H, ox:ox + W].copy()
+        gt = []
+        for o in objs:
+            if i < o["start"]:
+                continue
+            o["p"] += o["v"] + 1.5 * np.array([np.cos(0.05 * i + o["phase"]), np.sin(0.04 * i + o["phase"])])
+            ph, pw = o["patch"].shape[:2]
+            k = 1 + 0.15 * np.sin(0.02 * i + o["phase"])
+            pw, ph = int(pw * k), int(ph * k)
+            for a, lim, sz in ((0, W, pw), (1, H, ph)):
+                if not 0 <= o["p"][a] <= lim - sz:
+                    o["v"][a] = -o["v"][a]
+                    o["p"][a] = np.clip(o["p"][a], 0, lim - sz)
+            x, y = int(o["p"][0]), int(o["p"][1])
+            frame[y:y + ph, x:x + pw] = cv2.resize(o["patch"], (pw, ph), interpolation=cv2.INTER_LINEAR)
+            gt.append((x, y, x + pw, y + ph))
+        yield frame, np.array(gt, float).reshape(-1, 4)
+
+
+def synthetic_detector(det_ms, seed=1):
+    rng = np.random.default_rng(seed)
+
+    def detect(frame, gt):
+        time.sleep(det_ms / 1e3)
+        keep = rng.random(len(gt)) > 0.05
+        b = gt[keep] + rng.normal(0, 1.5, (int(keep.sum()), 4))
+        return np.column_stack([b, rng.uniform(0.7, 0.95, len(b)), np.zeros(len(b))])
+
+    return detect
+
+
+def video_frames(path, n):
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video {path}")
+    for _ in range(n):
+        ok, frame = cap.read()
+        if not ok:
+            break
+        yield frame, None
+    cap.release()
+
+
+def onnx_detector(model_path, imgsz=640, conf=0.25, iou=0.45):
+    """YOLOv8/11 ONNX export via cv2.dnn (square top-left padding as in opencv_inference/util.py)."""
+    net = cv2.dnn.readNetFromONNX(str(model_path))
+
+    def detect(frame, _gt=None):
+        h, w = frame.shape[:2]
+        length = max(h, w)
+        square = np.zeros((length, length, 3), np.uint8)
+        square[:h, :w] = frame
+        net.setInput(cv2.dnn.blobFromImage(square, scalefactor=1 / 255, size=(imgsz, imgsz), swapRB=True))
+        out = net.forward()[0].T                              # (N, 4 + nc)
+        scores = out[:, 4:]
+        cls = scores.argmax(axis=1)
+        sc = scores[np.arange(len(out)), cls]
+        ok = sc >= conf
+        xywh = out[ok, :4] * (length / imgsz)
+        boxes = np.column_stack([xywh[:, 0] - xywh[:, 2] / 2, xywh[:, 1] - xywh[:, 3] / 2, xywh[:, 2], xywh[:, 3]])
+        keep = np.asarray(cv2.dnn.NMSBoxes(boxes.tolist(), sc[ok].tolist(), conf, iou), int).reshape(-1)
+        b = boxes[keep]
+        return np.column_stack([b[:, 0], b[:, 1], b[:, 0] + b[:, 2], b[:, 1] + b[:, 3], sc[ok][keep], cls[ok][keep]])
+
+    return detect
+
+# ------------------------------------------------------------
+# Evaluation
+# ------------------------------------------------------------
+
+def match_stats(tracks, ref, min_conf):
+    """Greedy/Hungarian IoU match of tracks to confident reference detections: (ious, center errs, n_ref)."""
+    ref = ref[ref[:, 4] >= min_conf]
+    if not len(ref) or not len(tracks):
+        return np.zeros(0), np.zeros(0), len(ref)
+    iou = box_iou(tracks[:, :4], ref[:, :4])
+    r, c = assign(1.0 - iou, 0.9)
+    ct = (tracks[r, :2] + tracks[r, 2:4]) / 2
+    cr = (ref[c, :2] + ref[c, 2:4]) / 2
+    return iou[r, c], np.linalg.norm(ct - cr, axis=1), len(ref)
+
+
+def run(frames, detect_replay, every, ref_dets, high_thresh):
+    i_frame = [0]
+
+    def detect(_frame):
+        return detect_replay(i_frame[0])
+
+    trk = FlowAssistTracker(detect, every=every, tracker=ByteTracker(high_thresh=high_thresh))
+    per_age = {}
+    for i, (frame, _) in enumerate(frames):
+        i_frame[0] = i
+        tracks = trk.update(frame)
+        ious, errs, n_ref = match_stats(tracks, ref_dets[i], high_thresh)
+        a = per_age.setdefault(trk.since_detect, [[], [], 0])
+        a[0].append(ious)
+        a[1].append(errs)
+        a[2] += n_ref
+    return trk.summary(), {k: (np.concatenate(v[0]), np.concatenate(v[1]), v[2]) for k, v in sorted(per_age.items())}
+
+
+def drift_row(ious, errs, n_ref):
+    recall = np.count_nonzero(ious >= 0.5) / max(n_ref, 1)
+    return (ious.mean() if len(ious) else np.nan, errs.mean() if len(errs) else np.nan, recall)
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Flow-assisted tracking: effective rate and drift vs per-frame detection")
+    parser.add_argument("--video", default=None, help="Recorded video (default: synthetic scene)")
+    parser.add_argument("--model", default=None, help="YOLO ONNX model for --video")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--every", type=int, nargs="+", default=[3, 5, 10], help="Detector period(s) to evaluate")
+    parser.add_argument("--det-ms", type=float, default=60.0, help="Modeled detector latency (synthetic) [ms]")
+    parser.add_argument("--conf", type=float, default=0.5, help="Track / reference confidence threshold")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if args.video:
+        if not args.model:
+            raise SystemExit("[sim_flow_assist] --video needs --model (YOLO ONNX)")
+        detector = onnx_detector(args.model, args.imgsz)
+        frames = lambda: video_frames(args.video, args.frames)  # noqa: E731
+        src = args.video
+    else:
+        detector = synthetic_detector(args.det_ms, args.seed + 1)
+        frames = lambda: synthetic_frames(args.frames, args.seed)  # noqa: E731
+        src = f"synthetic {W}x{H}, detector {args.det_ms:.0f} ms"
+
+    # Pass 1: per-frame detection (reference) and its latency
+    ref_dets, ref_lat = [], []
+    for frame, gt in frames():
+        t0 = time.perf_counter()
+        ref_dets.append(np.asarray(detector(frame, gt), float).reshape(-1, 6))
+        ref_lat.append(time.perf_counter() - t0)
+    n = len(ref_dets)
+    print(f"[sim_flow_assist] {src}: {n} frames, detector {1e3 * np.mean(ref_lat):.1f} ms/frame")
+
+    def replay(i):
+        time.sleep(ref_lat[i])
+        return ref_dets[i]
+
+    print(f"\n{'every':>5} {'det/frame':>9} {'early':>6} {'track fps':>9} {'det ms':>7} {'flow ms/box':>11} "
+          f"{'IoU':>6} {'ctr px':>7} {'recall':>7}")
+    drift = {}
+    for every in [1] + [k for k in args.every if k > 1]:
+        s, per_age = run(frames(), replay, every, ref_dets, args.conf)
+        ious = np.concatenate([v[0] for v in per_age.values()])
+        errs = np.concatenate([v[1] for v in per_age.values()])
+        iou_m, err_m, rec = drift_row(ious, errs, sum(v[2] for v in per_age.values()))
+        print(f"{every:5d} {s['detect_fraction']:9.2f} {s['early_detections']:6d} {s['track_fps']:9.1f} "
+              f"{s['detect_ms']:7.1f} {s['flow_ms_per_box']:11.2f} {iou_m:6.3f} {err_m:7.2f} {rec:7.1%}")
+        drift[every] = per_age
+
+    k = max(drift)
+    print(f"\n=== DRIFT vs frames since detection (every={k}) ===")
+    print(f"{'age':>3} {'dets':>6} {'IoU':>6} {'ctr px':>7} {'recall':>7}")
+    for age, (ious, errs, n_ref) in drift[k].items():
+        iou_m, err_m, rec = drift_row(ious, errs, n_ref)
+        print(f"{age:3d} {n_ref:6d} {iou_m:6.3f} {err_m:7.2f} {rec:7.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
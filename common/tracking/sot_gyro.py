@@ -0,0 +1,323 @@
+"""
+sot_gyro.py
+
+Single-object tracker (image plane) propagated by camera gyro between images.
+
+State x = [u, v, du, dv]: target pixel position and its own apparent velocity
+(px/s), i.e. image motion not explained by camera rotation. Each gyro sample
+(t_k, w_k) in the camera frame (x right, y down, z forward, rad/s) advances the
+state over (t_{k-1}, t_k] with the rotational image flow of a distant point
+
+    du_rot = f * ( x*y*wx - (1 + x^2)*wy + y*wz )
+    dv_rot = f * ( (1 + y^2)*wx - x*y*wy - x*wz )      x, y = normalized coords
+
+plus the constant-velocity model; images are position measurements.
+
+Sensors arrive on two thread-safe queues (push_gyro / push_image, any
+producer thread); process() drains them on the tracker thread:
+
+  - gyro samples go into a preallocated ring buffer and the state is propagated
+    through each one; F and Q for the nominal gyro period are precomputed and
+    the covariance is updated into preallocated buffers (no per-sample arrays),
+  - a (t, x, P) snapshot is stored per gyro sample (history_s deep) and
+    refreshed after every image applied at the head of the stream, and the
+    applied images are kept in time order; a delayed or out-of-order image
+    rolls back to the newest snapshot before its timestamp and replays the
+    later gyro samples and images (including itself) in time order,
+  - images newer than the latest gyro sample wait for the gyro to catch up,
+    unless the gyro lags the newest image by more than dt_max (gyro dropout),
+    in which case they are applied with constant-velocity propagation.
+
+Time guardrail: the filter time never passes the latest processed sensor
+time, and state_at(t) extrapolates at most dt_max past it (clamped=True when
+the request was further ahead).
+
+See sim_sot_gyro.py for a simulated gyro/image stream test.
+"""
+
+from __future__ import annotations
+
+import bisect
+import queue
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+DT_MAX = 0.5  # s; Pivot 7 guardrail
+
+
+class GyroSOT:
+    def __init__(self, f_px: float, cx: float, cy: float, gyro_rate_hz: float = 1000.0,
+                 dt_max: float = DT_MAX, history_s: float = 1.0, accel_std: float = 50.0,
+                 gyro_std: float = 0.005, meas_std: float = 2.0):
+        self.f, self.cx, self.cy = float(f_px), float(cx), float(cy)
+        self.dt_max = dt_max
+        self.history_s = history_s
+        self.accel_var = accel_std ** 2
+        self.gyro_var = gyro_std ** 2
+        self.meas_var = meas_std ** 2
+
+        self.gyro_q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self.image_q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._pending: List[Tuple[float, float, float, float]] = []  # images waiting for gyro
+        self._applied: List[Tuple[float, float, float, float]] = []  # applied images, time-ordered
+
+        # Ring buffers: gyro samples and the filter snapshot taken after each one
+        n = int(history_s * gyro_rate_hz * 1.25) + 16
+        self._n = n
+        self._head = -1                     # index of the newest sample
+        self._count = 0
+        self._gt = np.full(n, -np.inf)
+        self._gw = np.zeros((n, 3))
+        self._ht = np.full(n, np.inf)       # snapshot time (inf = no snapshot)
+        self._hx = np.zeros((n, 4))
+        self._hP = np.zeros((n, 4, 4))
+
+        self.x = np.zeros(4)
+        self.P = np.diag([meas_std ** 2, meas_std ** 2, 100.0 ** 2, 100.0 ** 2])
+        self.t: Optional[float] = None      # filter time (None until the first image)
+        self.t_gyro = -np.inf               # newest gyro sample time
+        self.t_image = -np.inf              # newest image time seen
+        self.t_confirmed = -np.inf          # newest processed sensor time
+
+        # Precomputed discrete-time matrices for the nominal gyro period
+        self.dt_nom = 1.0 / gyro_rate_hz
+        self._F_nom = self._make_F(self.dt_nom)
+        self._Q_nom = self._make_Q(self.dt_nom)
+        self._F = np.eye(4)
+        self._Q = np.zeros((4, 4))
+        self._tmp = np.zeros((4, 4))
+
+        self.stats = {"gyro": 0, "images": 0, "replays": 0, "replayed_samples": 0,
+                      "dropped_old": 0, "no_gyro_updates": 0, "clamped": 0}
+
+    # ------------------------------------------------------------
+    # Producer side (any thread)
+    # ------------------------------------------------------------
+
+    def push_gyro(self, t: float, wx: float, wy: float, wz: float):
+        self.gyro_q.put((t, wx, wy, wz))
+
+    def push_image(self, t: float, u: float, v: float, conf: float = 1.0):
+        self.image_q.put((t, u, v, conf))
+
+    # ------------------------------------------------------------
+    # Discrete-time model
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _make_F(dt, out=None):
+        F = np.eye(4) if out is None else out
+        F[0, 2] = F[1, 3] = dt
+        return F
+
+    def _make_Q(self, dt, out=None):
+        Q = np.zeros((4, 4)) if out is None else out
+        q = self.accel_var
+        a, b, c = q * dt ** 3 / 3, q * dt ** 2 / 2, q * dt
+        Q[0, 0] = Q[1, 1] = a
+        Q[0, 2] = Q[2, 0] = Q[1, 3] = Q[3, 1] = b
+        Q[2, 2] = Q[3, 3] = c
+        return Q
+
+    def _propagate(self, dt: float, wx: float, wy: float, wz: float):
+        if dt <= 0.0:
+            return
+        f = self.f
+        u, v, du, dv = self.x.tolist()
+        xn, yn = (u - self.cx) / f, (v - self.cy) / f
+        # Flow Jacobian d(du_rot, dv_rot)/dw
+        g00, g01, g02 = f * xn * yn, -f * (1.0 + xn * xn), f * yn
+        g10, g11, g12 = f * (1.0 + yn * yn), -f * xn * yn, -f * xn
+        self.x[0] = u + (du + g00 * wx + g01 * wy + g02 * wz) * dt
+        self.x[1] = v + (dv + g10 * wx + g11 * wy + g12 * wz) * dt
+
+        P = self.P
+        if abs(dt - self.dt_nom) < 1e-9:
+            F, Q = self._F_nom, self._Q_nom
+        else:
+            F, Q = self._make_F(dt, self._F), self._make_Q(dt, self._Q)
+        np.matmul(F, P, out=self._tmp)
+        np.matmul(self._tmp, F.T, out=P)
+        P += Q
+        # Gyro noise maps into position through the flow Jacobian
+        c = self.gyro_var * dt * dt
+        b = (g00 * g10 + g01 * g11 + g02 * g12) * c
+        P[0, 0] += (g00 * g00 + g01 * g01 + g02 * g02) * c
+        P[0, 1] += b
+        P[1, 0] += b
+        P[1, 1] += (g10 * g10 + g11 * g11 + g12 * g12) * c
+        self.t += dt
+
+    def _update(self, u: float, v: float, conf: float):
+        P = self.P
+        r = self.meas_var / max(conf, 1e-3)
+        S = P[:2, :2] + r * np.eye(2)
+        K = P[:, :2] @ np.linalg.inv(S)
+        y = np.array([u - self.x[0], v - self.x[1]])
+        self.x += K @ y
+        P -= K @ P[:2, :]
+
+    # ------------------------------------------------------------
+    # History
+    # ------------------------------------------------------------
+
+    def _snapshot(self, i: int):
+        self._ht[i] = self.t
+        self._hx[i] = self.x
+        self._hP[i] = self.P
+
+    def _indices_after(self, t: float) -> List[int]:
+        """Ring indices of gyro samples with time > t, oldest first."""
+        out = []
+        i = self._head
+        for _ in range(self._count):
+            if self._gt[i] <= t:
+                break
+            out.append(i)
+            i = (i - 1) % self._n
+        return out[::-1]
+
+    def _rollback_base(self, t: float) -> Tuple[Optional[int], List[int]]:
+        """Newest snapshot strictly before t and the ring indices after it (oldest first)."""
+        later = []
+        i = self._head
+        for _ in range(self._count):
+            if self._ht[i] < t:
+                return i, later[::-1]
+            later.append(i)
+            i = (i - 1) % self._n
+        return None, later[::-1]
+
+    def _replay(self, idx: List[int]):
+        """Re-propagate gyro samples idx and re-apply the stored images after self.t, in time order."""
+        j = bisect.bisect_right(self._applied, (self.t, np.inf))
+        imgs = self._applied
+        for i in idx:
+            gt = self._gt[i]
+            w = self._gw[i].tolist()
+            while j < len(imgs) and imgs[j][0] <= gt:
+                self._propagate(imgs[j][0] - self.t, *w)
+                self._update(*imgs[j][1:])
+                j += 1
+            self._propagate(gt - self.t, *w)
+            self._snapshot(i)
+        for m in imgs[j:]:
+            # Images past the newest gyro sample were applied with constant velocity (gyro dropout)
+            self._propagate(m[0] - self.t, 0.0, 0.0, 0.0)
+            self._update(*m[1:])
+        if j < len(imgs) and self._count:
+            self._snapshot(self._head)
+        self.stats["replayed_samples"] += len(idx)
+
+    def _store_image(self, m: Tuple[float, float, float, float]):
+        bisect.insort(self._applied, m)
+        horizon = self.t_confirmed - 1.25 * self.history_s
+        if self._applied[0][0] < horizon:
+            self._applied = self._applied[bisect.bisect_left(self._applied, (horizon,)):]
+
+    # ------------------------------------------------------------
+    # Consumer side (tracker thread)
+    # ------------------------------------------------------------
+
+    def _add_gyro(self, t, wx, wy, wz):
+        if t <= self.t_gyro:
+            return  # gyro must be monotonic; drop repeats
+        self._head = (self._head + 1) % self._n
+        self._count = min(self._count + 1, self._n)
+        i = self._head
+        self._gt[i] = t
+        self._gw[i, 0], self._gw[i, 1], self._gw[i, 2] = wx, wy, wz
+        self.t_gyro = t
+        self.stats["gyro"] += 1
+        if self.t is not None:
+            self._propagate(t - self.t, wx, wy, wz)
+            self._snapshot(i)
+            self.t_confirmed = max(self.t_confirmed, t)
+
+    def _apply_image(self, t, u, v, conf) -> bool:
+        """Returns False if the image must wait for gyro data."""
+        if self.t is None:
+            self.x[:] = (u, v, 0.0, 0.0)
+            self.t = t
+            self._replay(self._indices_after(t))
+            self.t_confirmed = max(self.t_confirmed, self.t)
+            self._store_image((t, u, v, conf))
+            return True
+
+        if t >= self.t:
+            if t > self.t_gyro:
+                if self.t_image - self.t_gyro <= self.dt_max:
+                    return False  # gyro for this interval has not arrived yet
+                # Gyro dropout: constant-velocity propagation to the image
+                self._propagate(t - self.t, 0.0, 0.0, 0.0)
+                self.stats["no_gyro_updates"] += 1
+            self._update(u, v, conf)
+            # The head snapshot now includes this update, so a rollback cannot drop it or rewind self.t
+            if self._count:
+                self._snapshot(self._head)
+            self.t_confirmed = max(self.t_confirmed, t)
+            self._store_image((t, u, v, conf))
+            self.stats["images"] += 1
+            return True
+
+        # Delayed image: roll back to the newest snapshot before t, replay gyro and images after it
+        base, later = self._rollback_base(t)
+        if base is None:
+            self.stats["dropped_old"] += 1  # older than the history window
+            return True
+        self._store_image((t, u, v, conf))
+        self.x[:] = self._hx[base]
+        self.P[:] = self._hP[base]
+        self.t = float(self._ht[base])
+        self._replay(later)
+        self.stats["images"] += 1
+        self.stats["replays"] += 1
+        return True
+
+    def process(self) -> int:
+        """Drain both queues; returns the number of messages consumed."""
+        n = 0
+        while True:
+            try:
+                g = self.gyro_q.get_nowait()
+            except queue.Empty:
+                break
+            self._add_gyro(*g)
+            n += 1
+        while True:
+            try:
+                self._pending.append(self.image_q.get_nowait())
+            except queue.Empty:
+                break
+            n += 1
+        if self._pending:
+            self._pending.sort()
+            self.t_image = max(self.t_image, self._pending[-1][0])
+            keep = []
+            for m in self._pending:
+                if not self._apply_image(*m):
+                    keep.append(m)
+            self._pending = keep
+        return n
+
+    def state_at(self, t: float) -> Tuple[np.ndarray, bool]:
+        """
+        Position/velocity extrapolated to t (last gyro rate held), never more than
+        dt_max past the newest processed sensor time. Returns (x, clamped).
+        """
+        if self.t is None:
+            return np.full(4, np.nan), False
+        limit = self.t_confirmed + self.dt_max
+        clamped = t > limit
+        if clamped:
+            self.stats["clamped"] += 1
+        t = min(t, limit)
+        dt = t - self.t
+        x = self.x.copy()
+        if dt > 0:
+            w = self._gw[self._head] if self._count else np.zeros(3)
+            xn, yn = (x[0] - self.cx) / self.f, (x[1] - self.cy) / self.f
+            x[0] += (x[2] + self.f * (xn * yn * w[0] - (1 + xn * xn) * w[1] + yn * w[2])) * dt
+            x[1] += (x[3] + self.f * ((1 + yn * yn) * w[0] - xn * yn * w[1] - xn * w[2])) * dt
+        return x, clamped
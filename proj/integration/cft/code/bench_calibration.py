@@ -0,0 +1,70 @@
+import time
+
+import numpy as np
+from scipy.optimize import least_squares
+
+import gimbal_camera_calibration as gcal
+from gimbal_camera_calibration import (
+    R_m_g, R_c_m, exp_so3, log_so3, solve_calibration
+)
+
+# ------------------------------------------------------------
+# Solve-time scaling with the number of maneuvers N
+#
+#   loop+fd      per-maneuver Python loop residual, finite-difference Jacobian
+#                (the original make_residual / solve_calibration)
+#   batch+fd     batched residual, finite-difference Jacobian
+#   batch+jac    batched residual, analytic Jacobian (solve_calibration default)
+# ------------------------------------------------------------
+
+theta0_true = np.deg2rad(127)
+ang = np.deg2rad([-130, 150, 120])
+omega_mc_true = gcal.log_so3(gcal.Rx(ang[0]) @ gcal.Ry(ang[1]) @ gcal.Rz(ang[2]))
+Rcm_true = R_c_m(omega_mc_true)
+
+NOISE_RAD = 5e-4      # camera delta-rotation noise (1 sigma per axis)
+LOOP_MAX_N = 1000     # the loop version is too slow beyond this
+x0 = np.array([np.deg2rad(120), 0.4, 0.8, -0.7])
+
+
+def make_data(n, rng):
+    enc_start = rng.uniform(-1, 1, (n, 3))
+    enc_end = enc_start + rng.uniform(-0.5, 0.5, (n, 3))
+    Delta_R_m = R_m_g(enc_end, theta0_true) @ np.swapaxes(R_m_g(enc_start, theta0_true), -1, -2)
+    R_meas = exp_so3(rng.normal(0, NOISE_RAD, (n, 3))) @ Rcm_true @ Delta_R_m @ Rcm_true.T
+    return R_meas, enc_start, enc_end
+
+
+def solve_loop(data):
+    R_meas, enc_start, enc_end = data
+
+    def residual(x):
+        Rcm = R_c_m(x[1:4])
+        r = []
+        for Rm, e0, e1 in zip(R_meas, enc_start, enc_end):
+            Delta_R_m = R_m_g(e1, x[0]) @ R_m_g(e0, x[0]).T
+            r.append(log_so3(Rm.T @ Rcm @ Delta_R_m @ Rcm.T))
+        return np.concatenate(r)
+
+    return least_squares(residual, x0)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    sol = fn()
+    return time.perf_counter() - t0, sol
+
+
+rng = np.random.default_rng(0)
+
+print("\n=== SOLVE TIME vs N ===")
+print(f"{'N':>7} {'loop+fd':>10} {'batch+fd':>10} {'batch+jac':>10}   theta0 err [mdeg]  omega err [mrad]  nfev")
+
+for n in (3, 10, 100, 1000, 10000, 100000):
+    data = make_data(n, rng)
+    loop = f"{timed(lambda: solve_loop(data))[0]:9.3f}s" if n <= LOOP_MAX_N else "-"
+    t_fd = timed(lambda: solve_calibration(data, x0, analytic_jac=False))[0]
+    t_jac, sol = timed(lambda: solve_calibration(data, x0))
+    e_theta = np.rad2deg(abs(sol.x[0] - theta0_true)) * 1e3
+    e_omega = np.linalg.norm(sol.x[1:4] - omega_mc_true) * 1e3
+    print(f"{n:7d} {loop:>10} {t_fd:9.3f}s {t_jac:9.3f}s   {e_theta:17.3f}  {e_omega:16.4f}  {sol.nfev:4d}")
@@ -0,0 +1,191 @@
+"""
+cue_projection.py
+
+GPS-based cueing (Pivot 1): (GPS_p, GPS_t, attitude_p, gimbal_state) -> (u, v).
+
+Frame tree, applied to the line of sight platform -> target:
+
+    geodetic (lat, lon, alt; WGS84)
+      -> ECEF
+      -> NED at the platform                   R_n_e(lat_p, lon_p)
+      -> vehicle body (FRD)                    R_n_b^T,  R_n_b = Rz(yaw) Ry(pitch) Rx(roll)
+      -> gimbal mount                          R_m_b     (Pixhawk -> gimbal DCM, fixed)
+      -> gimbal payload                        R_m_g(enc, theta0)^T
+      -> camera (x right, y down, z optical)   R_c_m(omega_mc)   (gimbal -> camera DCM, fixed)
+      -> pixels                                common/camera/intrinsics.py (K + distortion)
+
+Everything is batched: T platform samples (position, attitude, encoders) and
+M targets broadcast to (T, M) cues, so cueing can run for every frame and for
+every sample of a log in one call. pixel_error_stats() quantifies the cue
+error against logged observations; cue_errors_from_log() does that straight
+from a sensor_log.py log.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from gimbal_camera_calibration import Rx, Ry, Rz, R_m_g, R_c_m
+
+ROOT = Path(__file__).resolve().parents[4]
+if str(ROOT / "common") not in sys.path:
+    sys.path.insert(0, str(ROOT / "common"))
+from camera.intrinsics import CameraIntrinsics as Intrinsics  # K + distortion, shared with the runtime
+
+# ============================================================
+# Geodesy (WGS84)
+# ============================================================
+
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+
+
+def geodetic_to_ecef(lla):
+    """(..., 3) lat [deg], lon [deg], alt [m] -> (..., 3) ECEF [m]."""
+    lla = np.asarray(lla, dtype=float)
+    lat, lon, h = np.deg2rad(lla[..., 0]), np.deg2rad(lla[..., 1]), lla[..., 2]
+    s, c = np.sin(lat), np.cos(lat)
+    N = WGS84_A / np.sqrt(1 - WGS84_E2 * s * s)
+    return np.stack([(N + h) * c * np.cos(lon),
+                     (N + h) * c * np.sin(lon),
+                     (N * (1 - WGS84_E2) + h) * s], axis=-1)
+
+
+def ecef_to_geodetic(xyz):
+    """(..., 3) ECEF [m] -> (..., 3) lat [deg], lon [deg], alt [m] (Bowring, mm-level)."""
+    xyz = np.asarray(xyz, dtype=float)
+    x, y, z = xyz[..., 0], xyz[..., 1], xyz[..., 2]
+    b = WGS84_A * (1 - WGS84_F)
+    ep2 = (WGS84_A**2 - b**2) / b**2
+    p = np.hypot(x, y)
+    th = np.arctan2(z * WGS84_A, p * b)
+    lat = np.arctan2(z + ep2 * b * np.sin(th)**3, p - WGS84_E2 * WGS84_A * np.cos(th)**3)
+    N = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(lat)**2)
+    h = p / np.cos(lat) - N
+    return np.stack([np.rad2deg(lat), np.rad2deg(np.arctan2(y, x)), h], axis=-1)
+
+
+def R_n_e(lat_deg, lon_deg):
+    """(..., 3, 3) ECEF -> local NED rotation."""
+    lat, lon = np.deg2rad(np.asarray(lat_deg, float)), np.deg2rad(np.asarray(lon_deg, float))
+    sl, cl, so, co = np.sin(lat), np.cos(lat), np.sin(lon), np.cos(lon)
+    R = np.empty(lat.shape + (3, 3))
+    R[..., 0, :] = np.stack([-sl * co, -sl * so, cl], axis=-1)
+    R[..., 1, :] = np.stack([-so, co, np.zeros_like(so)], axis=-1)
+    R[..., 2, :] = np.stack([-cl * co, -cl * so, -sl], axis=-1)
+    return R
+
+
+def los_ned(gps_p, gps_t):
+    """Line of sight platform -> target in the platform NED frame: (T,3),(M,3) -> (T, M, 3)."""
+    gps_p = np.asarray(gps_p, float).reshape(-1, 3)
+    gps_t = np.asarray(gps_t, float)
+    d = geodetic_to_ecef(gps_t)[None] - geodetic_to_ecef(gps_p)[:, None] if gps_t.ndim == 2 else \
+        geodetic_to_ecef(gps_t) - geodetic_to_ecef(gps_p)[:, None]
+    return np.einsum("tij,tmj->tmi", R_n_e(gps_p[:, 0], gps_p[:, 1]), d)
+
+# ============================================================
+# Attitude / gimbal chain
+# ============================================================
+
+def R_n_b(attitude):
+    """(..., 3) roll, pitch, yaw [rad] -> body (FRD) to NED rotation."""
+    attitude = np.asarray(attitude, float)
+    return Rz(attitude[..., 2]) @ Ry(attitude[..., 1]) @ Rx(attitude[..., 0])
+
+
+class Calibration:
+    def __init__(self, theta0=0.0, omega_mc=(0, 0, 0), R_m_b=None):
+        self.theta0 = float(theta0)
+        self.omega_mc = np.asarray(omega_mc, float)
+        self.R_m_b = np.eye(3) if R_m_b is None else np.asarray(R_m_b, float)
+
+    @classmethod
+    def from_solution(cls, x, R_m_b=None):
+        """From solve_calibration(...).x = [theta0, omega_mc]."""
+        return cls(x[0], x[1:4], R_m_b)
+
+
+def R_c_n(attitude, enc, calib):
+    """(T, 3, 3) NED -> camera rotation for T (attitude, encoder) samples."""
+    Rg = R_m_g(enc, calib.theta0)
+    return R_c_m(calib.omega_mc) @ np.swapaxes(Rg, -1, -2) @ calib.R_m_b @ np.swapaxes(R_n_b(attitude), -1, -2)
+
+# ============================================================
+# Cue
+# ============================================================
+
+def project_targets(gps_p, gps_t, attitude_p, enc, calib, intr):
+    """
+    (GPS_p, GPS_t, attitude_p, gimbal_state) -> (u, v).
+
+    gps_p (T,3) and gps_t (M,3) or (T,M,3) as lat [deg], lon [deg], alt [m];
+    attitude_p (T,3) roll/pitch/yaw [rad]; enc (T,3) gimbal yaw/pitch/roll [rad].
+    Returns uv (T, M, 2) and valid (T, M): target in front of the camera and,
+    if intr.size is set, inside the image and inside the calibrated field of
+    view (fov_radius()), so targets outside it that the distortion polynomial
+    folds back into the image are not cued.
+    """
+    los = los_ned(gps_p, gps_t)
+    R = R_c_n(np.asarray(attitude_p, float).reshape(-1, 3), np.asarray(enc, float).reshape(-1, 3), calib)
+    p_c = np.einsum("tij,tmj->tmi", R, los)
+    uv, valid = intr.project(p_c)
+    if intr.size is not None:
+        w, h = intr.size
+        valid &= (uv[..., 0] >= 0) & (uv[..., 0] < w) & (uv[..., 1] >= 0) & (uv[..., 1] < h)
+        z = np.where(valid, p_c[..., 2], 1.0)
+        valid &= np.hypot(p_c[..., 0], p_c[..., 1]) <= fov_radius(intr) * z
+    return uv, valid
+
+
+def fov_radius(intr):
+    """Largest undistorted normalized radius on the image border (corners and edge midpoints)."""
+    w, h = intr.size
+    border = np.array([[0, 0], [w / 2, 0], [w, 0], [w, h / 2], [w, h], [w / 2, h], [0, h], [0, h / 2]], float)
+    return float(np.hypot(*intr.undistort_points(border, normalized=True).T).max())
+
+
+def pixel_error_stats(uv_pred, uv_obs, valid=None):
+    """Cue error statistics [px] over all valid (prediction, observation) pairs."""
+    uv_pred = np.asarray(uv_pred, float).reshape(-1, 2)
+    uv_obs = np.asarray(uv_obs, float).reshape(-1, 2)
+    ok = np.all(np.isfinite(uv_pred) & np.isfinite(uv_obs), axis=1)
+    if valid is not None:
+        ok &= np.asarray(valid).reshape(-1)
+    d = uv_pred[ok] - uv_obs[ok]
+    e = np.hypot(d[:, 0], d[:, 1])
+    if not len(e):
+        return {"n": 0}
+    return {
+        "n": int(len(e)),
+        "mean": float(e.mean()),
+        "median": float(np.median(e)),
+        "rms": float(np.sqrt(np.mean(e**2))),
+        "p90": float(np.quantile(e, 0.90)),
+        "p95": float(np.quantile(e, 0.95)),
+        "max": float(e.max()),
+        "bias_u": float(d[:, 0].mean()),
+        "bias_v": float(d[:, 1].mean()),
+    }
+
+
+def cue_errors_from_log(log, gps_t, calib, intr, obs="observation", gps="gps",
+                        attitude="attitude", gimbal="gimbal"):
+    """
+    Cue every logged observation of one target (fixed gps_t (3,)) and compare:
+    platform GPS, attitude and encoders are interpolated to the observation
+    timestamps. Returns (stats, uv_pred (N,2), uv_obs (N,2)).
+    """
+    t = log.t(obs)
+    uv_obs = np.column_stack([log.column(obs, "u"), log.column(obs, "v")])
+    p, ok_p = log.interp(gps, t)
+    a, ok_a = log.interp(attitude, t)
+    e, ok_e = log.interp(gimbal, t)
+    ok = ok_p & ok_a & ok_e
+    uv = np.full((len(t), 2), np.nan)
+    if ok.any():
+        pred, valid = project_targets(p[ok], np.asarray(gps_t, float)[None], a[ok], e[ok], calib, intr)
+        uv[ok] = np.where(valid[:, :1], pred[:, 0], np.nan)
+    return pixel_error_stats(uv, uv_obs), uv, uv_obs
@@ -0,0 +1,213 @@
+"""
+mc_calibration.py
+
+Monte Carlo sensitivity of the gimbal–camera calibration to sensor noise and
+maneuver design.
+
+For every maneuver design, --trials randomized maneuver sets are generated at
+once with the batched kinematics of gimbal_camera_calibration.py:
+
+    encoder waypoints  design-specific sequence, randomized amplitudes/order
+    encoder readings   + white noise (--enc-noise) + quantization (--enc-lsb)
+    camera rotation    Delta_R_c = Rcm Delta_R_m Rcm^T, perturbed by white
+                       rotation noise (--cam-noise) and a scale error
+                       (--cam-scale) proportional to the rotation angle
+
+and solved in parallel (ProcessPoolExecutor, chunks of trials per job) from an
+initial guess --x0-err away from the truth.
+
+Flight time per set = sum over legs of (largest axis move / --slew + --dwell).
+Failures (theta0 off by more than 1 deg) and ill-conditioned Jacobians
+(condition number > 1e3) are reported per design; single-axis and no-roll
+designs leave parameters unobservable. Designs are ranked by the
+time-normalized error median(theta0 err) * sqrt(flight time), with the median
+taken over all trials (failures count as infinite error): error shrinks like
+1/sqrt(maneuvers), so this is what a design buys per second of captive
+flight. Designs failing more than 5 % of solves are not ranked.
+
+Usage:
+    python3 mc_calibration.py
+    python3 mc_calibration.py --trials 5000 --enc-noise 0.05 --cam-noise 0.05 --csv mc.csv
+    python3 mc_calibration.py --designs sim3 random12 --workers 4
+"""
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import gimbal_camera_calibration as gcal
+from gimbal_camera_calibration import R_m_g, R_c_m, exp_so3, log_so3, solve_calibration
+
+# ------------------------------------------------------------
+# Ground truth (as in sim_gimbal.py)
+# ------------------------------------------------------------
+
+THETA0_TRUE = np.deg2rad(127)
+_ang = np.deg2rad([-130, 150, 120])
+OMEGA_MC_TRUE = log_so3(gcal.Rx(_ang[0]) @ gcal.Ry(_ang[1]) @ gcal.Rz(_ang[2]))
+X_TRUE = np.concatenate([[THETA0_TRUE], OMEGA_MC_TRUE])
+
+FAIL_DEG = 1.0      # theta0 error counted as a failed solve
+MAX_FAIL = 0.05     # designs failing more often than this are not ranked
+ILL_COND = 1e3      # Jacobian condition number above which a set is reported as ill-conditioned
+CHUNK = 50          # trials per process-pool job
+
+# ------------------------------------------------------------
+# Maneuver designs: (n, L+1, 3) encoder waypoints [rad] for n trials
+# ------------------------------------------------------------
+
+def _sim3(rng, n):
+    base = np.array([[0.0, 0.0, 0.0], [0.4, 0.3, 0.0], [0.8, -0.2, 0.0], [0.0, 0.0, 0.5]])
+    return base[None] * rng.uniform(0.8, 1.2, (n, 1, 1))
+
+def _axis_steps(axes, legs, amp):
+    def gen(rng, n):
+        steps = np.zeros((n, legs, 3))
+        for k in range(legs):
+            a = axes[k % len(axes)]
+            steps[:, k, a] = rng.choice([-1, 1], n) * rng.uniform(0.5, 1.0, n) * amp
+        return np.concatenate([np.zeros((n, 1, 3)), np.cumsum(steps, axis=1)], axis=1)
+    return gen
+
+def _random(legs, amp):
+    def gen(rng, n):
+        steps = rng.uniform(-amp, amp, (n, legs, 3))
+        return np.concatenate([np.zeros((n, 1, 3)), np.clip(np.cumsum(steps, axis=1), -1.2, 1.2)], axis=1)
+    return gen
+
+DESIGNS = {
+    "sim3":        _sim3,                              # sim_gimbal.py waypoints
+    "pitch_only6": _axis_steps([1], 6, 0.5),           # single axis: omega_mc not observable
+    "yaw_pitch6":  _axis_steps([0, 1], 6, 0.5),        # no roll: theta0 cancels out of Delta_R_m
+    "ypr6":        _axis_steps([0, 1, 2], 6, 0.5),
+    "ypr12_small": _axis_steps([0, 1, 2], 12, 0.2),
+    "random6":     _random(6, 0.4),
+    "random12":    _random(12, 0.4),
+    "random24":    _random(24, 0.4),
+}
+
+# ------------------------------------------------------------
+# Vectorized trial generation
+# ------------------------------------------------------------
+
+def make_trials(design, n, rng, args):
+    """Returns (R_meas (n,L,3,3), enc_start (n,L,3), enc_end (n,L,3), flight_s (n,))."""
+    wp = DESIGNS[design](rng, n)
+    e0, e1 = wp[:, :-1], wp[:, 1:]
+    Rcm = R_c_m(OMEGA_MC_TRUE)
+    Delta_R_m = R_m_g(e1, THETA0_TRUE) @ np.swapaxes(R_m_g(e0, THETA0_TRUE), -1, -2)
+    Delta_R_c = Rcm @ Delta_R_m @ Rcm.T
+
+    # Camera: scale error on the rotation angle, then white rotation noise
+    phi = log_so3(Delta_R_c) * (1 + args.cam_scale * rng.standard_normal(Delta_R_c.shape[:2] + (1,)))
+    noise = rng.normal(0, np.deg2rad(args.cam_noise), phi.shape)
+    R_meas = exp_so3(noise) @ exp_so3(phi)
+
+    # Encoders: white noise + quantization on each reading
+    def read(e):
+        e = e + rng.normal(0, np.deg2rad(args.enc_noise), e.shape)
+        if args.enc_lsb > 0:
+            lsb = np.deg2rad(args.enc_lsb)
+            e = np.round(e / lsb) * lsb
+        return e
+
+    flight = np.sum(np.abs(e1 - e0).max(axis=-1) / np.deg2rad(args.slew) + args.dwell, axis=1)
+    return R_meas, read(e0), read(e1), flight
+
+
+def solve_chunk(job):
+    """Solve a chunk of trials; returns (n, 6) [theta0 err deg, omega err deg, cost, nfev, jac cond, status]."""
+    R_meas, e0, e1, x0 = job
+    out = np.zeros((len(R_meas), 6))
+    for i in range(len(R_meas)):
+        sol = solve_calibration((R_meas[i], e0[i], e1[i]), x0[i])
+        d_theta = (sol.x[0] - THETA0_TRUE + np.pi) % (2 * np.pi) - np.pi
+        d_omega = log_so3(R_c_m(sol.x[1:4]) @ R_c_m(OMEGA_MC_TRUE).T)
+        sv = np.linalg.svd(sol.jac, compute_uv=False)
+        out[i] = (np.rad2deg(abs(d_theta)), np.rad2deg(np.linalg.norm(d_omega)), sol.cost, sol.nfev,
+                  sv[0] / max(sv[-1], 1e-300), sol.status)
+    return out
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Monte Carlo gimbal-camera calibration sensitivity")
+    parser.add_argument("--designs", nargs="+", default=list(DESIGNS), choices=list(DESIGNS))
+    parser.add_argument("--trials", type=int, default=1000, help="Randomized maneuver sets per design")
+    parser.add_argument("--enc-noise", type=float, default=0.02, help="Encoder white noise [deg]")
+    parser.add_argument("--enc-lsb", type=float, default=0.0, help="Encoder quantization [deg], 0 = off")
+    parser.add_argument("--cam-noise", type=float, default=0.03, help="Camera rotation noise [deg per axis]")
+    parser.add_argument("--cam-scale", type=float, default=0.0, help="Camera rotation scale error (1 sigma)")
+    parser.add_argument("--x0-err", type=float, default=5.0, help="Initial-guess error [deg per parameter]")
+    parser.add_argument("--slew", type=float, default=30.0, help="Gimbal slew rate [deg/s]")
+    parser.add_argument("--dwell", type=float, default=2.0, help="Settle time per leg [s]")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", default=None, help="Write every trial to this CSV")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    t0 = time.perf_counter()
+    jobs, meta = [], []
+    for design in args.designs:
+        R_meas, e0, e1, flight = make_trials(design, args.trials, rng, args)
+        x0 = X_TRUE + rng.normal(0, np.deg2rad(args.x0_err), (args.trials, 4))
+        for s in range(0, args.trials, CHUNK):
+            jobs.append((R_meas[s:s + CHUNK], e0[s:s + CHUNK], e1[s:s + CHUNK], x0[s:s + CHUNK]))
+            meta.append((design, s, flight[s:s + CHUNK]))
+    t_gen = time.perf_counter() - t0
+    print(f"[mc_calibration] {len(args.designs)} designs x {args.trials} trials generated in {t_gen:.2f} s; "
+          f"solving {len(jobs)} chunks on {args.workers} workers")
+
+    results = {d: [] for d in args.designs}
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.workers) as ex:
+        for (design, s, flight), out in zip(meta, ex.map(solve_chunk, jobs)):
+            results[design].append(np.column_stack([out, flight]))
+            rows += [(design, s + i, *r) for i, r in enumerate(np.column_stack([out, flight]).tolist())]
+    dt = time.perf_counter() - t0
+    n_total = len(args.designs) * args.trials
+    print(f"[mc_calibration] {n_total} solves in {dt:.1f} s ({n_total / dt:.0f} solves/s)")
+
+    summary = []
+    for design, parts in results.items():
+        r = np.concatenate(parts)
+        ok = r[:, 0] < FAIL_DEG
+        th, om, flight = r[ok, 0] * 1e3, r[ok, 1] * 1e3, r[:, 6]
+        med = np.median(th) if ok.any() else np.inf
+        th_all = np.where(ok, r[:, 0] * 1e3, np.inf)
+        fail = 1 - ok.mean()
+        score = np.median(th_all) * np.sqrt(np.median(flight)) if fail <= MAX_FAIL else np.inf
+        summary.append((score, design, r.shape[0], np.median(flight),
+                        med, np.quantile(th, 0.95) if ok.any() else np.inf,
+                        np.median(om) if ok.any() else np.inf, fail, np.mean(r[:, 4] > ILL_COND)))
+
+    print(f"\n{'design':12s} {'flight s':>8} {'theta0 err [mdeg]':>18} {'p95':>8} {'omega err [mdeg]':>17} "
+          f"{'fail':>6} {'illcond':>7} {'err*sqrt(s)':>12}")
+    for score, design, n, flight, med, p95, om, fail, ill in sorted(summary):
+        print(f"{design:12s} {flight:8.1f} {med:18.2f} {p95:8.2f} {om:17.2f} {fail:6.1%} {ill:7.1%} {score:12.1f}")
+    ranked = [row for row in sorted(summary) if np.isfinite(row[0])]
+    print(f"\nBest per second of flight: {ranked[0][1] if ranked else f'none (all designs fail > {MAX_FAIL:.0%})'}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["design", "trial", "theta0_err_deg", "omega_err_deg", "cost", "nfev", "jac_cond",
+                        "status", "flight_s"])
+            w.writerows(rows)
+        print(f"[mc_calibration] Trials -> {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,151 @@
+"""
+online_calibration.py
+
+Online (incremental) gimbal–camera calibration on the same model as
+gimbal_camera_calibration.py: x = [theta0, omega_mc], one rotation-vector
+residual per Maneuver.
+
+Sliding-window estimator with marginalization:
+    - the newest `window` maneuvers are kept and re-solved (least squares with
+      the analytic Jacobian) every time a maneuver arrives,
+    - older maneuvers are folded into a Gaussian prior (information matrix +
+      mean) by linearizing their residual at the current estimate,
+so every update costs O(window), independent of how many maneuvers came
+before. A window as long as the log is the batch solve; window=0 is an
+iterated EKF, which from a cold start (x0 far from the truth) linearizes the
+first maneuvers at a wrong estimate and does not recover - keep window >= ~5.
+
+Diagnostics per update (OnlineCalibrator.add returns them, .history keeps all):
+    sigma       1-sigma of [theta0 (rad), omega_mc (rad)] from the information matrix
+    cond        condition number of the (unit-scaled) information matrix
+    weakest     least observable parameter direction (unit eigenvector)
+    nis         normalized innovation of the new maneuver before the update
+    step        max |x_new - x_old| / sigma
+    converged   step < step_tol for `patience` updates in a row and sigma < sigma_tol
+"""
+
+import numpy as np
+from scipy.optimize import least_squares
+
+from gimbal_camera_calibration import maneuver_errors, residual_jacobian
+
+# ============================================================
+# Estimator
+# ============================================================
+
+class OnlineCalibrator:
+    def __init__(self, x0=None, sigma0=np.pi, meas_sigma=1e-3, window=20,
+                 step_tol=0.1, sigma_tol=np.deg2rad(0.05), patience=5, gate=None):
+        self.x = np.zeros(4) if x0 is None else np.asarray(x0, dtype=float).copy()
+        self.meas_sigma = meas_sigma
+        self.window = window
+        self.step_tol = step_tol
+        self.sigma_tol = sigma_tol
+        self.patience = patience
+        self.gate = gate                       # reject maneuvers with nis above this (None: keep all)
+
+        # Prior from marginalized maneuvers: cost ||L^T (x - x_prior)||^2, info = L L^T
+        self.info_prior = np.eye(4) / sigma0**2
+        self.x_prior = self.x.copy()
+
+        self._R = np.zeros((window + 1, 3, 3))
+        self._e0 = np.zeros((window + 1, 3))
+        self._e1 = np.zeros((window + 1, 3))
+        self._n_win = 0
+
+        self.n = 0
+        self.rejected = 0
+        self.info = self.info_prior.copy()
+        self._still = 0
+        self.history = []
+
+    # ------------------------------------------------------------
+
+    def _window(self):
+        k = self._n_win
+        return self._R[:k], self._e0[:k], self._e1[:k]
+
+    def _solve_window(self):
+        data = self._window()
+        L = np.linalg.cholesky(self.info_prior)
+        w = 1.0 / self.meas_sigma
+
+        def residual(x):
+            r = maneuver_errors(x, *data)[0].reshape(-1) * w
+            return np.concatenate([r, L.T @ (x - self.x_prior)])
+
+        def jacobian(x):
+            J = residual_jacobian(x, *data).reshape(-1, 4) * w
+            return np.vstack([J, L.T])
+
+        sol = least_squares(residual, self.x, jac=jacobian)
+        J = sol.jac
+        return sol.x, J.T @ J
+
+    def _marginalize_oldest(self):
+        R, e0, e1 = (a[:1] for a in self._window())
+        r = maneuver_errors(self.x, R, e0, e1)[0].reshape(-1)
+        J = residual_jacobian(self.x, R, e0, e1).reshape(-1, 4)
+        W = 1.0 / self.meas_sigma**2
+        info = self.info_prior + W * J.T @ J
+        grad = self.info_prior @ (self.x - self.x_prior) + W * J.T @ r
+        self.x_prior = self.x - np.linalg.solve(info, grad)
+        self.info_prior = info
+        for a in (self._R, self._e0, self._e1):
+            a[:-1] = a[1:].copy()
+        self._n_win -= 1
+
+    def add(self, maneuver):
+        """Add one Maneuver; returns the diagnostics dict for this update."""
+        R = np.asarray(maneuver.R_c_meas, dtype=float)[None]
+        e0 = np.asarray(maneuver.enc_start, dtype=float)[None]
+        e1 = np.asarray(maneuver.enc_end, dtype=float)[None]
+
+        # Innovation of the new maneuver against the current estimate
+        r = maneuver_errors(self.x, R, e0, e1)[0][0]
+        J = residual_jacobian(self.x, R, e0, e1)[0]
+        S = J @ np.linalg.solve(self.info, J.T) + self.meas_sigma**2 * np.eye(3)
+        nis = float(r @ np.linalg.solve(S, r))
+        if self.gate is not None and self.n > 0 and nis > self.gate:
+            self.rejected += 1
+            return self._diagnostics(nis, 0.0, accepted=False)
+
+        k = self._n_win
+        self._R[k], self._e0[k], self._e1[k] = R[0], e0[0], e1[0]
+        self._n_win += 1
+        self.n += 1
+
+        x_old = self.x
+        self.x, self.info = self._solve_window()
+        if self._n_win > self.window:
+            self._marginalize_oldest()
+        step = float(np.max(np.abs(self.x - x_old) / np.sqrt(np.diag(self.covariance()))))
+        return self._diagnostics(nis, step, accepted=True)
+
+    # ------------------------------------------------------------
+
+    def covariance(self):
+        return np.linalg.inv(self.info)
+
+    def _diagnostics(self, nis, step, accepted):
+        cov = self.covariance()
+        sigma = np.sqrt(np.diag(cov))
+        d = 1.0 / np.sqrt(np.diag(self.info))
+        evals, evecs = np.linalg.eigh(self.info * np.outer(d, d))
+        cond = float(evals[-1] / max(evals[0], 1e-300))
+
+        if accepted:
+            self._still = self._still + 1 if step < self.step_tol else 0
+        diag = {
+            "n": self.n,
+            "x": self.x.copy(),
+            "sigma": sigma,
+            "cond": cond,
+            "weakest": evecs[:, 0],
+            "nis": nis,
+            "step": step,
+            "accepted": accepted,
+            "converged": self._still >= self.patience and bool(np.all(sigma < self.sigma_tol)),
+        }
+        self.history.append(diag)
+        return diag
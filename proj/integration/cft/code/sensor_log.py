@@ -0,0 +1,357 @@
+"""
+sensor_log.py
+
+Columnar, memory-mapped log for synchronized captive-flight sensor streams
+(Pixhawk GPS and attitude, gimbal encoders, IMU, camera observations).
+
+On disk (one directory per log):
+    schema.json                 {"streams": {name: {"fields": [...], "dtype": "f8", "angles": [...]}}}
+    <stream>/t.i8               int64 timestamps [ns], strictly increasing
+    <stream>/<field>.<dtype>    one fixed-width column per field
+    <stream>/count.i8           number of committed rows (written after the data)
+
+Writer (live process):
+    - append() writes one typed row into a preallocated per-stream staging
+      buffer under a short lock and returns; every flush_s a background thread
+      swaps the double buffer and copies the whole block into the column
+      memmaps (files grow by doubling); append_many() stages bulk arrays,
+    - rows with a timestamp not after the last one of their stream are dropped
+      (and counted), so readers can always binary-search t,
+    - the committed count is bumped after the column data, so a reader on a log
+      that is still being written never sees a partial row.
+
+Reader:
+    - columns are memmaps: nothing is loaded until it is indexed, so multi-GB
+      logs open instantly and only the pages that are touched are read,
+    - interp() aligns any stream to arbitrary timestamps (e.g. image times) with
+      one searchsorted per query batch; "angle" fields are interpolated across
+      the +-pi wrap; iter_aligned() does the same chunk by chunk,
+    - maneuvers_from_log() builds the stacked (R_c_meas, enc_start, enc_end)
+      arrays that solve_calibration() takes, straight from a log.
+
+See sim_sensor_log.py for a simulated capture and calibration from the log.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+from gimbal_camera_calibration import exp_so3
+
+# ============================================================
+# Pivot 1 streams
+# ============================================================
+
+STREAMS = {
+    "gps":      {"fields": ["lat", "lon", "alt"]},
+    "attitude": {"fields": ["roll", "pitch", "yaw"], "angles": ["roll", "pitch", "yaw"]},
+    "gimbal":   {"fields": ["yaw", "pitch", "roll"], "angles": ["yaw", "pitch", "roll"]},
+    "imu":      {"fields": ["gx", "gy", "gz", "ax", "ay", "az"]},
+    # camera attitude (rotation vector) from image registration, one row per frame
+    "camera":   {"fields": ["frame", "rx", "ry", "rz"]},
+    # target observations in the image, one row per detection
+    "observation": {"fields": ["frame", "u", "v", "conf"]},
+}
+
+NS = 1_000_000_000
+
+
+def _schema(streams):
+    out = {}
+    for name, spec in streams.items():
+        if isinstance(spec, (list, tuple)):
+            spec = {"fields": list(spec)}
+        out[name] = {"fields": list(spec["fields"]), "dtype": spec.get("dtype", "f8"),
+                     "angles": list(spec.get("angles", []))}
+    return out
+
+# ============================================================
+# Writer
+# ============================================================
+
+class _Column:
+    def __init__(self, path, dtype, capacity):
+        self.path, self.dtype = path, np.dtype(dtype)
+        self.map = None
+        self._resize(capacity)
+
+    def _resize(self, capacity):
+        if self.map is not None:
+            self.map.flush()
+            del self.map
+        with open(self.path, "ab") as f:
+            f.truncate(capacity * self.dtype.itemsize)
+        self.map = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(capacity,))
+
+
+class SensorLogWriter:
+    def __init__(self, path, streams=None, capacity=1 << 16, flush_s=0.05, buffer_rows=1 << 15):
+        self.path = str(path)
+        self.schema = _schema(streams or STREAMS)
+        self.flush_s = flush_s
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "schema.json"), "w") as f:
+            json.dump({"streams": self.schema}, f, indent=1)
+
+        self._cols, self._count, self._n, self._cap, self._last = {}, {}, {}, {}, {}
+        self._rec, self._bufs, self._fill, self._spill = {}, {}, {}, {}
+        for name, spec in self.schema.items():
+            d = os.path.join(self.path, name)
+            os.makedirs(d, exist_ok=True)
+            ext = np.dtype(spec["dtype"]).str[1:]
+            self._cols[name] = [_Column(os.path.join(d, "t.i8"), "<i8", capacity)] + [
+                _Column(os.path.join(d, f"{fld}.{ext}"), spec["dtype"], capacity) for fld in spec["fields"]]
+            self._count[name] = np.memmap(os.path.join(d, "count.i8"), dtype="<i8", mode="w+", shape=(1,))
+            self._n[name] = 0
+            self._cap[name] = capacity
+            self._last[name] = np.iinfo(np.int64).min
+            # Double-buffered staging records: producers fill one, the writer drains the other
+            rec = np.dtype([("t", "<i8")] + [(fld, spec["dtype"]) for fld in spec["fields"]])
+            self._rec[name] = rec
+            self._bufs[name] = [np.empty(buffer_rows, rec), np.empty(buffer_rows, rec)]
+            self._fill[name] = 0
+            self._spill[name] = []   # bulk rows and overflow beyond the staging buffer
+
+        self.stats = {"rows": 0, "dropped": 0, "batches": 0, "spilled": 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sensor_log", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------
+    # Producer side (any thread, never waits on disk)
+    # ------------------------------------------------------------
+
+    def append(self, stream, t_ns, *values):
+        with self._lock:
+            buf, i = self._bufs[stream][0], self._fill[stream]
+            if i < len(buf) and not self._spill[stream]:
+                buf[i] = (t_ns, *values)
+                self._fill[stream] = i + 1
+            else:
+                self._spill[stream].append(np.array([(t_ns, *values)], self._rec[stream]))
+                self.stats["spilled"] += 1
+
+    def append_many(self, stream, t_ns, values):
+        """Bulk rows: t_ns (N,), values (N, F)."""
+        values = np.asarray(values).reshape(len(t_ns), -1)
+        rec = np.empty(len(t_ns), self._rec[stream])
+        rec["t"] = t_ns
+        for j, fld in enumerate(self.schema[stream]["fields"]):
+            rec[fld] = values[:, j]
+        with self._lock:
+            self._spill[stream].append(rec)
+
+    # ------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------
+
+    def _swap(self):
+        """Take everything staged so far (the lock is held only for the swap)."""
+        out = {}
+        with self._lock:
+            for name, bufs in self._bufs.items():
+                k, spill = self._fill[name], self._spill[name]
+                if not k and not spill:
+                    continue
+                bufs.reverse()
+                self._fill[name] = 0
+                self._spill[name] = []
+                out[name] = (bufs[1][:k], spill)
+        return out
+
+    def _run(self):
+        while True:
+            stop = self._stop.wait(self.flush_s)
+            for name, (staged, spill) in self._swap().items():
+                self._write(name, np.concatenate([staged] + spill) if spill else staged)
+            if stop:
+                break
+
+    def _write(self, stream, rec):
+        t = rec["t"]
+        # Keep t strictly increasing
+        prev = np.maximum.accumulate(np.concatenate([[self._last[stream]], t]))[:-1]
+        keep = t > prev
+        if not keep.all():
+            self.stats["dropped"] += int(np.count_nonzero(~keep))
+            rec, t = rec[keep], t[keep]
+        k = len(t)
+        if not k:
+            return
+
+        n, cols = self._n[stream], self._cols[stream]
+        if n + k > self._cap[stream]:
+            self._cap[stream] = max(2 * self._cap[stream], n + k)
+            for c in cols:
+                c._resize(self._cap[stream])
+        cols[0].map[n:n + k] = t
+        for c, fld in zip(cols[1:], self.schema[stream]["fields"]):
+            c.map[n:n + k] = rec[fld]
+        self._n[stream] = n + k
+        self._last[stream] = int(t[-1])
+        self._count[stream][0] = n + k       # commit after the data
+        self.stats["rows"] += k
+        self.stats["batches"] += 1
+
+    def close(self):
+        """Write everything staged, flush and trim the column files to the committed size."""
+        self._stop.set()
+        self._thread.join()
+        for name, cols in self._cols.items():
+            n = self._n[name]
+            for c in cols:
+                c.map.flush()
+                del c.map
+                with open(c.path, "r+b") as f:
+                    f.truncate(n * c.dtype.itemsize)
+            self._count[name].flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ============================================================
+# Reader
+# ============================================================
+
+class SensorLogReader:
+    def __init__(self, path):
+        self.path = str(path)
+        with open(os.path.join(self.path, "schema.json")) as f:
+            self.schema = json.load(f)["streams"]
+        self._maps = {}
+
+    @property
+    def streams(self):
+        return list(self.schema)
+
+    def fields(self, stream):
+        return self.schema[stream]["fields"]
+
+    def __len__(self):
+        return sum(self.count(s) for s in self.schema)
+
+    def count(self, stream):
+        p = os.path.join(self.path, stream, "count.i8")
+        return int(np.fromfile(p, dtype="<i8", count=1)[0]) if os.path.getsize(p) else 0
+
+    def _column(self, stream, name, dtype):
+        n = self.count(stream)
+        key = (stream, name)
+        m = self._maps.get(key)
+        if m is None or len(m) < n:
+            p = os.path.join(self.path, stream, name)
+            size = os.path.getsize(p) // np.dtype(dtype).itemsize
+            m = np.memmap(p, dtype=dtype, mode="r", shape=(size,)) if size else np.zeros(0, dtype)
+            self._maps[key] = m
+        return m[:n]
+
+    def t(self, stream):
+        """Committed timestamps [ns] (memmap view)."""
+        return self._column(stream, "t.i8", "<i8")
+
+    def column(self, stream, field):
+        dt = self.schema[stream]["dtype"]
+        return self._column(stream, f"{field}.{np.dtype(dt).str[1:]}", dt)
+
+    def interp(self, stream, t_query, fields=None, method="linear", max_gap_ns=None):
+        """
+        Values of `stream` at t_query [ns] -> (values (M, F), valid (M,)).
+
+        method: "linear", "nearest" or "previous" (last sample at or before t).
+        valid is False outside the stream's time span and, with max_gap_ns,
+        where the bracketing samples are further apart than that.
+        """
+        fields = fields or self.fields(stream)
+        t = self.t(stream)
+        tq = np.asarray(t_query, dtype=np.int64)
+        n = len(t)
+        out = np.full((len(tq), len(fields)), np.nan)
+        if n == 0:
+            return out, np.zeros(len(tq), bool)
+
+        hi = np.searchsorted(t, tq, side="right")
+        i1 = np.clip(hi, 1, n - 1) if n > 1 else np.zeros_like(hi)
+        i0 = np.maximum(i1 - 1, 0)
+        t0, t1 = t[i0], t[i1]
+        valid = (tq >= t[0]) & (tq <= t[-1])
+        if max_gap_ns is not None:
+            valid &= (t1 - t0) <= max_gap_ns
+
+        if method == "previous":
+            idx, w = np.maximum(hi - 1, 0), None
+        elif method == "nearest":
+            idx, w = np.where(tq - t0 <= t1 - tq, i0, i1), None
+        else:
+            idx, w = None, ((tq - t0) / np.maximum(t1 - t0, 1)).clip(0, 1)
+
+        angles = set(self.schema[stream].get("angles", []))
+        for j, fld in enumerate(fields):
+            col = self.column(stream, fld)
+            if w is None:
+                out[:, j] = col[idx]
+                continue
+            a, b = col[i0].astype(float), col[i1].astype(float)
+            d = b - a
+            if fld in angles:
+                d = (d + np.pi) % (2 * np.pi) - np.pi
+            out[:, j] = a + w * d
+            if fld in angles:
+                out[:, j] = (out[:, j] + np.pi) % (2 * np.pi) - np.pi
+        out[~valid] = np.nan
+        return out, valid
+
+    def align(self, t_query, streams=None, **kw):
+        """{stream: (values, valid)} for every stream (or `streams`) at t_query."""
+        return {s: self.interp(s, t_query, **kw) for s in (streams or self.streams)}
+
+    def iter_aligned(self, ref_stream, streams, chunk=1 << 20, **kw):
+        """Yield (t_chunk, {stream: (values, valid)}) over the timestamps of ref_stream, chunk by chunk."""
+        t = self.t(ref_stream)
+        for i in range(0, len(t), chunk):
+            tq = np.asarray(t[i:i + chunk])
+            yield tq, self.align(tq, streams, **kw)
+
+# ============================================================
+# Calibration input
+# ============================================================
+
+def maneuvers_from_log(log, t_start, t_end, camera="camera", gimbal="gimbal"):
+    """
+    Stacked (R_c_meas, enc_start, enc_end) for solve_calibration(), one maneuver
+    per (t_start[i], t_end[i]) [ns]. The camera attitude A(t) (rotation vector
+    stream) is taken at the nearest frame, R_c_meas = A(t_end) A(t_start)^T;
+    encoders are interpolated to the same frame times. Maneuvers with an
+    endpoint outside either stream are dropped.
+    """
+    t_start = np.asarray(t_start, dtype=np.int64)
+    t_end = np.asarray(t_end, dtype=np.int64)
+    tc = np.asarray(log.t(camera))
+    n_enc = len(log.schema[gimbal]["fields"])
+    if not len(tc):
+        return np.zeros((0, 3, 3)), np.zeros((0, n_enc)), np.zeros((0, n_enc))
+    # Endpoints outside the camera stream are dropped before snapping (snapping
+    # would clamp them onto the first/last frame and make them look valid)
+    inside = (t_start >= tc[0]) & (t_end <= tc[-1])
+
+    def nearest_frame(t):
+        i = np.searchsorted(tc, t)
+        lo, hi = tc[np.clip(i - 1, 0, len(tc) - 1)], tc[np.clip(i, 0, len(tc) - 1)]
+        return np.where(t - lo <= hi - t, lo, hi)
+
+    # Snap to frame times so camera and encoders refer to the same instant
+    t_start, t_end = nearest_frame(t_start), nearest_frame(t_end)
+
+    rv0, ok0 = log.interp(camera, t_start, ["rx", "ry", "rz"], method="nearest")
+    rv1, ok1 = log.interp(camera, t_end, ["rx", "ry", "rz"], method="nearest")
+    enc_start, ok2 = log.interp(gimbal, t_start)
+    enc_end, ok3 = log.interp(gimbal, t_end)
+    ok = inside & ok0 & ok1 & ok2 & ok3 & (t_end > t_start)
+
+    A0, A1 = exp_so3(rv0[ok]), exp_so3(rv1[ok])
+    return A1 @ np.swapaxes(A0, -1, -2), enc_start[ok], enc_end[ok]
@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from gimbal_camera_calibration import exp_so3, log_so3
+from cue_projection import (
+    Calibration, Intrinsics, R_c_n, R_n_e, ecef_to_geodetic, geodetic_to_ecef,
+    project_targets, pixel_error_stats, cue_errors_from_log
+)
+from sensor_log import NS, SensorLogReader, SensorLogWriter
+
+# ------------------------------------------------------------
+# Camera, calibration and flight
+# ------------------------------------------------------------
+
+W, H = 1920, 1080
+intr = Intrinsics(K=[[1400, 0, 960], [0, 1400, 540], [0, 0, 1]],
+                  dist=(-0.12, 0.05, 0.0005, -0.0003, 0.0), size=(W, H))
+
+# Payload FRD -> camera (x right, y down, z optical) plus a small misalignment
+R_c_g = np.array([[0, 1, 0], [0, 0, 1], [1, 0, 0]], float)
+calib_true = Calibration(theta0=np.deg2rad(1.5),
+                         omega_mc=log_so3(exp_so3([0.004, -0.003, 0.006]) @ R_c_g),
+                         R_m_b=exp_so3([0.002, 0.001, -0.003]))
+
+# Calibration as estimated (small residual errors)
+calib_est = Calibration(theta0=calib_true.theta0 + np.deg2rad(0.05),
+                        omega_mc=log_so3(exp_so3([4e-4, -3e-4, 2e-4]) @ exp_so3(calib_true.omega_mc)),
+                        R_m_b=calib_true.R_m_b)
+
+RATE, DURATION = 30, 120
+GPS_SIGMA_M, ATT_SIGMA_RAD, ENC_SIGMA_RAD, PIX_SIGMA = 1.5, np.deg2rad(0.1), np.deg2rad(0.02), 1.0
+
+rng = np.random.default_rng(0)
+T = RATE * DURATION
+t = np.arange(T) / RATE
+home = np.array([34.0, -117.0, 600.0])
+
+# Platform: slow drift east at 600 m, attitude wobble, gimbal sweeping down-forward
+p_ned = np.column_stack([20 * np.sin(2 * np.pi * t / 60), 5 * t, -10 * np.sin(2 * np.pi * t / 40)])
+ecef_home = geodetic_to_ecef(home)
+gps_p = ecef_to_geodetic(ecef_home + p_ned @ R_n_e(home[0], home[1]))
+attitude = np.column_stack([np.deg2rad(3) * np.sin(2 * np.pi * 0.3 * t),
+                            np.deg2rad(2) * np.sin(2 * np.pi * 0.2 * t + 1),
+                            np.deg2rad(90) + np.deg2rad(5) * np.sin(2 * np.pi * 0.05 * t)])
+enc = np.column_stack([np.deg2rad(-90) + np.deg2rad(8) * np.sin(2 * np.pi * 0.07 * t),
+                       np.deg2rad(-35) + np.deg2rad(5) * np.sin(2 * np.pi * 0.05 * t),
+                       np.zeros(T)])
+
+# Targets on the ground ~1 km north of home
+M = 40
+tgt_ned = np.column_stack([rng.uniform(800, 1200, M), rng.uniform(-300, 300, M), np.full(M, 600.0)])
+gps_t = ecef_to_geodetic(ecef_home + tgt_ned @ R_n_e(home[0], home[1]))
+
+# ------------------------------------------------------------
+# Sanity: a point on the optical axis lands on the principal point
+# ------------------------------------------------------------
+
+R = R_c_n(attitude[:1], enc[:1], calib_true)[0]
+ecef_p = geodetic_to_ecef(gps_p[0])
+axis_pt = ecef_to_geodetic(ecef_p + R_n_e(gps_p[0, 0], gps_p[0, 1]).T @ (R.T @ [0, 0, 500.0]))
+uv, ok = project_targets(gps_p[:1], axis_pt[None], attitude[:1], enc[:1], calib_true, intr)
+assert ok[0, 0] and np.allclose(uv[0, 0], [960, 540], atol=1e-3), uv
+print("\n=== SANITY ===")
+print("optical-axis point ->", uv[0, 0], "(principal point 960, 540)")
+
+# ------------------------------------------------------------
+# Cue error vs logged observations
+# ------------------------------------------------------------
+
+uv_true, vis = project_targets(gps_p, gps_t, attitude, enc, calib_true, intr)
+uv_obs = uv_true + rng.normal(0, PIX_SIGMA, uv_true.shape)
+
+gps_meas = ecef_to_geodetic(geodetic_to_ecef(gps_p) + rng.normal(0, GPS_SIGMA_M, (T, 3)))
+att_meas = attitude + rng.normal(0, ATT_SIGMA_RAD, attitude.shape)
+enc_meas = enc + rng.normal(0, ENC_SIGMA_RAD, enc.shape)
+
+cases = [
+    ("true calibration, exact sensors", calib_true, gps_p, attitude, enc),
+    ("estimated calibration",            calib_est,  gps_p, attitude, enc),
+    ("estimated calibration + noise",    calib_est,  gps_meas, att_meas, enc_meas),
+]
+print(f"\n=== CUE ERROR [px] ({int(vis.sum())} visible target-frames of {T * M}) ===")
+print(f"{'case':34s} {'mean':>7} {'median':>7} {'rms':>7} {'p95':>7} {'max':>7} {'bias u':>7} {'bias v':>7}")
+for name, cal, gp, at, en in cases:
+    uv, ok = project_targets(gp, gps_t, at, en, cal, intr)
+    s = pixel_error_stats(uv, uv_obs, ok & vis)
+    print(f"{name:34s} {s['mean']:7.2f} {s['median']:7.2f} {s['rms']:7.2f} {s['p95']:7.2f} {s['max']:7.2f} "
+          f"{s['bias_u']:7.2f} {s['bias_v']:7.2f}")
+
+# ------------------------------------------------------------
+# Throughput: one call for every frame and every target
+# ------------------------------------------------------------
+
+reps = 3
+t0 = time.perf_counter()
+for _ in range(reps):
+    project_targets(gps_meas, gps_t, att_meas, enc_meas, calib_est, intr)
+dt = (time.perf_counter() - t0) / reps
+print(f"\n=== THROUGHPUT ===\n{T} frames x {M} targets in {dt * 1e3:.0f} ms ({T * M / dt / 1e6:.2f} M cues/s)")
+
+# ------------------------------------------------------------
+# Straight from a sensor log (observations of target 0)
+# ------------------------------------------------------------
+
+tmp = tempfile.mkdtemp(prefix="cue_log_")
+t_ns = np.round(t * NS).astype(np.int64)
+with SensorLogWriter(os.path.join(tmp, "log")) as w:
+    w.append_many("gps", t_ns, gps_meas)
+    w.append_many("attitude", t_ns, att_meas)
+    w.append_many("gimbal", t_ns, enc_meas)
+    seen = np.flatnonzero(vis[:, 0])
+    w.append_many("observation", t_ns[seen] + 1_000_000,   # 1 ms after the platform sample
+                  np.column_stack([seen, uv_obs[seen, 0, 0], uv_obs[seen, 0, 1], np.ones(len(seen))]))
+stats, _, _ = cue_errors_from_log(SensorLogReader(os.path.join(tmp, "log")), gps_t[0], calib_est, intr)
+print("\n=== FROM LOG (target 0) ===")
+print({k: round(v, 2) for k, v in stats.items()})
+shutil.rmtree(tmp)
@@ -0,0 +1,104 @@
+import time
+
+import numpy as np
+import gimbal_camera_calibration as gcal
+from gimbal_camera_calibration import (
+    R_m_g, R_c_m, exp_so3, Maneuver, solve_calibration, residual_jacobian, stack_maneuvers
+)
+from online_calibration import OnlineCalibrator
+
+# ------------------------------------------------------------
+# Ground-truth calibration parameters (as in sim_gimbal.py)
+# ------------------------------------------------------------
+
+theta0_true = np.deg2rad(127)
+
+ang = np.deg2rad([-130,150,120])
+R_m_to_c = gcal.Rx(ang[0]) @ gcal.Ry(ang[1]) @ gcal.Rz(ang[2])
+omega_mc_true = gcal.log_so3(R_m_to_c)
+
+Rcm_true = R_c_m(omega_mc_true)
+
+NOISE_RAD = 5e-4       # camera delta-rotation noise (1 sigma per axis)
+N_MANEUVERS = 300
+
+# ------------------------------------------------------------
+# Captive-flight style stream: random encoder waypoints, one maneuver per leg
+# ------------------------------------------------------------
+
+rng = np.random.default_rng(0)
+encoders = [np.zeros(3)]
+for _ in range(N_MANEUVERS):
+    encoders.append(np.clip(encoders[-1] + rng.uniform(-0.4, 0.4, 3), -1.2, 1.2))
+
+maneuvers = []
+
+for enc_start, enc_end in zip(encoders[:-1], encoders[1:]):
+
+    Delta_R_m = R_m_g(enc_end, theta0_true) @ R_m_g(enc_start, theta0_true).T
+    Delta_R_c = Rcm_true @ Delta_R_m @ Rcm_true.T
+    noise = exp_so3(rng.normal(0, NOISE_RAD, 3))
+
+    maneuvers.append(
+        Maneuver(
+            R_c_meas=noise @ Delta_R_c,
+            enc_start=enc_start,
+            enc_end=enc_end
+        )
+    )
+
+# ------------------------------------------------------------
+# Batch reference
+# ------------------------------------------------------------
+
+sol = solve_calibration(maneuvers)
+J = residual_jacobian(sol.x, *stack_maneuvers(maneuvers)).reshape(-1, 4)
+sigma_batch = NOISE_RAD * np.sqrt(np.diag(np.linalg.inv(J.T @ J)))
+
+# ------------------------------------------------------------
+# Online estimate, streamed
+# ------------------------------------------------------------
+
+def err(x):
+    return np.rad2deg(x[0] - theta0_true) * 1e3, np.linalg.norm(x[1:4] - omega_mc_true) * 1e3
+
+print("\n=== TRUE PARAMETERS ===")
+print("theta0      :", np.rad2deg(theta0_true))
+print("omega_mc    :", omega_mc_true)
+
+print("\n=== ONLINE CONVERGENCE (window=20) ===")
+print(f"{'n':>4} {'theta0 [deg]':>13} {'err [mdeg]':>11} {'sig [mdeg]':>11} {'|d omega| [mrad]':>17} "
+      f"{'cond':>9} {'nis':>8}  conv  weakest direction")
+
+cal = OnlineCalibrator(meas_sigma=NOISE_RAD, window=20)
+report = {1, 2, 3, 5, 10, 20, 50, 100, 200, N_MANEUVERS}
+first_converged = None
+for m in maneuvers:
+    d = cal.add(m)
+    if d["converged"] and first_converged is None:
+        first_converged = d["n"]
+    if d["n"] in report:
+        e_t, e_w = err(d["x"])
+        print(f"{d['n']:4d} {np.rad2deg(d['x'][0]):13.4f} {e_t:11.3f} {np.rad2deg(d['sigma'][0]) * 1e3:11.3f} "
+              f"{e_w:17.4f} {d['cond']:9.2e} {d['nis']:8.2f}  {'yes' if d['converged'] else 'no ':4s}  "
+              f"{np.array2string(d['weakest'], precision=2, suppress_small=True)}")
+print("first converged at maneuver:", first_converged)
+
+# ------------------------------------------------------------
+# Online vs batch
+# ------------------------------------------------------------
+
+print("\n=== ONLINE vs BATCH ===")
+print(f"{'window':>7} {'us/update':>10} {'theta0 - batch [mdeg]':>22} {'omega - batch [mrad]':>21} {'max |diff| / sigma_batch':>25}")
+for window in (0, 5, 20, 100):
+    cal = OnlineCalibrator(meas_sigma=NOISE_RAD, window=window)
+    t0 = time.perf_counter()
+    for m in maneuvers:
+        cal.add(m)
+    dt = (time.perf_counter() - t0) / len(maneuvers)
+    diff = cal.x - sol.x
+    print(f"{window:7d} {dt * 1e6:10.0f} {np.rad2deg(diff[0]) * 1e3:22.4f} {np.linalg.norm(diff[1:]) * 1e3:21.5f} "
+          f"{np.max(np.abs(diff) / sigma_batch):25.3f}")
+
+print("\nbatch theta0 :", np.rad2deg(sol.x[0]), " sigma [mdeg]:", np.rad2deg(sigma_batch[0]) * 1e3)
+print("batch omega  :", sol.x[1:4])
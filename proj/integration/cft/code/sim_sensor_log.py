@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import gimbal_camera_calibration as gcal
+from gimbal_camera_calibration import R_m_g, R_c_m, exp_so3, log_so3, solve_calibration
+from sensor_log import NS, SensorLogReader, SensorLogWriter, maneuvers_from_log
+
+# ------------------------------------------------------------
+# Ground-truth calibration parameters (as in sim_gimbal.py)
+# ------------------------------------------------------------
+
+theta0_true = np.deg2rad(127)
+
+ang = np.deg2rad([-130,150,120])
+omega_mc_true = gcal.log_so3(gcal.Rx(ang[0]) @ gcal.Ry(ang[1]) @ gcal.Rz(ang[2]))
+Rcm_true = R_c_m(omega_mc_true)
+
+DURATION_S = 600          # captive-flight capture
+RATES = {"imu": 1000, "gimbal": 200, "attitude": 50, "camera": 30}
+NOISE_RAD = 5e-4          # camera attitude noise
+BIG_ROWS = 20_000_000     # bulk IMU rows for the large-log read test (~1.1 GB)
+
+rng = np.random.default_rng(0)
+tmp = tempfile.mkdtemp(prefix="sensor_log_")
+
+
+def encoders(t):
+    """Smooth gimbal sweep: (N,3) yaw, pitch, roll [rad]."""
+    return np.column_stack([
+        0.9 * np.sin(2 * np.pi * 0.05 * t),
+        0.6 * np.sin(2 * np.pi * 0.07 * t + 1.0),
+        0.3 * np.sin(2 * np.pi * 0.11 * t + 2.0),
+    ])
+
+
+# ------------------------------------------------------------
+# Live capture: every sample is appended from the acquisition loop
+# ------------------------------------------------------------
+
+streams = {}
+for name, rate in RATES.items():
+    t = np.arange(int(DURATION_S * rate)) / rate
+    streams[name] = (np.round(t * NS).astype(np.int64), t)
+
+samples = []
+t_ns, t = streams["imu"]
+samples.append(("imu", t_ns, rng.normal(0, 0.01, (len(t), 6))))
+t_ns, t = streams["gimbal"]
+samples.append(("gimbal", t_ns, encoders(t)))
+t_ns, t = streams["attitude"]
+samples.append(("attitude", t_ns, rng.normal(0, 0.02, (len(t), 3))))
+t_ns, t = streams["camera"]
+A = Rcm_true @ R_m_g(encoders(t), theta0_true) @ Rcm_true.T
+A = exp_so3(rng.normal(0, NOISE_RAD, (len(t), 3))) @ A
+samples.append(("camera", t_ns, np.column_stack([np.arange(len(t)), log_so3(A)])))
+
+# Interleave all streams in time order, as the live process would see them
+order = np.argsort(np.concatenate([s[1] for s in samples]), kind="stable")
+flat = [(name, int(tn), tuple(v)) for name, tns, vals in samples for tn, v in zip(tns, vals)]
+flat = [flat[i] for i in order]
+
+path = os.path.join(tmp, "capture")
+writer = SensorLogWriter(path)
+lat = np.empty(len(flat))
+t0 = time.perf_counter()
+for i, (name, tn, v) in enumerate(flat):
+    a = time.perf_counter()
+    writer.append(name, tn, *v)
+    lat[i] = time.perf_counter() - a
+t_append = time.perf_counter() - t0
+writer.close()
+t_total = time.perf_counter() - t0
+
+print("\n=== LIVE LOGGING ===")
+print(f"rows        : {len(flat)} ({writer.stats['batches']} batches, {writer.stats['dropped']} dropped)")
+print(f"append      : mean {lat.mean() * 1e6:.2f} us, p99.9 {np.quantile(lat, 0.999) * 1e6:.2f} us, "
+      f"max {lat.max() * 1e6:.1f} us")
+print(f"throughput  : {len(flat) / t_append:.0f} rows/s appended, all on disk after {t_total:.2f} s")
+
+# ------------------------------------------------------------
+# Calibration straight from the log: one maneuver per second of camera frames
+# ------------------------------------------------------------
+
+log = SensorLogReader(path)
+t0 = time.perf_counter()
+starts = np.arange(0, DURATION_S - 1) * NS
+data = maneuvers_from_log(log, starts, starts + NS)
+sol = solve_calibration(data)
+dt = time.perf_counter() - t0
+
+print("\n=== CALIBRATION FROM LOG ===")
+print(f"maneuvers   : {len(data[0])} | read + solve {dt:.2f} s")
+print("theta0      :", np.rad2deg(theta0_true), "->", np.rad2deg(sol.x[0]))
+print("omega_mc    :", omega_mc_true, "->", sol.x[1:4])
+
+# ------------------------------------------------------------
+# Large log: bulk IMU, aligned to camera timestamps in chunks
+# ------------------------------------------------------------
+
+big = os.path.join(tmp, "big")
+t0 = time.perf_counter()
+with SensorLogWriter(big, {"imu": ["gx", "gy", "gz", "ax", "ay", "az"], "camera": ["frame"]},
+                     capacity=1 << 22) as w:
+    step = 1_000_000
+    for i in range(0, BIG_ROWS, step):
+        tt = (np.arange(i, i + step, dtype=np.int64) * NS) // 1000
+        w.append_many("imu", tt, rng.normal(0, 0.01, (step, 6)))
+        frames = np.arange(-(-i // 33), (i + step) // 33 + (1 if (i + step) % 33 else 0))
+        frames = frames[frames * 33 < i + step]
+        w.append_many("camera", (frames * 33 * NS) // 1000, frames[:, None])
+t_write = time.perf_counter() - t0
+size = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(big) for f in fs)
+
+log = SensorLogReader(big)
+t0 = time.perf_counter()
+n = 0
+for tq, aligned in log.iter_aligned("camera", ["imu"], chunk=1 << 18):
+    vals, ok = aligned["imu"]
+    n += int(ok.sum())
+t_align = time.perf_counter() - t0
+
+print("\n=== LARGE LOG ===")
+print(f"size        : {size / 1e9:.2f} GB, {log.count('imu')} imu rows, {log.count('camera')} frames")
+print(f"bulk write  : {t_write:.1f} s ({size / 1e6 / t_write:.0f} MB/s)")
+print(f"align imu -> frames: {n} rows in {t_align:.2f} s ({n / t_align / 1e6:.1f} M rows/s)")
+
+shutil.rmtree(tmp)
@@ -1,86 +1,291 @@
 # Split between train and val folders
+#
+# Deterministic, class-stratified train/validation split for a YOLO dataset:
+#   <datapath>/images/...   <datapath>/labels/...   (labels may be flat or mirror images/)
+#
+# - Label files are scanned once; each image is assigned to the stratum of the
+#   rarest class it contains (background images form their own stratum), and each
+#   stratum is shuffled with a fixed seed and split by --train_pct.
+# - Splits are materialized as hardlinks (default), symlinks, copies (parallel),
+#   or just a manifest (train.txt / val.txt listing image paths) for Ultralytics.
+#   Hardlinks fall back to copies when source and destination are on different
+#   filesystems.
+#
+# - With --groups (the JSON written by common/dedup_yolo.py), each cluster of
+#   near-duplicate images is split as one unit, so no cluster spans train and
+#   validation.
+#
+# Inside the repo, the persistent dataset index (common/dataset_index.py) is used
+# instead of walking and parsing the label files; standalone (e.g. downloaded into
+# Colab) the script scans the folders itself.
+#
+# Output layout (same as before, what create_data_yaml.py expects):
+#   <out>/train/images  <out>/train/labels  <out>/validation/images  <out>/validation/labels
+#
+# Example:
+#   python train_val_split.py --datapath=/content/custom_data --train_pct=.9 --seed=0
 
 from pathlib import Path
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import random
+import json
 import os
 import sys
 import shutil
+import time
 import argparse
 
+# Use the repo's dataset index when available (not present when downloaded standalone)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', '..', 'common'))
+try:
+    from dataset_index import open_index
+except ImportError:
+    open_index = None
+finally:
+    sys.path.pop(0)
 
-# Define and parse user input arguments
-
-parser = argparse.ArgumentParser()
-parser.add_argument('--datapath', help='Path to data folder containing image and annotation files',
-                    required=True)
-parser.add_argument('--train_pct', help='Ratio of images to go to train folder; \
-                    the rest go to validation folder (example: ".8")',
-                    default=.8)
-
-args = parser.parse_args()
-
-data_path = args.datapath
-train_percent = float(args.train_pct)
-
-# Check for valid entries
-if not os.path.isdir(data_path):
-   print('Directory specified by --datapath not found. Verify the path is correct (and uses double back slashes if on Windows) and try again.')
-   sys.exit(0)
-if train_percent < .01 or train_percent > 0.99:
-   print('Invalid entry for train_pct. Please enter a number between .01 and .99.')
-   sys.exit(0)
-val_percent = 1 - train_percent
-
-# Define path to input dataset 
-input_image_path = os.path.join(data_path,'images')
-input_label_path = os.path.join(data_path,'labels')
-
-# Define paths to image and annotation folders
-cwd = os.getcwd()
-train_img_path = os.path.join(cwd,'data/train/images')
-train_txt_path = os.path.join(cwd,'data/train/labels')
-val_img_path = os.path.join(cwd,'data/validation/images')
-val_txt_path = os.path.join(cwd,'data/validation/labels')
-
-# Create folders if they don't already exist
-for dir_path in [train_img_path, train_txt_path, val_img_path, val_txt_path]:
-   if not os.path.exists(dir_path):
-      os.makedirs(dir_path)
-      print(f'Created folder at {dir_path}.')
-
-
-# Get list of all images and annotation files
-img_file_list = [path for path in Path(input_image_path).rglob('*')]
-txt_file_list = [path for path in Path(input_label_path).rglob('*')]
-
-print(f'Number of image files: {len(img_file_list)}')
-print(f'Number of annotation files: {len(txt_file_list)}')
-
-# Determine number of files to move to each folder
-file_num = len(img_file_list)
-train_num = int(file_num*train_percent)
-val_num = file_num - train_num
-print('Images moving to train: %d' % train_num)
-print('Images moving to validation: %d' % val_num)
-
-# Select files randomly and copy them to train or val folders
-for i, set_num in enumerate([train_num, val_num]):
-  for ii in range(set_num):
-    img_path = random.choice(img_file_list)
-    img_fn = img_path.name
-    base_fn = img_path.stem
-    txt_fn = base_fn + '.txt'
-    txt_path = os.path.join(input_label_path,txt_fn)
-
-    if i == 0: # Copy first set of files to train folders
-      new_img_path, new_txt_path = train_img_path, train_txt_path
-    elif i == 1: # Copy second set of files to the validation folders
-      new_img_path, new_txt_path = val_img_path, val_txt_path
-
-    shutil.copy(img_path, os.path.join(new_img_path,img_fn))
-    #os.rename(img_path, os.path.join(new_img_path,img_fn))
-    if os.path.exists(txt_path): # If txt path does not exist, this is a background image, so skip txt file
-      shutil.copy(txt_path,os.path.join(new_txt_path,txt_fn))
-      #os.rename(txt_path,os.path.join(new_txt_path,txt_fn))
-
-    img_file_list.remove(img_path)
+IMG_EXTS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff'}
+MODES = ('hardlink', 'symlink', 'copy', 'manifest')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--datapath', help='Path to data folder containing image and annotation files',
+                        required=True)
+    parser.add_argument('--train_pct', help='Ratio of images to go to train folder; \
+                        the rest go to validation folder (example: ".8")',
+                        default=.8)
+    parser.add_argument('--seed', help='Random seed; the same seed and data give the same split',
+                        type=int, default=0)
+    parser.add_argument('--mode', help='How to materialize the split (default: hardlink)',
+                        choices=MODES, default='hardlink')
+    parser.add_argument('--out', help='Output folder (default: ./data)',
+                        default=os.path.join(os.getcwd(), 'data'))
+    parser.add_argument('--workers', help='Threads used to link/copy files', type=int, default=8)
+    parser.add_argument('--groups', help='JSON of near-duplicate clusters (dedup_yolo.py); each cluster stays in one split',
+                        default=None)
+    parser.add_argument('--clean', help='Empty the output split folders first (avoids stale files from a previous split)',
+                        action='store_true')
+    return parser.parse_args()
+
+
+def scan_index(data_path):
+    """scan_dataset() backed by the persistent dataset index."""
+    index = open_index(data_path)
+    a = index.arrays()
+    image_root, label_root = index.images_dir, index.labels_dir
+    off = a['offsets']
+    cls_col = a['boxes'][:, 0].astype(int)
+    items = []
+    for i, rel in enumerate(a['rel']):
+        lbl = label_root / a['label_rel'][i] if a['label_rel'][i] else None
+        items.append((image_root / rel, lbl, frozenset(cls_col[off[i]:off[i + 1]].tolist())))
+    index.close()
+    return items, image_root
+
+
+def scan_dataset(data_path):
+    """
+    Return a sorted list of (image_path, label_path_or_None, frozenset_of_class_ids).
+    Each directory is walked once and each label file is read once.
+    """
+    if open_index is not None:
+        return scan_index(data_path)
+
+    image_root = Path(data_path) / 'images'
+    label_root = Path(data_path) / 'labels'
+
+    labels_by_rel = {}
+    if label_root.is_dir():
+        for dirpath, _, files in os.walk(label_root):
+            for fn in files:
+                if fn.endswith('.txt'):
+                    p = Path(dirpath) / fn
+                    labels_by_rel[p.relative_to(label_root).with_suffix('').as_posix()] = p
+
+    images = []
+    for dirpath, _, files in os.walk(image_root):
+        for fn in files:
+            p = Path(dirpath) / fn
+            if p.suffix.lower() in IMG_EXTS:
+                images.append(p)
+
+    # Flat labels/<stem>.txt fallback, only where the stem names a single image
+    stem_count = Counter(p.stem for p in images)
+    ambiguous = 0
+    items = []
+    for p in images:
+        rel = p.relative_to(image_root).with_suffix('').as_posix()
+        lbl = labels_by_rel.get(rel)
+        if lbl is None and p.stem in labels_by_rel:
+            if stem_count[p.stem] == 1:
+                lbl = labels_by_rel[p.stem]
+            else:
+                ambiguous += 1
+        classes = set()
+        if lbl is not None:
+            for ln in lbl.read_text().splitlines():
+                parts = ln.split()
+                if len(parts) >= 5:
+                    classes.add(int(float(parts[0])))
+        items.append((p, lbl, frozenset(classes)))
+    if ambiguous:
+        print(f'WARNING: {ambiguous} images share a file name with another image and have no label '
+              f'mirroring images/; their flat labels/<stem>.txt is ambiguous and was not used')
+    items.sort(key=lambda it: it[0])
+    return items, image_root
+
+
+def load_groups(path, items, image_root):
+    """Return a list of index lists (units that must stay together) from a dedup_yolo.py cluster file."""
+    clusters = json.loads(Path(path).read_text())['clusters']
+    pos = {it[0].relative_to(image_root).as_posix(): i for i, it in enumerate(items)}
+    groups, missing = [], 0
+    for cluster in clusters:
+        idx = sorted(pos[rel] for rel in cluster if rel in pos)
+        missing += len(cluster) - len(idx)
+        if len(idx) > 1:
+            groups.append(idx)
+    if missing:
+        print(f'WARNING: {missing} images in {path} are not in the dataset (re-run dedup_yolo.py?)')
+    return groups
+
+
+def stratified_split(items, train_frac, seed, groups=None):
+    """
+    Return (train_idx, val_idx); each image is stratified by the rarest class it contains.
+    Images listed together in groups are assigned as one unit (stratified by the rarest
+    class in the whole group).
+    """
+    units = {i: [i] for i in range(len(items))}
+    for g in groups or ():
+        for i in g[1:]:
+            units.pop(i, None)
+        units[g[0]] = g
+
+    class_counts = Counter(c for _, _, cls in items for c in cls)
+    strata = defaultdict(list)
+    for first in sorted(units):
+        cls = set().union(*(items[i][2] for i in units[first]))
+        key = min(cls, key=lambda c: (class_counts[c], c)) if cls else -1
+        strata[key].append(units[first])
+
+    rng = random.Random(seed)
+    train_idx, val_idx = [], []
+    for key in sorted(strata):
+        unit_list = strata[key]
+        rng.shuffle(unit_list)
+        # Split by image count, not unit count: a unit goes to train while its
+        # midpoint in the cumulative image count is within the train share
+        n_train = round(sum(map(len, unit_list)) * train_frac)
+        seen = 0
+        for u in unit_list:
+            (train_idx if seen + len(u) / 2 <= n_train else val_idx).extend(u)
+            seen += len(u)
+    return sorted(train_idx), sorted(val_idx)
+
+
+def place_file(src, dst, mode):
+    """Create dst from src; returns the method actually used."""
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    if mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return 'hardlink'
+        except OSError:
+            shutil.copyfile(src, dst)
+            return 'copy'
+    if mode == 'symlink':
+        os.symlink(os.path.abspath(src), dst)
+        return 'symlink'
+    shutil.copyfile(src, dst)
+    return 'copy'
+
+
+def materialize(items, idx, image_root, img_dir, txt_dir, mode, workers):
+    jobs = []
+    for i in idx:
+        img_path, lbl_path, _ = items[i]
+        rel = img_path.relative_to(image_root)
+        jobs.append((img_path, img_dir / rel))
+        # If there is no label file, this is a background image, so skip the txt file
+        if lbl_path is not None:
+            jobs.append((lbl_path, txt_dir / rel.with_suffix('.txt')))
+
+    for d in {dst.parent for _, dst in jobs}:
+        d.mkdir(parents=True, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        used = Counter(ex.map(lambda job: place_file(job[0], job[1], mode), jobs))
+    return used
+
+
+def main():
+    args = parse_args()
+    data_path = args.datapath
+    train_percent = float(args.train_pct)
+
+    # Check for valid entries
+    if not os.path.isdir(data_path):
+        print('Directory specified by --datapath not found. Verify the path is correct (and uses double back slashes if on Windows) and try again.')
+        sys.exit(0)
+    if train_percent < .01 or train_percent > 0.99:
+        print('Invalid entry for train_pct. Please enter a number between .01 and .99.')
+        sys.exit(0)
+
+    t0 = time.perf_counter()
+    items, image_root = scan_dataset(data_path)
+    n_labels = sum(1 for _, lbl, _ in items if lbl is not None)
+    print(f'Number of image files: {len(items)}')
+    print(f'Number of annotation files: {n_labels}')
+    if not items:
+        sys.exit(0)
+
+    groups = load_groups(args.groups, items, image_root) if args.groups else None
+    if groups:
+        print(f'Near-duplicate clusters kept together: {len(groups)} ({sum(map(len, groups))} images)')
+    train_idx, val_idx = stratified_split(items, train_percent, args.seed, groups)
+    print('Images going to train: %d' % len(train_idx))
+    print('Images going to validation: %d' % len(val_idx))
+
+    # Per-class image counts, to check the stratification
+    train_counts = Counter(c for i in train_idx for c in items[i][2])
+    val_counts = Counter(c for i in val_idx for c in items[i][2])
+    print(f'{"class":>6}{"train":>8}{"val":>8}')
+    for c in sorted(set(train_counts) | set(val_counts)):
+        print(f'{c:>6}{train_counts[c]:>8}{val_counts[c]:>8}')
+
+    out = Path(args.out)
+    if args.mode == 'manifest':
+        out.mkdir(parents=True, exist_ok=True)
+        for name, idx in (('train.txt', train_idx), ('val.txt', val_idx)):
+            (out / name).write_text(''.join(f'{items[i][0].resolve()}\n' for i in idx))
+        print(f'Wrote {out / "train.txt"} and {out / "val.txt"} '
+              f'(point data.yaml train/val at these files) in {time.perf_counter() - t0:.2f} s')
+        return
+
+    splits = (
+        ('train', train_idx),
+        ('validation', val_idx),
+    )
+    for split, _ in splits:
+        for sub in ('images', 'labels'):
+            d = out / split / sub
+            if d.exists() and any(d.iterdir()):
+                if args.clean:
+                    shutil.rmtree(d)
+                else:
+                    print(f'WARNING: {d} is not empty; files from a previous split may remain (use --clean).')
+            d.mkdir(parents=True, exist_ok=True)
+
+    for split, idx in splits:
+        used = materialize(items, idx, image_root, out / split / 'images', out / split / 'labels',
+                           args.mode, args.workers)
+        print(f'{split}: ' + ', '.join(f'{n} {m}' for m, n in sorted(used.items())))
+    print(f'Split written to {out} in {time.perf_counter() - t0:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,31 @@ import cv2
 import numpy as np
 from ultralytics import YOLO
 
+ROOT = os.path.realpath(__file__).rsplit('/', 3)[0]
+if ROOT + '/common' not in sys.path:
+    sys.path.insert(0, ROOT + '/common')
+try:
+    from runtime.metrics import PipelineMetrics
+except ImportError:  # standalone download (see README): no repo, metrics become no-ops
+    PipelineMetrics = None
+try:
+    from tracking.mot import ByteTracker, draw_tracks
+except ImportError:  # standalone download: --track needs the repo's common/tracking
+    ByteTracker = draw_tracks = None
+
+
+class _NoMetrics:
+    """Stands in for PipelineMetrics when the repo's runtime package is not available."""
+    def __getattr__(self, name):
+        return self
+
+    def __getitem__(self, key):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
 # Define and parse user input arguments
 
 parser = argparse.ArgumentParser()
@@ -23,6 +48,13 @@ parser.add_argument('--resolution', help='Resolution in WxH to display inference
                     default=None)
 parser.add_argument('--record', help='Record results from video or webcam and save it as "demo1.avi". Must specify --resolution argument to record.',
                     action='store_true')
+parser.add_argument('--metrics-port', help='Serve FPS/latency/drop counters in Prometheus text format at \
+                    http://127.0.0.1:<port>/metrics (example: "9108")',
+                    default=None)
+parser.add_argument('--track', help='Assign persistent IDs with the ByteTrack-style tracker (video and camera sources)',
+                    action='store_true')
+parser.add_argument('--headless', help='Do not open a display window (use with --metrics-port to monitor)',
+                    action='store_true')
 
 args = parser.parse_args()
 
@@ -33,6 +65,8 @@ img_source = args.source
 min_thresh = args.thresh
 user_res = args.resolution
 record = args.record
+headless = args.headless
+track = args.track
 
 # Check if model file exists and is valid
 if (not os.path.exists(model_path)):
@@ -119,6 +153,20 @@ elif source_type == 'picamera':
 bbox_colors = [(164,120,87), (68,148,228), (93,97,209), (178,182,133), (88,159,106), 
               (96,202,231), (159,124,168), (169,162,241), (98,118,150), (172,176,184)]
 
+# Set up tracker (detections below --thresh only extend existing tracks)
+if track and ByteTracker is None:
+    print('[track] tracking.mot not found (standalone script); running without --track')
+    track = False
+tracker = ByteTracker(high_thresh=float(min_thresh), low_thresh=0.1) if track else None
+
+# Set up telemetry
+metrics = PipelineMetrics() if PipelineMetrics is not None else _NoMetrics()
+if args.metrics_port:
+    if PipelineMetrics is None:
+        print('[metrics] runtime.metrics not found (standalone script); --metrics-port ignored')
+    else:
+        metrics.serve(int(args.metrics_port))
+
 # Initialize control and status variables
 avg_frame_rate = 0
 frame_rate_buffer = []
@@ -129,6 +177,7 @@ img_count = 0
 while True:
 
     t_start = time.perf_counter()
+    t_cap = t_start
 
     # Load frame from image source
     if source_type == 'image' or source_type == 'folder': # If source is image or image folder, load the image using its filename
@@ -157,12 +206,19 @@ while True:
             print('Unable to read frames from the Picamera. This indicates the camera is disconnected or not working. Exiting program.')
             break
 
+    metrics.captured.inc()
+
     # Resize frame to desired display resolution
     if resize == True:
         frame = cv2.resize(frame,(resW,resH))
 
     # Run inference on frame
+    t_inf = time.perf_counter()
+    metrics.stage['capture'].observe(t_inf - t_cap)
     results = model(frame, verbose=False)
+    t_draw = time.perf_counter()
+    metrics.stage['inference'].observe(t_draw - t_inf)
+    metrics.inferred.inc()
 
     # Extract results
     detections = results[0].boxes
@@ -170,6 +226,18 @@ while True:
     # Initialize variable for basic object counting example
     object_count = 0
 
+    if tracker is not None:
+        t_trk = time.perf_counter()
+        dets = np.column_stack([
+            detections.xyxy.cpu().numpy(), detections.conf.cpu().numpy(), detections.cls.cpu().numpy()
+        ]) if len(detections) else np.zeros((0, 6))
+        tracks = tracker.update(dets)
+        draw_tracks(frame, tracks, labels)
+        object_count = len(tracks)
+        metrics.tracks.set(object_count)
+        metrics.stage['track'].observe(time.perf_counter() - t_trk)
+        detections = []  # already drawn as tracks
+
     # Go through each detection and get bbox coords, confidence, and class
     for i in range(len(detections)):
 
@@ -207,14 +275,22 @@ while True:
     
     # Display detection results
     cv2.putText(frame, f'Number of objects: {object_count}', (10,40), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2) # Draw total number of detected objects
-    cv2.imshow('YOLO detection results',frame) # Display image
+    metrics.detections.inc(object_count)
+    t_disp = time.perf_counter()
+    metrics.stage['draw'].observe(t_disp - t_draw)
     if record: recorder.write(frame)
 
-    # If inferencing on individual images, wait for user keypress before moving to next image. Otherwise, wait 5ms before moving to next frame.
-    if source_type == 'image' or source_type == 'folder':
-        key = cv2.waitKey()
-    elif source_type == 'video' or source_type == 'usb' or source_type == 'picamera':
-        key = cv2.waitKey(5)
+    if headless:
+        key = -1
+    else:
+        cv2.imshow('YOLO detection results',frame) # Display image
+
+        # If inferencing on individual images, wait for user keypress before moving to next image. Otherwise, wait 5ms before moving to next frame.
+        if source_type == 'image' or source_type == 'folder':
+            key = cv2.waitKey()
+        elif source_type == 'video' or source_type == 'usb' or source_type == 'picamera':
+            key = cv2.waitKey(5)
+    metrics.stage['display'].observe(time.perf_counter() - t_disp)
     
     if key == ord('q') or key == ord('Q'): # Press 'q' to quit
         break
@@ -226,6 +302,7 @@ while True:
     # Calculate FPS for this frame
     t_stop = time.perf_counter()
     frame_rate_calc = float(1/(t_stop - t_start))
+    metrics.stage['total'].observe(t_stop - t_start)
 
     # Append FPS result to frame_rate_buffer (for finding average FPS over multiple frames)
     if len(frame_rate_buffer) >= fps_avg_len:
@@ -236,6 +313,7 @@ while True:
 
     # Calculate average FPS for past frames
     avg_frame_rate = np.mean(frame_rate_buffer)
+    metrics.fps.set(avg_frame_rate)
 
 
 # Clean up
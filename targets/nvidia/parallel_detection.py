@@ -1,26 +1,51 @@
 #!/usr/bin/env python3
+import os
+import sys
 import time
 from pathlib import Path
 import threading
 
 import cv2
+import numpy as np
 import torch
 from ultralytics import YOLO  # only needed if util.get_model uses it internally
 
 import util  # uses util.get_model, util.DEVICE, util.IMG_SIZE
 
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT / "common") not in sys.path:
+    sys.path.insert(0, str(ROOT / "common"))
+from runtime import thread_config
+from runtime.profiler import SamplingProfiler
+from runtime.metrics import PipelineMetrics
+from tracking.mot import ByteTracker, draw_tracks
+
 # Camera settings
 CAM_INDEX = 0           # /dev/video0
 WIDTH, HEIGHT = 1280, 720
 CONF_THRES = 0.75       # YOLO confidence threshold
+LOW_CONF = 0.5          # detector floor; boxes in [LOW_CONF, CONF_THRES) only extend existing tracks
+TRACK = True            # ByteTrack-style track IDs instead of per-frame detections
 
 # Paths
 FILE_PATH  = Path(__file__).resolve().parent
 #MODEL_PATH = (FILE_PATH / "yolo11n_coins.pt").resolve()
 MODEL_PATH = (FILE_PATH.parent.parent / "models" / "yolo11n_toy_cars_190.pt").resolve()
+THREAD_CONFIG_PATH = (FILE_PATH / "thread_config.json").resolve()  # written by tune_threads.py
+PROFILE_DIR = (FILE_PATH / "profiles").resolve()
+
+# On-demand profiler (press 'p' or send SIGUSR1)
+PROFILE_RATE_HZ = 200
+PROFILE_SECONDS = 10.0
+
+# Telemetry: Prometheus text at http://127.0.0.1:METRICS_PORT/metrics (None = off)
+METRICS_PORT = 9108
+HEADLESS = not os.environ.get("DISPLAY")  # no window when there is no X display
 
 def main():
     print(f"[main] Using MODEL_PATH = {MODEL_PATH}")
+    thread_cfg = thread_config.load_thread_config(THREAD_CONFIG_PATH)
+    thread_config.apply_thread_config(thread_cfg)
     model = util.get_model(MODEL_PATH)
 
     # Open camera
@@ -36,20 +61,36 @@ def main():
     fourcc = cv2.VideoWriter_fourcc(*"MJPG")
     cap.set(cv2.CAP_PROP_FOURCC, fourcc)
 
-    cv2.namedWindow("YOLO11 Camera", cv2.WINDOW_NORMAL)
-    cv2.resizeWindow("YOLO11 Camera", WIDTH, HEIGHT)
+    if not HEADLESS:
+        cv2.namedWindow("YOLO11 Camera", cv2.WINDOW_NORMAL)
+        cv2.resizeWindow("YOLO11 Camera", WIDTH, HEIGHT)
+
+    metrics = PipelineMetrics()
+    if METRICS_PORT is not None:
+        try:
+            metrics.serve(METRICS_PORT)
+        except OSError as e:  # port busy (second instance, other exporter): run without telemetry
+            print(f"[metrics] disabled: cannot bind port {METRICS_PORT} ({e})")
+
+    tracker = ByteTracker(high_thresh=CONF_THRES, low_thresh=LOW_CONF, frame_rate=30) if TRACK else None
 
-    print("[main] Press 'q' to quit.")
+    profiler = SamplingProfiler(PROFILE_DIR, rate_hz=PROFILE_RATE_HZ, duration_s=PROFILE_SECONDS)
+    profiler.install_signal()
+
+    print("[main] Press 'q' to quit, 'p' to profile.")
 
     # Shared state for threads
-    latest_frame = {"img": None}
+    latest_frame = {"img": None, "seq": 0}
     cond = threading.Condition()
     stop_event = threading.Event()
 
     def capture_loop():
         """Continuously grab frames from the camera and notify waiters."""
+        thread_config.pin_current_thread((thread_cfg or {}).get("capture_cores"))
         while not stop_event.is_set():
+            t_cap = time.perf_counter()
             ret, frame = cap.read()
+            metrics.stage["capture"].observe(time.perf_counter() - t_cap)
             if not ret:
                 # If capture fails, short notify + exit
                 with cond:
@@ -57,8 +98,10 @@ def main():
                     cond.notify_all()
                 break
 
+            metrics.captured.inc()
             with cond:
                 latest_frame["img"] = frame
+                latest_frame["seq"] += 1
                 cond.notify_all()  # wake up main thread waiting for a frame
 
     # Start capture thread
@@ -68,6 +111,7 @@ def main():
 
     fps_ema = 0.0
     alpha = 0.1  # smoothing factor; smaller = smoother
+    last_seq = 0
 
 
     try:
@@ -81,19 +125,28 @@ def main():
                     break
 
                 frame = latest_frame["img"].copy()
+                seq = latest_frame["seq"]
+
+            # Frames overwritten in the latest-frame slot were never inferred
+            metrics.frame_gap.set(seq - last_seq)
+            if seq > last_seq + 1:
+                metrics.dropped.inc(seq - last_seq - 1)
+            last_seq = seq
 
             t0 = time.time()
             results = model(
                 frame,
                 device=util.DEVICE,
                 imgsz=util.IMG_SIZE,
-                conf=0.5,
+                conf=LOW_CONF,
                 verbose=False,
             )
             if torch.cuda.is_available():
                 torch.cuda.synchronize()
             t1 = time.time()
             dt_ms = (t1 - t0) * 1000.0
+            metrics.stage["inference"].observe(t1 - t0)
+            metrics.inferred.inc()
 
             inst_fps = 1000.0 / dt_ms if dt_ms > 0 else 0.0
 
@@ -101,18 +154,35 @@ def main():
                 fps_ema = inst_fps
             else:
                 fps_ema = (1.0 - alpha) * fps_ema + alpha * inst_fps
+            metrics.fps.set(fps_ema)
 
             r = results[0]
             boxes = r.boxes
-            if boxes is None or len(boxes) == 0:
-                annotated = frame.copy()
+            if tracker is not None:
+                t_trk = time.time()
+                if boxes is None or len(boxes) == 0:
+                    dets = np.zeros((0, 6))
+                else:
+                    dets = np.column_stack([
+                        boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy()
+                    ])
+                tracks = tracker.update(dets)
+                metrics.stage["track"].observe(time.time() - t_trk)
+                metrics.tracks.set(len(tracks))
+                metrics.detections.inc(int(np.count_nonzero(dets[:, 4] >= CONF_THRES)))
+                annotated = draw_tracks(frame.copy(), tracks, r.names)
             else:
-                keep = boxes.conf >= CONF_THRES
-                boxes = boxes[keep]
-
-            r_filtered = r
-            r_filtered.boxes = boxes
-            annotated = r_filtered.plot()
+                if boxes is None or len(boxes) == 0:
+                    annotated = frame.copy()
+                else:
+                    keep = boxes.conf >= CONF_THRES
+                    boxes = boxes[keep]
+
+                r_filtered = r
+                r_filtered.boxes = boxes
+                annotated = r_filtered.plot()
+                if boxes is not None:
+                    metrics.detections.inc(len(boxes))
 
             fps_text = f"{fps_ema:5.1f} FPS ({dt_ms:4.1f} ms)"
             cv2.putText(
@@ -126,11 +196,22 @@ def main():
                 cv2.LINE_AA,
             )
 
-            cv2.imshow("YOLO11 Camera", annotated)
+            t2 = time.time()
+            metrics.stage["draw"].observe(t2 - t1)
+
+            if HEADLESS:
+                key = 0xFF
+            else:
+                cv2.imshow("YOLO11 Camera", annotated)
+                key = cv2.waitKey(1) & 0xFF
+            t3 = time.time()
+            metrics.stage["display"].observe(t3 - t2)
+            metrics.stage["total"].observe(t3 - t0)
 
-            key = cv2.waitKey(1) & 0xFF
             if key == ord("q"):
                 break
+            if key == ord("p"):
+                profiler.toggle()
 
     except KeyboardInterrupt:
         pass
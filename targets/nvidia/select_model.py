@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Latency-budget model / input-size selector.
+
+Benchmarks every (weights, imgsz) combination on this device, measures
+accuracy on a labeled validation folder, prints the latency/accuracy Pareto
+front and, given a latency budget, writes the best deployable configuration.
+
+Validation folder layout (same as review_yolo.py):
+  <dataset>/
+    images/...
+    labels/...
+    classes.txt
+
+Usage:
+  python3 select_model.py --weights yolo11n.pt yolo11s.pt yolo11m.pt \\
+      --imgsz 320 480 640 --data /workspace/datasets/toy_cars_val --budget-ms 33
+
+Outputs:
+  pareto.csv          every combination, with a pareto flag
+  deploy_model.json   the selected {model, imgsz} (only when --budget-ms is given)
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+import yaml
+
+import util
+
+FILE_PATH   = Path(__file__).resolve().parent
+IMG_EXTS    = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"}
+REPORT_PATH = (FILE_PATH / "pareto.csv").resolve()
+DEPLOY_PATH = (FILE_PATH / "deploy_model.json").resolve()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pick the most accurate model/imgsz within a latency budget")
+    parser.add_argument("--weights", nargs="+", required=True, help="Candidate .pt weights")
+    parser.add_argument("--imgsz", nargs="+", type=int, default=[util.IMG_SIZE], help="Candidate input sizes")
+    parser.add_argument("--data", required=True, help="Validation dataset root (images/, labels/, classes.txt)")
+    parser.add_argument("--device", default=util.DEVICE, help="Ultralytics device (0, cpu, ...)")
+    parser.add_argument("--n-latency", type=int, default=50, help="Validation images used for timing")
+    parser.add_argument("--latency-stat", choices=("p50", "p95", "mean"), default="p95",
+                        help="Latency statistic used for the Pareto front and the budget")
+    parser.add_argument("--metric", choices=("map50", "map50_95"), default="map50_95",
+                        help="Accuracy metric used for the Pareto front and the budget")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Latency budget per frame (ms)")
+    parser.add_argument("--report", default=str(REPORT_PATH))
+    parser.add_argument("--out", default=str(DEPLOY_PATH))
+    return parser.parse_args()
+
+
+def load_classes(dataset_root: Path) -> list[str]:
+    p = dataset_root / "classes.txt"
+    if not p.exists():
+        raise FileNotFoundError(f"[select_model] Missing {p}")
+    return [ln.strip() for ln in p.read_text().splitlines() if ln.strip()]
+
+
+def write_val_yaml(dataset_root: Path, classes: list[str], yaml_path: Path):
+    """Ultralytics data.yaml that validates on <dataset>/images (labels/ is found by path swap)."""
+    data = {
+        "path": str(dataset_root),
+        "train": "images",
+        "val": "images",
+        "nc": len(classes),
+        "names": classes,
+    }
+    yaml_path.write_text(yaml.dump(data, sort_keys=False))
+
+
+def load_latency_images(dataset_root: Path, n: int) -> list[np.ndarray]:
+    paths = sorted(p for p in (dataset_root / "images").rglob("*") if p.suffix.lower() in IMG_EXTS)
+    imgs = []
+    for p in paths[:n]:
+        img = cv2.imread(str(p))
+        if img is not None:
+            imgs.append(img)
+    if not imgs:
+        raise FileNotFoundError(f"[select_model] No readable images under {dataset_root / 'images'}")
+    return imgs
+
+
+def measure_latency(model, imgs, device, imgsz) -> dict[str, float]:
+    for img in imgs[:5]:
+        _ = model(img, device=device, imgsz=imgsz, verbose=False)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+
+    times_ms = []
+    for img in imgs:
+        t0 = time.perf_counter()
+        _ = model(img, device=device, imgsz=imgsz, verbose=False)
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+        times_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    t = np.asarray(times_ms)
+    return {
+        "p50": float(np.percentile(t, 50)),
+        "p95": float(np.percentile(t, 95)),
+        "mean": float(t.mean()),
+    }
+
+
+def measure_accuracy(model, data_yaml: Path, device, imgsz) -> dict[str, float]:
+    metrics = model.val(data=str(data_yaml), imgsz=imgsz, device=device, batch=1,
+                        plots=False, verbose=False)
+    return {"map50": float(metrics.box.map50), "map50_95": float(metrics.box.map)}
+
+
+def pareto_front(rows: list[dict], lat_key: str, acc_key: str) -> list[dict]:
+    """Rows not dominated by a faster-or-equal row with higher-or-equal accuracy."""
+    front = []
+    best_acc = -np.inf
+    for r in sorted(rows, key=lambda r: (r[lat_key], -r[acc_key])):
+        if r[acc_key] > best_acc:
+            front.append(r)
+            best_acc = r[acc_key]
+    return front
+
+
+def select_for_budget(front: list[dict], lat_key: str, acc_key: str, budget_ms: float):
+    fits = [r for r in front if r[lat_key] <= budget_ms]
+    if not fits:
+        return None
+    return max(fits, key=lambda r: r[acc_key])
+
+
+def main() -> int:
+    args = parse_args()
+    dataset_root = Path(args.data).expanduser().resolve()
+    classes = load_classes(dataset_root)
+    imgs = load_latency_images(dataset_root, args.n_latency)
+    lat_key = f"{args.latency_stat}_ms"
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        data_yaml = Path(tmp) / "val.yaml"
+        write_val_yaml(dataset_root, classes, data_yaml)
+
+        for weights in args.weights:
+            for imgsz in args.imgsz:
+                print(f"\n[select_model] {Path(weights).name} @ {imgsz}")
+                model = util.get_model(weights, imgsz=imgsz)
+                lat = measure_latency(model, imgs, args.device, imgsz)
+                acc = measure_accuracy(model, data_yaml, args.device, imgsz)
+                row = {
+                    "model": str(Path(weights).resolve()),
+                    "imgsz": imgsz,
+                    **{f"{k}_ms": v for k, v in lat.items()},
+                    **acc,
+                }
+                rows.append(row)
+                print(f"[select_model] {args.latency_stat} {row[lat_key]:.1f} ms | "
+                      f"mAP50 {acc['map50']:.3f} | mAP50-95 {acc['map50_95']:.3f}")
+
+    front = pareto_front(rows, lat_key, args.metric)
+    on_front = {(r["model"], r["imgsz"]) for r in front}
+
+    fields = ["model", "imgsz", "p50_ms", "p95_ms", "mean_ms", "map50", "map50_95", "pareto"]
+    with open(args.report, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for r in sorted(rows, key=lambda r: r[lat_key]):
+            w.writerow({**r, "pareto": int((r["model"], r["imgsz"]) in on_front)})
+
+    print(f"\n=== PARETO FRONT ({args.latency_stat} latency vs {args.metric}) ===")
+    for r in front:
+        print(f"  {Path(r['model']).name:<28} imgsz {r['imgsz']:>4}  "
+              f"{r[lat_key]:7.1f} ms  {args.metric} {r[args.metric]:.3f}")
+    print(f"[select_model] Full report: {args.report}")
+
+    if args.budget_ms is None:
+        return 0
+
+    best = select_for_budget(front, lat_key, args.metric, args.budget_ms)
+    if best is None:
+        print(f"[select_model] Nothing meets the {args.budget_ms:.1f} ms budget "
+              f"(fastest: {front[0][lat_key]:.1f} ms).", file=sys.stderr)
+        return 1
+
+    deploy = {
+        "model": best["model"],
+        "imgsz": best["imgsz"],
+        "device": str(args.device),
+        "budget_ms": args.budget_ms,
+        "latency_stat": args.latency_stat,
+        "latency_ms": round(best[lat_key], 2),
+        args.metric: round(best[args.metric], 4),
+    }
+    Path(args.out).write_text(json.dumps(deploy, indent=2) + "\n")
+    print(f"[select_model] Selected {Path(best['model']).name} @ {best['imgsz']} "
+          f"({best[lat_key]:.1f} ms, {args.metric} {best[args.metric]:.3f}) -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
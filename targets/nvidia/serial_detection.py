@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+import os
+import sys
 import time
 from pathlib import Path
 
@@ -10,6 +12,13 @@ from ultralytics import YOLO  # only needed if get_model uses it internally
 # e.g. from targets.nvidia.test import get_model, DEVICE, IMG_SIZE
 import util
 
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT / "common") not in sys.path:
+    sys.path.insert(0, str(ROOT / "common"))
+from runtime import thread_config
+from runtime.profiler import SamplingProfiler
+from runtime.metrics import PipelineMetrics
+
 # Camera settings
 CAM_INDEX = 0           # /dev/video0
 WIDTH, HEIGHT = 1280, 720
@@ -19,10 +28,21 @@ CONF_THRES = 0.85       # YOLO confidence threshold
 # Paths
 FILE_PATH  = Path(__file__).resolve().parent
 MODEL_PATH = (FILE_PATH / "yolo11n_coins.pt").resolve()
+THREAD_CONFIG_PATH = (FILE_PATH / "thread_config.json").resolve()  # written by tune_threads.py
+PROFILE_DIR = (FILE_PATH / "profiles").resolve()
+
+# On-demand profiler (press 'p' or send SIGUSR1)
+PROFILE_RATE_HZ = 200
+PROFILE_SECONDS = 10.0
+
+# Telemetry: Prometheus text at http://127.0.0.1:METRICS_PORT/metrics (None = off)
+METRICS_PORT = 9108
+HEADLESS = not os.environ.get("DISPLAY")  # no window when there is no X display
 
 
 def main():
     print(f"[main] Using MODEL_PATH = {MODEL_PATH}")
+    thread_config.apply_thread_config(thread_config.load_thread_config(THREAD_CONFIG_PATH))
     # Load model using your utility:
     # - On Jetson (aarch64): creates/loads .engine
     # - On x86: loads .pt directly
@@ -41,20 +61,34 @@ def main():
     fourcc = cv2.VideoWriter_fourcc(*"MJPG")
     cap.set(cv2.CAP_PROP_FOURCC, fourcc)
 
-    cv2.namedWindow("YOLO11 Camera", cv2.WINDOW_NORMAL)
-    cv2.resizeWindow("YOLO11 Camera", WIDTH, HEIGHT)
+    if not HEADLESS:
+        cv2.namedWindow("YOLO11 Camera", cv2.WINDOW_NORMAL)
+        cv2.resizeWindow("YOLO11 Camera", WIDTH, HEIGHT)
+
+    metrics = PipelineMetrics()
+    if METRICS_PORT is not None:
+        try:
+            metrics.serve(METRICS_PORT)
+        except OSError as e:  # port busy (second instance, other exporter): run without telemetry
+            print(f"[metrics] disabled: cannot bind port {METRICS_PORT} ({e})")
 
-    print("[main] Press 'q' to quit.")
+    profiler = SamplingProfiler(PROFILE_DIR, rate_hz=PROFILE_RATE_HZ, duration_s=PROFILE_SECONDS)
+    profiler.install_signal()
+
+    print("[main] Press 'q' to quit, 'p' to profile.")
 
     fps_ema = 0.0
     alpha = 0.1  # smoothing factor; smaller = smoother
 
     try:
         while True:
+            t_cap = time.time()
             ret, frame = cap.read()
+            metrics.stage["capture"].observe(time.time() - t_cap)
             if not ret:
                 print("[main] Failed to grab frame")
                 break
+            metrics.captured.inc()
 
             t0 = time.time()
             # Serial inference on the raw frame
@@ -69,6 +103,8 @@ def main():
                 torch.cuda.synchronize()
             t1 = time.time()
             dt_ms = (t1 - t0) * 1000.0
+            metrics.stage["inference"].observe(t1 - t0)
+            metrics.inferred.inc()
 
             # Draw boxes/labels
             annotated = results[0].plot()
@@ -79,7 +115,7 @@ def main():
                 fps_ema = inst_fps
             else:
                 fps_ema = (1.0 - alpha) * fps_ema + alpha * inst_fps
-
+            metrics.fps.set(fps_ema)
 
             r = results[0]
             boxes = r.boxes
@@ -92,6 +128,8 @@ def main():
             r_filtered = r
             r_filtered.boxes = boxes
             annotated = r_filtered.plot()
+            if boxes is not None:
+                metrics.detections.inc(len(boxes))
 
             fps_text = f"{fps_ema:5.1f} FPS ({dt_ms:4.1f} ms)"
 
@@ -106,11 +144,21 @@ def main():
                 cv2.LINE_AA,
             )
 
-            cv2.imshow("YOLO11 Camera", annotated)
+            t2 = time.time()
+            metrics.stage["draw"].observe(t2 - t1)
 
-            key = cv2.waitKey(1) & 0xFF
+            if HEADLESS:
+                key = 0xFF
+            else:
+                cv2.imshow("YOLO11 Camera", annotated)
+                key = cv2.waitKey(1) & 0xFF
+            t3 = time.time()
+            metrics.stage["display"].observe(t3 - t2)
+            metrics.stage["total"].observe(t3 - t_cap)
             if key == ord("q"):
                 break
+            if key == ord("p"):
+                profiler.toggle()
 
     except KeyboardInterrupt:
         pass
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+CPU thread / core-affinity autotuner for the detection pipelines.
+
+On CPU-only hosts the inference library (torch or OpenCV DNN) and the capture
+thread of parallel_detection.py compete for the same cores. This script runs the
+same two-thread structure (capture thread -> latest frame -> inference + draw)
+for every combination of:
+
+  - torch intra-op threads       (--torch-threads)
+  - cv2.setNumThreads            (--cv2-threads)
+  - core layout                  (--layouts)
+      none        : no pinning
+      split_first : capture on the first core, inference/render on the rest
+      split_last  : capture on the last core, inference/render on the rest
+
+For each combination it measures throughput (inferences/s) and tail latency
+(p50/p95/p99 per-iteration ms) and writes the best one to thread_config.json,
+which parallel_detection.py and serial_detection.py load at startup.
+
+Usage:
+  python3 tune_threads.py                                  # ultralytics .pt on CPU
+  python3 tune_threads.py --backend opencv --model ../../common/yolov8n.onnx
+  python3 tune_threads.py --camera 0 --duration 8          # real camera as capture load
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+FILE_PATH = Path(__file__).resolve().parent
+ROOT = FILE_PATH.parents[1]
+if str(ROOT / "common") not in sys.path:
+    sys.path.insert(0, str(ROOT / "common"))
+
+from runtime import thread_config  # noqa: E402
+
+IMG_PATH    = (ROOT / "common" / "opencv_inference" / "zidane.jpg").resolve()
+MODEL_PATH  = (FILE_PATH / "yolo11n.pt").resolve()
+CONFIG_PATH = (FILE_PATH / "thread_config.json").resolve()
+LAYOUTS     = ("none", "split_first", "split_last")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tune CPU thread counts and core pinning")
+    parser.add_argument("--backend", choices=("ultralytics", "opencv"), default="ultralytics",
+                        help="ultralytics = torch/TensorRT via util.get_model, opencv = cv2.dnn ONNX")
+    parser.add_argument("--model", default=str(MODEL_PATH), help="Model path (.pt/.engine or .onnx)")
+    parser.add_argument("--image", default=str(IMG_PATH), help="Image used for inference and synthetic capture")
+    parser.add_argument("--camera", type=int, default=None,
+                        help="Use this camera index as the capture load instead of synthetic JPEG decode")
+    parser.add_argument("--capture-fps", type=float, default=30.0,
+                        help="Synthetic capture rate (frames/s); 0 = free-running")
+    parser.add_argument("--device", default="cpu", help="Ultralytics device (default: cpu)")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--torch-threads", default=None, help="Comma list, e.g. '1,2,4' (default: auto)")
+    parser.add_argument("--cv2-threads", default=None, help="Comma list, e.g. '0,1,4' (default: auto)")
+    parser.add_argument("--layouts", default=",".join(LAYOUTS), help=f"Comma list from {LAYOUTS}")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Seconds discarded per combination")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds measured per combination")
+    parser.add_argument("--objective", choices=("fps", "p99"), default="fps",
+                        help="fps: max throughput (ties -> lower p99); p99: min tail latency")
+    parser.add_argument("--out", default=str(CONFIG_PATH), help="Where to write the best config")
+    return parser.parse_args()
+
+
+def _int_list(text, default):
+    if text is None:
+        return default
+    return [int(t) for t in text.split(",") if t.strip()]
+
+
+def default_thread_counts(n_cores: int) -> list[int]:
+    cands = {1, 2, 4, max(1, n_cores - 1), n_cores}
+    return sorted(c for c in cands if c <= n_cores)
+
+
+def core_layout(layout: str, cores: list[int]):
+    """Return (infer_cores, capture_cores) for a layout name."""
+    if layout == "none" or len(cores) < 2:
+        return None, None
+    if layout == "split_first":
+        return cores[1:], cores[:1]
+    if layout == "split_last":
+        return cores[:-1], cores[-1:]
+    raise ValueError(f"Unknown layout '{layout}'")
+
+
+# ============================================================
+# Inference backends
+# ============================================================
+
+def make_ultralytics_infer(model_path, device, imgsz):
+    import util  # ultralytics import is deferred so --backend opencv works without it
+
+    model = util.get_model(model_path)
+
+    def infer(frame):
+        return model(frame, device=device, imgsz=imgsz, verbose=False)[0].plot()
+
+    return infer
+
+
+def make_opencv_infer(model_path, imgsz):
+    net = cv2.dnn.readNetFromONNX(str(model_path))
+
+    def infer(frame):
+        h, w = frame.shape[:2]
+        length = max(h, w)
+        square = np.zeros((length, length, 3), np.uint8)
+        square[:h, :w] = frame
+        blob = cv2.dnn.blobFromImage(square, scalefactor=1 / 255, size=(imgsz, imgsz), swapRB=True)
+        net.setInput(blob)
+        net.forward()
+        vis = frame.copy()
+        cv2.putText(vis, "tune", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2, cv2.LINE_AA)
+        return vis
+
+    return infer
+
+
+# ============================================================
+# One measured trial
+# ============================================================
+
+def run_trial(infer, cfg, frame_source, warmup_s, duration_s):
+    """
+    Run capture thread + inference loop with `cfg` applied and return
+    (fps, latencies_ms, frames_captured).
+    """
+    thread_config.apply_thread_config(cfg, label="[tune_threads]")
+
+    latest = {"img": None, "n": 0}
+    cond = threading.Condition()
+    stop_event = threading.Event()
+
+    def capture_loop():
+        thread_config.pin_current_thread(cfg.get("capture_cores"))
+        try:
+            while not stop_event.is_set():
+                frame = frame_source()
+                if frame is None:
+                    break
+                with cond:
+                    latest["img"] = frame
+                    latest["n"] += 1
+                    cond.notify_all()
+        finally:
+            # Source ended (or failed): wake the inference loop so it stops too
+            with cond:
+                stop_event.set()
+                cond.notify_all()
+
+    cap_thread = threading.Thread(target=capture_loop, daemon=True)
+    cap_thread.start()
+
+    lat_ms = []
+    n_done = 0
+    t_start = time.perf_counter()
+    t_measure = t_start + warmup_s
+    t_end = t_measure + duration_s
+    n_cap_start = 0
+    try:
+        while True:
+            with cond:
+                while latest["img"] is None and not stop_event.is_set():
+                    cond.wait(timeout=1.0)
+                frame = latest["img"]
+            if frame is None:
+                raise RuntimeError("[tune_threads] Capture source produced no frames")
+            if stop_event.is_set():
+                print("[tune_threads] Capture source ended before the trial finished")
+                break
+
+            t0 = time.perf_counter()
+            infer(frame)
+            t1 = time.perf_counter()
+
+            if t0 >= t_measure:
+                if n_done == 0:
+                    n_cap_start = latest["n"]
+                    t_first = t0
+                lat_ms.append((t1 - t0) * 1000.0)
+                n_done += 1
+            if t1 >= t_end:
+                break
+    finally:
+        stop_event.set()
+        cap_thread.join(timeout=1.0)
+
+    elapsed = time.perf_counter() - t_first if n_done else 0.0
+    fps = n_done / elapsed if elapsed > 0 else 0.0
+    return fps, np.asarray(lat_ms), latest["n"] - n_cap_start
+
+
+def make_frame_source(args, image):
+    if args.camera is not None:
+        cap = cv2.VideoCapture(args.camera, cv2.CAP_V4L2)
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open camera index {args.camera}")
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+
+        def read_camera():
+            ret, frame = cap.read()
+            return frame if ret else None
+
+        return read_camera, cap.release
+
+    # Synthetic capture: MJPEG decode of the test image at the camera frame rate
+    ok, jpg = cv2.imencode(".jpg", image)
+    if not ok:
+        raise RuntimeError("[tune_threads] Could not JPEG-encode the test image")
+    period = 1.0 / args.capture_fps if args.capture_fps > 0 else 0.0
+    next_t = [time.perf_counter()]
+
+    def read_synthetic():
+        if period:
+            next_t[0] += period
+            delay = next_t[0] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t[0] = time.perf_counter()
+        return cv2.imdecode(jpg, cv2.IMREAD_COLOR)
+
+    return read_synthetic, lambda: None
+
+
+def pick_best(results, objective):
+    if objective == "p99":
+        return min(results, key=lambda r: (r["p99_ms"], -r["fps"]))
+    best_fps = max(r["fps"] for r in results)
+    # Within 2% of the best throughput, prefer the tighter tail
+    close = [r for r in results if r["fps"] >= 0.98 * best_fps]
+    return min(close, key=lambda r: r["p99_ms"])
+
+
+def main():
+    args = parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        raise FileNotFoundError(f"[tune_threads] Could not read image '{args.image}'.")
+
+    if args.backend == "ultralytics":
+        infer = make_ultralytics_infer(args.model, args.device, args.imgsz)
+    else:
+        infer = make_opencv_infer(args.model, args.imgsz)
+
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    n_cores = len(cores)
+
+    if args.backend == "ultralytics" and thread_config.torch is not None:
+        torch_counts = _int_list(args.torch_threads, default_thread_counts(n_cores))
+    else:
+        torch_counts = [None]
+    cv2_counts = _int_list(args.cv2_threads, sorted({0, 1, n_cores}))
+    layouts = [s.strip() for s in args.layouts.split(",") if s.strip()]
+    if n_cores < 2:
+        layouts = ["none"]
+
+    combos = list(itertools.product(torch_counts, cv2_counts, layouts))
+    print(f"[tune_threads] {n_cores} cores {cores}, {len(combos)} combinations, "
+          f"{args.warmup + args.duration:.1f} s each")
+
+    frame_source, release = make_frame_source(args, image)
+    results = []
+    try:
+        for n_torch, n_cv2, layout in combos:
+            infer_cores, capture_cores = core_layout(layout, cores)
+            cfg = {
+                "torch_threads": n_torch,
+                "cv2_threads": n_cv2,
+                # "none" still resets any mask left by the previous trial
+                "infer_cores": infer_cores or cores,
+                "capture_cores": capture_cores,
+            }
+            fps, lat, n_cap = run_trial(infer, cfg, frame_source, args.warmup, args.duration)
+            if lat.size == 0:
+                print(f"[tune_threads] {layout}: no measured iterations, skipping")
+                continue
+            p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+            res = {
+                "cfg": dict(cfg, infer_cores=infer_cores, capture_cores=capture_cores),
+                "layout": layout,
+                "fps": fps,
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "capture_fps": n_cap / args.duration,
+            }
+            results.append(res)
+            print(f"[tune_threads] torch={str(n_torch):>4} cv2={n_cv2:>2} {layout:<11} "
+                  f"{fps:6.1f} inf/s  p50 {p50:6.1f}  p95 {p95:6.1f}  p99 {p99:6.1f} ms  "
+                  f"capture {res['capture_fps']:5.1f} fps")
+    finally:
+        release()
+
+    if not results:
+        print("[tune_threads] No results; nothing written.", file=sys.stderr)
+        return 1
+
+    best = pick_best(results, args.objective)
+    measured = {
+        "backend": args.backend,
+        "model": str(args.model),
+        "objective": args.objective,
+        "layout": best["layout"],
+        "fps": round(best["fps"], 2),
+        "p50_ms": round(best["p50_ms"], 2),
+        "p95_ms": round(best["p95_ms"], 2),
+        "p99_ms": round(best["p99_ms"], 2),
+        "cores": cores,
+    }
+    thread_config.save_thread_config(args.out, best["cfg"], extra=measured)
+    print(f"\n[tune_threads] Best ({args.objective}): {best['cfg']}")
+    print(f"[tune_threads] {best['fps']:.1f} inf/s, p99 {best['p99_ms']:.1f} ms")
+    print(f"[tune_threads] Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
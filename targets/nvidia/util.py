@@ -59,15 +59,20 @@ def describe_model(model):
         precision = "FP16" if "_FP16" in model.__str__() else "FP32"
         print(f"Model type: TensorRT | Precision: {precision}")
 
-def get_model(model_path):
+def get_model(model_path, imgsz: int = IMG_SIZE):
     """
     On Jetson (aarch64): ensure TensorRT engine exists and load it.
     On x86: load the PyTorch .pt model directly.
+
+    TensorRT engines are built for a fixed input size; engines for an imgsz other
+    than IMG_SIZE get the size in their name (e.g. yolo11n_480_FP16.engine).
     """
     model_path = Path(model_path).resolve()
     
     # Strip any existing precision suffix from the model name (i.e., _FP16 or _FP32)
     model_name = model_path.stem  # Base name without suffix
+    if imgsz != IMG_SIZE:
+        model_name = f"{model_name}_{imgsz}"
     engine_path_fp16 = model_path.with_name(f"{model_name}_FP16.engine")
     engine_path_fp32 = model_path.with_name(f"{model_name}_FP32.engine")
 
@@ -84,7 +89,7 @@ def get_model(model_path):
         else:
             # Engine doesn't exist, create one
             print(f"[get_model] Engine not found. Creating TensorRT engine with {'FP16' if FP16 else 'FP32'} precision...")
-            create_engine(model_path, engine_path_fp16 if FP16 else engine_path_fp32, device=DEVICE, imgsz=IMG_SIZE)
+            create_engine(model_path, engine_path_fp16 if FP16 else engine_path_fp32, device=DEVICE, imgsz=imgsz)
             model = YOLO(str(engine_path_fp16 if FP16 else engine_path_fp32))
 
     else: